@@ -0,0 +1,68 @@
+"""
+Command dispatch cost vs number of registered commands.
+
+Compares the old lookup (scan every command's alias list) with the
+CommandRegistry's alias map, and times CommandHandler.handle_command
+end to end with a trivial command, for 10 to 500 registered commands.
+
+Usage (from the repo root):
+  python benchmarks/bench_command_dispatch.py
+"""
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from command_handler import CommandHandler  # noqa: E402
+from command_registry import CommandSpec  # noqa: E402
+
+REPEAT = 20000
+
+
+class NullBot:
+    def send_message(self, channel, message):
+        pass
+
+
+class EchoCommand:
+    def execute(self, args):
+        return args
+
+
+def linear_lookup(command_aliases, command):
+    """The pre-registry dispatch: a scan over {command: {"aliases": [...]}}."""
+    for cmd_obj, cmd_data in command_aliases.items():
+        if command in cmd_data["aliases"]:
+            return cmd_obj
+    return None
+
+
+def main():
+    print(f"{'commands':>8s} {'linear scan':>12s} {'registry':>10s} {'handle_command':>15s}   (ns per call)")
+    for count in (10, 50, 100, 500):
+        handler = CommandHandler()
+        # At least one echo command, whatever the built-ins number, so the
+        # timed alias is always a plain dispatch (not e.g. the admin-only !stats).
+        for i in range(max(1, count - len(handler.registry))):
+            handler.registry.register(CommandSpec([f"!cmd{i}", f"!c{i}"], EchoCommand()))
+        # Worst case for the scan: the last registered echo command
+        alias = f"!c{i}"
+        command_aliases = {spec.command: {"aliases": list(spec.aliases)} for spec in handler.registry}
+
+        linear = timeit.timeit(lambda: linear_lookup(command_aliases, alias), number=REPEAT)
+        registry = timeit.timeit(lambda: handler.registry.lookup(alias), number=REPEAT)
+        bot = NullBot()
+        logging.disable(logging.INFO)  # One "Handled" line per call would drown the numbers
+        try:
+            full = timeit.timeit(lambda: handler.handle_command(bot, "nick", "#chan", f"{alias} hi"),
+                                 number=REPEAT)
+        finally:
+            logging.disable(logging.NOTSET)
+        print(f"{count:8d} {linear / REPEAT * 1e9:12.0f} {registry / REPEAT * 1e9:10.0f} "
+              f"{full / REPEAT * 1e9:15.0f}")
+
+
+if __name__ == "__main__":
+    main()
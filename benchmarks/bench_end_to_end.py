@@ -0,0 +1,222 @@
+"""
+End-to-end load test: IrcBot against a local fake IRC server.
+
+The bot connects to FakeIrcServer (fake_irc_server.py) exactly as it would
+to a real network, joins N channels, and then gets M messages per second
+spread over them, mixed from:
+
+  commands - "!bench <id>", a benchmark-only command that echoes the id
+  urls     - links to a local HTTP server whose page title carries the id
+  chatter  - plain text, which the bot must read but not answer
+
+Each reply is matched to its message by id, giving end-to-end reply
+latency (message written by the server -> reply read back) per kind. The
+server also PINGs the bot every second; PONG latency shows how responsive
+the read loop stays under load. The send queue gets a fast bucket so flood
+protection pacing doesn't hide everything else.
+
+The bot, server and load generator share one process (the bot on its own
+threads), so compare runs with each other rather than with production.
+
+Usage (from the repo root):
+  python benchmarks/bench_end_to_end.py [--async] [--channels 5] [--rate 20] [--duration 10]
+                                        [--mix commands=0.4,urls=0.2,chatter=0.4] [--workers 4]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from command_registry import CommandSpec  # noqa: E402
+from fake_irc_server import FakeIrcServer  # noqa: E402
+from irc_bot import IrcBot  # noqa: E402
+from seen_links import SeenLinks  # noqa: E402
+from send_queue import TokenBucket  # noqa: E402
+
+KINDS = ("commands", "urls", "chatter")
+ID_PATTERN = re.compile(r"bench-(\d+)")
+GRACE_PERIOD = 10  # seconds to wait for outstanding replies after the last message
+
+
+class BenchCommand:
+    """!bench <id> -> "bench-<id>", with no I/O: measures the bot, not an upstream."""
+
+    def execute(self, args):
+        return f"bench-{args.strip()}"
+
+
+class TitleHandler(BaseHTTPRequestHandler):
+    """Every page is titled after its path, e.g. /bench-17 -> "bench-17"."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = f"<html><head><title>{self.path.strip('/')}</title></head><body></body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_title_server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), TitleHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def make_bot(port, channels, use_async, workers):
+    if use_async:
+        from async_irc_bot import AsyncIrcBot
+        bot_class = AsyncIrcBot
+    else:
+        bot_class = IrcBot
+    bot = bot_class(server="127.0.0.1", port=port, channels=channels, workers=workers)
+    bot.command_handler.registry.register(CommandSpec(["!bench"], BenchCommand()))
+    bot.send_queue.bucket = TokenBucket(rate=100_000, capacity=100_000)  # No flood pacing
+    fetcher = bot.url_fetcher
+    fetcher.host_limiter.min_interval = 0       # Every link goes to the same local host
+    fetcher.host_limiter.max_concurrent = 64
+    fetcher.seen_links = SeenLinks()            # In memory, no seen_links.db
+    fetcher.youtube.cache.path = None
+    return bot
+
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in KINDS:
+            raise SystemExit(f"Unknown message kind {kind!r}, expected one of {', '.join(KINDS)}")
+        weights[kind] = float(weight)
+    return weights
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def format_ms(seconds):
+    return f"{seconds * 1000:8.1f}"
+
+
+async def run_load(args):
+    mix = parse_mix(args.mix)
+    channels = [f"#load{i}" for i in range(args.channels)]
+    httpd = start_title_server()
+    title_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    sent_at = {}   # id -> (kind, time written)
+    latencies = {kind: [] for kind in KINDS}
+    pongs = []
+    unexpected = []
+
+    def on_privmsg(channel, text, received_at):
+        match = ID_PATTERN.search(text)
+        entry = sent_at.pop(int(match.group(1)), None) if match else None
+        if entry is None:
+            unexpected.append(text)
+            return
+        kind, written = entry
+        latencies[kind].append(received_at - written)
+
+    server = await FakeIrcServer(on_privmsg=on_privmsg, on_pong=pongs.append).start()
+    bot = make_bot(server.port, channels, args.use_async, args.workers)
+    threading.Thread(target=bot.connect, daemon=True).start()
+    await server.wait_joined(channels)
+
+    rng = random.Random(1)
+    kinds, weights = zip(*mix.items())
+    counts = {kind: 0 for kind in KINDS}
+    interval = 1 / args.rate
+    total = int(args.rate * args.duration)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    for n in range(total):
+        delay = start + n * interval - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind = rng.choices(kinds, weights)[0]
+        channel = channels[n % len(channels)]
+        nick = f"user{rng.randrange(50)}"
+        if kind == "commands":
+            text = f"!bench {n}"
+        elif kind == "urls":
+            text = f"look at this {title_url}/bench-{n}"
+        else:
+            text = f"just chatting, message {n} of {total}"
+        if kind != "chatter":
+            sent_at[n] = (kind, time.perf_counter())
+        server.privmsg(nick, channel, text)
+        counts[kind] += 1
+    send_duration = loop.time() - start
+
+    deadline = loop.time() + GRACE_PERIOD
+    while sent_at and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    elapsed = loop.time() - start
+
+    logging.disable(logging.CRITICAL)  # The bot would only complain about the connection going away
+    await loop.run_in_executor(None, bot.stop)
+    await server.close()
+    httpd.shutdown()
+
+    core = "asyncio" if args.use_async else "threads"
+    print(f"core={core} channels={args.channels} rate={args.rate}/s duration={args.duration}s "
+          f"workers={bot.worker_pool.workers} mix={args.mix}")
+    print(f"sent {total} messages in {send_duration:.1f}s "
+          f"({total / send_duration:.0f}/s offered)")
+    print(f"{'kind':10s} {'sent':>6s} {'replies':>8s} {'lost':>6s} "
+          f"{'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    replies = 0
+    for kind in KINDS:
+        values = sorted(latencies[kind])
+        replies += len(values)
+        if kind == "chatter":
+            print(f"{kind:10s} {counts[kind]:6d} {'-':>8s}")
+            continue
+        lost = counts[kind] - len(values)
+        print(f"{kind:10s} {counts[kind]:6d} {len(values):8d} {lost:6d} "
+              f"{format_ms(percentile(values, 0.50))} {format_ms(percentile(values, 0.95))} "
+              f"{format_ms(percentile(values, 0.99))} {format_ms(values[-1] if values else 0)}")
+    pongs.sort()
+    if pongs:
+        print(f"{'PING/PONG':10s} {len(pongs):6d} {len(pongs):8d} {'':6s} "
+              f"{format_ms(percentile(pongs, 0.50))} {format_ms(percentile(pongs, 0.95))} "
+              f"{format_ms(percentile(pongs, 0.99))} {format_ms(pongs[-1])}")
+    print(f"throughput: {replies / elapsed:.1f} replies/s, {server.lines_sent / elapsed:.1f} lines/s to the bot, "
+          f"{server.lines_received / elapsed:.1f} lines/s from the bot")
+    if unexpected:
+        print(f"{len(unexpected)} unexpected replies, e.g. {unexpected[0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use the asyncio connection core")
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=20, help="messages per second, over all channels")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load")
+    parser.add_argument("--mix", default="commands=0.4,urls=0.2,chatter=0.4")
+    parser.add_argument("--workers", type=int, default=None, help="worker pool size (default: WorkerPool.WORKERS)")
+    asyncio.run(run_load(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measures how many lines/second LineFramer + parse_message get through.
+
+Usage (from the repo root):
+  python benchmarks/bench_irc_protocol.py                # synthetic session
+  python benchmarks/bench_irc_protocol.py session.log    # captured raw session
+
+A captured session is the raw bytes the server sent (e.g. dumped from a
+socket or a bouncer log with CRLF line endings).
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from irc_protocol import LineFramer, parse_message  # noqa: E402
+
+
+def synthetic_session(lines=200_000):
+    rng = random.Random(1)
+    templates = [
+        b":nick%d!~user@host.example.org PRIVMSG #smliiga :hyv\xc3\xa4 maali taas %d\r\n",
+        b":nick%d!~user@host.example.org PRIVMSG #valioliiga :!stock NOKIA.HE %d\r\n",
+        b":nick%d!~user@host.example.org PRIVMSG #nakkimuusi :katso https://example.com/%d\r\n",
+        b":server.quakenet.org 353 KukistiBot = #smliiga :@nick%d +nick%d\r\n",
+        b":nick%d!~user@host.example.org JOIN #smliiga %d\r\n",
+        b"@time=2024-01-01T00:00:00Z :nick%d!u@h NOTICE KukistiBot :legacy \xe4\xf6 %d\r\n",
+        b"PING :irc.quakenet.org%d%d\r\n",
+    ]
+    return b"".join(rng.choice(templates) % (i, i) for i in range(lines))
+
+
+def chunks(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def run(data, chunk_size=4096, decode=False):
+    framer = LineFramer()
+    count = 0
+    start = time.perf_counter()
+    for chunk in chunks(data, chunk_size):
+        for line in framer.feed(chunk):
+            message = parse_message(line)
+            if message is not None and decode and message.command == "PRIVMSG":
+                message.params  # noqa: B018 - force the lazy decode
+            count += 1
+    elapsed = time.perf_counter() - start
+    return count, elapsed
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            data = f.read()
+        source = sys.argv[1]
+    else:
+        data = synthetic_session()
+        source = "synthetic"
+
+    print(f"Session: {source}, {len(data) / 1_000_000:.1f} MB")
+    for decode in (False, True):
+        count, elapsed = run(data, decode=decode)
+        label = "frame+parse+decode PRIVMSG" if decode else "frame+parse"
+        print(f"{label:28s} {count} lines in {elapsed:.3f}s = {count / elapsed:,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
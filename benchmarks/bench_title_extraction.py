@@ -0,0 +1,87 @@
+"""
+Compares the old title extraction (whole body + apparent_encoding +
+BeautifulSoup) with URLFetcher's streaming extract_title().
+
+Usage (from the repo root):
+  python benchmarks/bench_title_extraction.py              # synthetic pages
+  python benchmarks/bench_title_extraction.py pages/       # directory of saved .html files
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from html_title import extract_title  # noqa: E402
+
+CHUNK_SIZE = 8192
+
+
+def synthetic_corpus():
+    head = (
+        '<!doctype html><html><head><meta charset="utf-8">'
+        '<title>Uutiset: Kärpät voitti taas</title>'
+        + '<link rel="stylesheet" href="/s.css">' * 40
+        + '<meta property="og:title" content="Kärpät voitti taas">'
+        + "<script>var x = 1;</script>" * 40
+        + "</head><body>"
+    )
+    pages = []
+    for size_kb in (50, 300, 1000, 3000):
+        body = "<div class='article'><p>Lorem ipsum dolor sit amet, äöå.</p></div>" * (size_kb * 16)
+        pages.append((f"synthetic-{size_kb}kB", (head + body + "</body></html>").encode("utf-8")))
+    return pages
+
+
+def load_corpus(directory):
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), "rb") as f:
+                pages.append((name, f.read()))
+    return pages
+
+
+def old_extract(data):
+    from bs4 import BeautifulSoup
+    from charset_normalizer import from_bytes
+
+    best = from_bytes(data).best()
+    text = data.decode(best.encoding if best else "utf-8", errors="replace")
+    soup = BeautifulSoup(text, "html.parser")
+    og_title = soup.find("meta", property="og:title")
+    if og_title and og_title.get("content"):
+        return og_title["content"].strip()
+    if soup.title and soup.title.string:
+        return soup.title.string.strip()
+    return None
+
+
+def new_extract(data):
+    chunks = (data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE))
+    return extract_title(chunks)
+
+
+def timed(func, data, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(data)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    pages = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else synthetic_corpus()
+    print(f"{'page':32s} {'size':>9s} {'old ms':>9s} {'new ms':>9s} {'speedup':>8s}")
+    for name, data in pages:
+        repeat = 3 if len(data) > 500_000 else 10
+        old_time, old_title = timed(old_extract, data, repeat)
+        new_time, new_title = timed(new_extract, data, repeat * 10)
+        match = "" if old_title == new_title else f"  (titles differ: {old_title!r} vs {new_title!r})"
+        print(
+            f"{name[:32]:32s} {len(data) / 1024:8.0f}k {old_time * 1000:9.2f} "
+            f"{new_time * 1000:9.3f} {old_time / new_time:7.0f}x{match}"
+        )
+
+
+if __name__ == "__main__":
+    main()
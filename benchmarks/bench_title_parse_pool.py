@@ -0,0 +1,99 @@
+"""
+Burst of links: title parsing in the fetching threads vs in a TitleParsePool.
+
+Simulates 50 links arriving at once, fetched by 8 threads (like
+URLFetcher's fetch pool), each parsing a page with a heavy <head>. While
+the burst runs, a ticker thread stands in for the IRC listener / Liiga
+poller and records how late its 1 ms wake-ups are (GIL contention).
+
+Usage (from the repo root):
+  python benchmarks/bench_title_parse_pool.py [links] [processes]
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from html_title import TitleParsePool, extract_title, read_head  # noqa: E402
+
+FETCH_THREADS = 8
+CHUNK_SIZE = 8192
+
+
+def make_page(i):
+    head = (
+        f"<!doctype html><html><head><meta charset='utf-8'><title>Uutinen {i}: Kärpät voitti</title>"
+        + "".join(f"<meta name='x-{n}' content='{'ä' * 20}'>" for n in range(400))
+        + "<link rel='preload' href='/static/app.js' as='script'>" * 300
+        + "<script>window.__STATE__ = {\"a\": [1, 2, 3], \"b\": \"<b>x</b>\"};</script>" * 300
+        + "</head><body>"
+    )
+    return (head + "<p>body</p>" * 1000).encode("utf-8")
+
+
+def chunks_of(data):
+    return [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+
+
+class Ticker(threading.Thread):
+    """Sleeps 1 ms in a loop and records how late each wake-up was."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.lateness = []
+        self.running = True
+
+    def run(self):
+        while self.running:
+            start = time.perf_counter()
+            time.sleep(0.001)
+            self.lateness.append(time.perf_counter() - start - 0.001)
+
+
+def run_burst(pages, parse):
+    ticker = Ticker()
+    ticker.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=FETCH_THREADS) as executor:
+        titles = list(executor.map(parse, pages))
+    elapsed = time.perf_counter() - start
+    ticker.running = False
+    ticker.join()
+    lateness = sorted(ticker.lateness)
+    p99 = lateness[int(len(lateness) * 0.99)] if lateness else 0.0
+    return elapsed, p99, max(lateness, default=0.0), titles
+
+
+def main():
+    links = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    pages = [make_page(i) for i in range(links)]
+    head_kb = len(read_head(chunks_of(pages[0]))) / 1024
+    print(f"{links} links, ~{head_kb:.0f} kB of <head> each, {FETCH_THREADS} fetch threads")
+
+    def in_thread(page):
+        return extract_title(chunks_of(page))
+
+    pool = TitleParsePool(processes=processes)
+    pool.start()  # Worker start-up isn't part of a burst
+
+    def pooled(page):
+        return pool.extract_title(read_head(chunks_of(page)))
+
+    try:
+        for name, parse in (("in-thread", in_thread), (f"pool x{processes}", pooled)):
+            elapsed, p99, worst, titles = run_burst(pages, parse)
+            assert titles[0] == "Uutinen 0: Kärpät voitti", titles[0]
+            print(
+                f"{name:12s} {elapsed * 1000:8.1f} ms total  {links / elapsed:7.1f} links/s  "
+                f"ticker lateness p99 {p99 * 1000:6.2f} ms, max {worst * 1000:6.2f} ms"
+            )
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
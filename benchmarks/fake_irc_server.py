@@ -0,0 +1,154 @@
+"""
+A stand-in IRC server for end-to-end benchmarks, speaking just enough of
+the protocol for IrcBot: registration (NICK/USER -> 001), PING/PONG, JOIN
+and PRIVMSG. It serves one client at a time and lets the caller inject
+channel messages and watch what the bot says back.
+
+Used by bench_end_to_end.py; can also be run on its own to poke at the bot
+by hand (it logs everything the bot sends):
+  python benchmarks/fake_irc_server.py [port]
+  cd src && python -c "from irc_bot import IrcBot; IrcBot(server='127.0.0.1', port=6667).connect()"
+"""
+import asyncio
+import sys
+import time
+
+SERVER_NAME = "fake.server"
+
+
+class FakeIrcServer:
+    """
+    asyncio IRC server. Callbacks (all called on the server's event loop):
+
+      on_privmsg(channel, text, received_at) - the bot said something
+      on_pong(latency)                       - answer to one of our PINGs
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, ping_interval=1.0, on_privmsg=None, on_pong=None):
+        self.host = host
+        self.port = port
+        self.ping_interval = ping_interval
+        self.on_privmsg = on_privmsg
+        self.on_pong = on_pong
+        self.nick = None
+        self.joined = set()
+        self.lines_received = 0
+        self.lines_sent = 0
+        self._server = None
+        self._writer = None
+        self._client = None  # task serving the connected client
+        self._registered = asyncio.Event()
+        self._joined_changed = asyncio.Event()
+        self._pings = {}  # token -> sent at
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._client is not None:
+            await asyncio.wait([self._client], timeout=5)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def wait_joined(self, channels, timeout=10):
+        """Waits until the bot is registered and has joined every one of `channels`."""
+        async def joined():
+            await self._registered.wait()
+            while not set(channels) <= self.joined:
+                self._joined_changed.clear()
+                await self._joined_changed.wait()
+        await asyncio.wait_for(joined(), timeout)
+
+    def send(self, line):
+        """Writes one raw line to the bot."""
+        if self._writer is None:
+            raise ConnectionError("no client connected")
+        self._writer.write((line + "\r\n").encode("utf-8"))
+        self.lines_sent += 1
+
+    def privmsg(self, nick, channel, text):
+        """`nick` says `text` on `channel`."""
+        self.send(f":{nick}!user@load.test PRIVMSG {channel} :{text}")
+
+    # ---- connection ------------------------------------------------------
+
+    async def _serve(self, reader, writer):
+        if self._writer is not None:
+            writer.close()  # One client at a time
+            return
+        self._writer = writer
+        self._client = asyncio.current_task()
+        pinger = asyncio.create_task(self._ping_loop())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.lines_received += 1
+                self._handle(line.decode("utf-8", "replace").rstrip("\r\n"), time.perf_counter())
+        except ConnectionError:
+            pass
+        finally:
+            pinger.cancel()
+            self._writer = None
+            self._client = None
+            self.joined.clear()
+            self._registered.clear()
+            writer.close()
+
+    async def _ping_loop(self):
+        n = 0
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            if self._registered.is_set():
+                n += 1
+                token = f"lag{n}"
+                self._pings[token] = time.perf_counter()
+                self.send(f"PING :{token}")
+
+    def _handle(self, line, received_at):
+        command, _, rest = line.partition(" ")
+        command = command.upper()
+        if command == "NICK":
+            self.nick = rest.strip()
+        elif command == "USER":
+            self.send(f":{SERVER_NAME} 001 {self.nick} :Welcome to the fake network {self.nick}")
+            self._registered.set()
+        elif command == "PING":
+            self.send(f":{SERVER_NAME} PONG {SERVER_NAME} {rest}")
+        elif command == "PONG":
+            token = rest.rsplit(":", 1)[-1].strip()
+            sent_at = self._pings.pop(token, None)
+            if sent_at is not None and self.on_pong:
+                self.on_pong(received_at - sent_at)
+        elif command == "JOIN":
+            for channel in rest.split(" ", 1)[0].split(","):
+                self.joined.add(channel)
+                self.send(f":{self.nick}!bot@fake.host JOIN {channel}")
+            self._joined_changed.set()
+        elif command == "PRIVMSG":
+            channel, _, text = rest.partition(" :")
+            if self.on_privmsg:
+                self.on_privmsg(channel, text, received_at)
+        elif command == "QUIT":
+            if self._writer is not None:
+                self._writer.close()
+
+
+async def _serve_forever(port):
+    server = FakeIrcServer(port=port, on_privmsg=lambda channel, text, _: print(f"{channel} <bot> {text}"))
+    await server.start()
+    print(f"Fake IRC server on 127.0.0.1:{server.port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_serve_forever(int(sys.argv[1]) if len(sys.argv) > 1 else 6667))
+    except KeyboardInterrupt:
+        pass
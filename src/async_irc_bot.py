@@ -0,0 +1,171 @@
+import asyncio
+import logging
+
+from irc_bot import IrcBot
+from irc_protocol import LineFramer, parse_message
+from log import TRAFFIC_LOGGER
+
+logger = logging.getLogger(__name__)
+traffic = logging.getLogger(TRAFFIC_LOGGER)  # Raw lines, sampled (see log.py)
+
+
+class AsyncIrcBot(IrcBot):
+    """
+    asyncio event-loop variant of IrcBot.
+
+    The connection is an asyncio stream reader/writer driven by a single
+    event loop: no listener thread, no keep-alive sleep loop and no fixed
+    delays - channels are joined when the server's 001 welcome arrives.
+
+    Every command and URL lookup is scheduled as its own task. The existing
+    command classes are synchronous (requests/yfinance), so the task waits
+    on the bot's WorkerPool (the executor adapter) to run them; hundreds of
+    pending lookups are just queued tasks, not hundreds of threads.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop = None
+        self._stopped = None
+        self.reader = None
+        self.writer = None
+        self._tasks = set()
+
+    def connect(self):
+        """Connect to the IRC server and run the event loop until stop()."""
+        try:
+            asyncio.run(self.run_forever())
+        except Exception as e:
+            logger.warning("Connection error: %s", e)
+
+    async def run_forever(self):
+        """Reconnect supervisor: run() one connection at a time, waiting out a
+        jittered exponential backoff between attempts."""
+        self.running = True
+        self._stopped = asyncio.Event()
+        self.start_metrics_server()
+        try:
+            while self.running:
+                try:
+                    await self.run()
+                except Exception as e:
+                    logger.warning("Connection error: %s", e)
+
+                was_registered = self.registered
+                self.registered = False
+                self.send_queue.clear()  # Stale lines; registration/JOINs are resent on reconnect
+                if not self.running:
+                    break
+
+                if was_registered:
+                    self.backoff.reset()  # The last connection was healthy, retry quickly
+                delay = self.backoff.next_delay()
+                logger.info("Reconnecting in %.1fs...", delay)
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.send_queue.close(timeout=0)
+            self.worker_pool.stop()
+
+    async def run(self):
+        """Open one connection, register, and process lines until it drops."""
+        logger.info("Connecting to %s:%s as %s (asyncio)...", self.server, self.port, self.nickname)
+        self.loop = asyncio.get_running_loop()
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.server, self.port), timeout=30
+        )
+        if not self.running:  # stop() came while we were connecting
+            self.writer.close()
+            return
+        self.send_queue.start()
+        self.worker_pool.start()
+        self.metrics_reporter.start()
+        self.send_raw(f"NICK {self.nickname}")
+        self.send_raw(f"USER {self.nickname} 0 * :{self.nickname}")
+
+        try:
+            await self.listen_async()
+        finally:
+            # Jobs still running are left to finish on their own: their replies
+            # go through send_raw either way, and a hung one (the pool's timeout
+            # never resolves it) mustn't hold up the reconnect.
+            self.registered = False
+            self.writer.close()
+
+    async def listen_async(self):
+        """Read from the stream and dispatch complete lines."""
+        framer = LineFramer()
+        while self.running:
+            try:
+                data = await asyncio.wait_for(self.reader.read(4096), timeout=self.READ_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("No data from server in %ss, assuming the connection is dead.", self.READ_TIMEOUT)
+                break
+            except (ConnectionError, OSError) as e:
+                logger.error("Error in listen loop: %s", e)
+                break
+            if not data:
+                logger.warning("Connection lost.")
+                break
+
+            for line in framer.feed(data):
+                message = parse_message(line)
+                if message is None:
+                    continue
+                traffic.debug("< %s", message)
+                try:
+                    self.dispatch(message)
+                except Exception as e:
+                    logger.error("Error dispatching %r: %s", message, e)
+
+    def _write_line(self, message):
+        """Hand one line from the send queue's writer thread to the event loop."""
+        traffic.debug("> %s", message)
+        if self.writer is None:
+            raise ConnectionError("not connected")
+        data = (message + "\r\n").encode("utf-8")
+        self.loop.call_soon_threadsafe(self._write, data)
+
+    def _write(self, data):
+        if self.writer.is_closing():
+            logger.warning("Failed to send message: connection closed")
+            return
+        self.writer.write(data)
+
+    def submit(self, channel, kind, func, timeout=None):
+        """Schedule a synchronous handler as a task backed by the worker pool."""
+        future = self.worker_pool.submit(channel, kind, func, timeout=timeout)
+        if future is None:
+            return None  # shed by the pool
+        task = self.loop.create_task(self.run_sync(future, func))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def run_sync(self, future, func):
+        """Executor adapter: await a pooled job without blocking the loop."""
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            return None  # shed from the backlog
+        except Exception as e:
+            logger.error("Error in %s: %s", getattr(func, '__qualname__', func), e)
+
+    def stop(self):
+        """Stop the bot and close the connection. Call from outside the event loop."""
+        logger.info("Stopping bot...")
+        self.send_raw("QUIT :Bot shutting down")
+        self.send_queue.close()  # Flushes the QUIT from the priority lane
+        self.running = False
+        if self.loop is not None:
+            if self._stopped is not None:
+                self.loop.call_soon_threadsafe(self._stopped.set)
+            if self.writer is not None:
+                self.loop.call_soon_threadsafe(self.writer.close)
+        self.worker_pool.stop()
+        self.metrics_reporter.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        self.url_fetcher.close()
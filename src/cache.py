@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache with a TTL per entry.
+
+    An entry is fresh for `ttl` seconds after it was set. If it was stored
+    with a `stale_ttl`, it may still be served as stale for that many
+    seconds after expiring (callers can refresh it in the background);
+    after that it's gone. When the cache is full the least recently used
+    entry is evicted.
+    """
+
+    def __init__(self, maxsize=256, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (value, fresh_until, stale_until)
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Returns the value if there's a fresh entry for `key`, else `default`."""
+        entry = self.lookup(key)
+        if entry is None or entry[1]:
+            return default
+        return entry[0]
+
+    def lookup(self, key):
+        """Returns (value, is_stale), or None if there's no usable entry."""
+        now = self.clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value, False
+            if now < stale_until:
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                return value, True
+            del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl, stale_ttl=0):
+        now = self.clock()
+        with self._lock:
+            self._data[key] = (value, now + ttl, now + ttl + stale_ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
@@ -1,59 +1,219 @@
-import traceback
-from electricity import ElectricityCommand
-from weather import WeatherCommand
-from stock import StockCommand
-from crypto import CryptoCommand
-from aijamatto import AijaMattoCommand
-from time_command import TimeCommand
-from f1_command import F1Command
-from liiga_command import LiigaCommand
+import fnmatch
+import logging
+import os
+import re
+import threading
+import time
+
+from cache import TTLCache
+from command_registry import CommandRegistry, CommandSpec, LazyCommand
+from command_reloader import CommandReloader, ReloadCommand
+from metrics import metrics as shared_metrics
+from singleflight import SingleFlight, SingleFlightTimeout
+from stats_command import StatsCommand
+
+logger = logging.getLogger(__name__)
+
+
+def builtin_commands():
+    """
+    The bot's own commands. They're declared here rather than with @command
+    so their modules (and e.g. yfinance/pandas behind them) are only imported
+    on first use. Returns fresh specs, so each handler can swap commands freely.
+    """
+    return [
+        CommandSpec(["!sähkö", "!sahko"], LazyCommand("electricity", "ElectricityCommand"),
+                    allow_args=False),  # caches itself
+        CommandSpec(["!weather", "!w"], LazyCommand("weather", "WeatherCommand"),
+                    cache_ttl=600, stale_ttl=600),
+        CommandSpec(["!stock"], LazyCommand("stock", "StockCommand"),
+                    timeout=20, cache_ttl=60),  # yfinance is slow
+        CommandSpec(["!crypto"], LazyCommand("crypto", "CryptoCommand"), cache_ttl=60),
+        CommandSpec(["!bjorck"], LazyCommand("aijamatto", "AijaMattoCommand"), allow_args=False),
+        CommandSpec(["!time"], LazyCommand("time_command", "TimeCommand")),
+        CommandSpec(["!f1"], LazyCommand("f1_command", "F1Command"),
+                    allow_args=False, cache_ttl=6 * 3600, stale_ttl=3600),
+        CommandSpec(["!liiga"], LazyCommand("liiga_command", "LiigaCommand"), needs_context=True),
+    ]
+
 
 class CommandHandler:
     """Handles IRC bot commands and delegates them to specific classes."""
-    
-    def __init__(self):
-        # Define aliases and argument restrictions
-        self.command_aliases = {
-            ElectricityCommand(): {"aliases": ["!sähkö", "!sahko"], "allow_args": False},
-            WeatherCommand(): {"aliases": ["!weather", "!w"], "allow_args": True},
-            StockCommand(): {"aliases": ["!stock"], "allow_args": True},
-            CryptoCommand(): {"aliases": ["!crypto"], "allow_args": True},
-            AijaMattoCommand(): {"aliases": ["!bjorck"], "allow_args": False},
-            TimeCommand(): {"aliases": ["!time"], "allow_args": True},
-            F1Command(): {"aliases": ["!f1"], "allow_args": False},
-            LiigaCommand(): {"aliases": ["!liiga"], "allow_args": True}
-        }
-
-    def handle_command(self, irc_bot, nick, channel, message):
+
+    DEFAULT_TIMEOUT = 10  # seconds a pooled command may run before its reply is abandoned
+    CACHE_SIZE = 512      # responses kept across all cached commands
+
+    # Responses that mustn't be cached: failures should be retried next time.
+    UNCACHEABLE_PREFIXES = ("Error", "Usage", "Unexpected error")
+
+    # Replies counted as errors in the command latency metrics.
+    ERROR_PREFIXES = ("Error", "Unexpected error")
+
+    def __init__(self, cache=None, clock=time.monotonic, admins=None, metrics=None):
+        # Alias -> command spec (aliases, argument restrictions, timeout, caching...).
+        # Commands are loaded on first use (see LazyCommand), so none of them
+        # slow down or break startup. !reload swaps in a new registry as a whole.
+        specs = builtin_commands()
+        self.registry = CommandRegistry(specs)
+        self.reloader = CommandReloader(self, [spec.name for spec in specs])
+        self.clock = clock
+        self._last_run = {}  # (command name, channel) -> time, for commands with a cooldown
+        self._cooldown_lock = threading.Lock()
+        # Anything with get/lookup/set like TTLCache can be plugged in here.
+        self.cache = cache if cache is not None else TTLCache(maxsize=self.CACHE_SIZE)
+        # Latency histograms per command / cache lookup (see metrics.py).
+        self.metrics = metrics or shared_metrics
+        # Identical commands arriving while one is still running share its upstream call.
+        self.single_flight = SingleFlight()
+        self.registry.register(CommandSpec(["!reload"], ReloadCommand(self.reloader),
+                                           allow_args=False, timeout=60, admin=True))
+        self.registry.register(CommandSpec(["!stats"], StatsCommand(self.metrics, self.cache,
+                                                                     self.single_flight), admin=True))
+        self.registry.register_decorated()
+        self.registry.load_entry_points()
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        # nick!user@host patterns (fnmatch, e.g. "*!*@admin.example.org") allowed
+        # to run admin commands, from BOT_ADMINS (comma/space separated).
+        if admins is None:
+            admins = os.getenv("BOT_ADMINS", "").replace(",", " ").split()
+        self.admins = [pattern.lower() for pattern in admins]
+
+    def timeout_for(self, message):
+        """Returns how long the command in `message` may run on the worker pool."""
+        spec = self.registry.lookup(message.split(" ", 1)[0].lower())
+        if spec is None or spec.timeout is None:
+            return self.DEFAULT_TIMEOUT
+        return spec.timeout
+
+    def resume(self, irc_bot):
+        """Called once the bot is (re)registered with the server, so stateful
+        commands (e.g. Liiga live tracking) can pick up where they left off."""
+        for spec in self.registry:
+            resume = getattr(spec.command, "resume", None)
+            if resume is None:
+                continue
+            try:
+                resume(irc_bot)
+            except Exception as e:
+                logger.error("Error resuming %s: %s", spec.name, e)
+
+    def is_admin(self, hostmask):
+        """True if `hostmask` (nick!user@host) matches one of the BOT_ADMINS patterns."""
+        if not hostmask:
+            return False
+        hostmask = hostmask.lower()
+        return any(fnmatch.fnmatchcase(hostmask, pattern) for pattern in self.admins)
+
+    def handle_command(self, irc_bot, nick, channel, message, hostmask=None):
         """Parses and executes commands from IRC messages, handling aliases and argument restrictions."""
         try:
             parts = message.split(" ", 1)  # Split command and arguments
             command = parts[0].lower()
             args = parts[1] if len(parts) > 1 else ""
 
-            # Find the main command object based on alias
-            main_command = None
-            for cmd_obj, cmd_data in self.command_aliases.items():
-                if command in cmd_data["aliases"]:
-                    main_command = cmd_obj
-                    allow_args = cmd_data["allow_args"]
-                    break  # Stop searching once we find a match
-
-            if main_command:
-                # Check if arguments are allowed for this command
-                if not allow_args and args:
-                    print(f"Command {command} does not allow arguments. Ignoring.")
-                    return  # Ignore command
-
-                if getattr(main_command, "needs_irc_context", False) is True:
-                    response = main_command.execute(args, irc_bot=irc_bot, channel=channel)
+            spec = self.registry.lookup(command)
+            if spec is None:
+                logger.debug("Unknown command: %s", command)
+                return
+
+            if spec.admin and not self.is_admin(hostmask):
+                logger.warning("Command %s from %s needs admin rights. Ignoring.", command, hostmask or nick)
+                return
+
+            # Check if arguments are allowed for this command
+            if not spec.allow_args and args:
+                logger.debug("Command %s does not allow arguments. Ignoring.", command)
+                return  # Ignore command
+
+            if not self._cooldown_passed(spec, channel):
+                logger.debug("Command %s is on cooldown on %s. Ignoring.", command, channel)
+                return
+
+            start = time.perf_counter()
+            failed = True
+            try:
+                if spec.needs_context:
+                    response = spec.command.execute(args, irc_bot=irc_bot, channel=channel)
                 else:
-                    response = main_command.execute(args)
-
-                if response:
-                    irc_bot.send_message(channel, response)  # Send response to IRC
-            else:
-                print(f"Unknown command: {command}")  # Debugging
-        except Exception as e:
-            print(f"Error handling command {message}: {e}")
-            traceback.print_exc()
+                    response = self._execute_shared(spec, args)
+                failed = bool(response) and response.startswith(self.ERROR_PREFIXES)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.metrics.observe("command", spec.name, elapsed, failed)
+                logger.info("%s %s", "Failed" if failed else "Handled", spec.name, extra={
+                    "channel": channel, "nick": nick, "command": spec.name,
+                    "latency_ms": round(elapsed * 1000, 1),
+                })
+
+            if response:
+                irc_bot.send_message(channel, response)  # Send response to IRC
+        except Exception:
+            logger.exception("Error handling command %s", message, extra={"channel": channel, "nick": nick})
+
+    def _cooldown_passed(self, spec, channel):
+        """True (and the run is recorded) unless `spec` ran on `channel` within its cooldown."""
+        if not spec.cooldown:
+            return True
+        key = (spec.name, channel)
+        now = self.clock()
+        with self._cooldown_lock:
+            last = self._last_run.get(key)
+            if last is not None and now - last < spec.cooldown:
+                return False
+            self._last_run[key] = now
+            return True
+
+    # ---- response cache and request coalescing -----------------------------
+
+    @staticmethod
+    def cache_key(spec, args):
+        """Same command + same arguments modulo case/whitespace -> same key,
+        e.g. "!w Helsinki , FI" and "!weather helsinki,fi"."""
+        normalized = " ".join(args.lower().split())
+        normalized = re.sub(r" ?, ?", ",", normalized)
+        return (spec.name, normalized)
+
+    def _execute_shared(self, spec, args):
+        """Serve from the cache if possible; otherwise run the command,
+        collapsing concurrent identical requests into one execution."""
+        key = self.cache_key(spec, args)
+        if spec.cache_ttl:
+            start = time.perf_counter()
+            cached = self.cache.lookup(key)
+            self.metrics.observe("cache", spec.name, time.perf_counter() - start, cached is None)
+            if cached is not None:
+                response, is_stale = cached
+                if is_stale:
+                    self._revalidate_in_background(spec, args, key)
+                return response
+        # Waiting on someone else's identical call longer than the command may
+        # run is pointless: its reply would be dropped anyway.
+        timeout = spec.timeout or self.DEFAULT_TIMEOUT
+        try:
+            return self.single_flight.do(key, lambda: self._execute_and_store(spec, args, key), timeout=timeout)
+        except SingleFlightTimeout:
+            return f"Error: {spec.name} is taking too long, try again later."
+
+    def _execute_and_store(self, spec, args, key):
+        response = spec.command.execute(args)
+        if spec.cache_ttl and response and not response.startswith(self.UNCACHEABLE_PREFIXES):
+            self.cache.set(key, response, spec.cache_ttl, spec.stale_ttl)
+        return response
+
+    def _revalidate_in_background(self, spec, args, key):
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return  # a refresh for this key is already running
+            self._revalidating.add(key)
+
+        def refresh():
+            try:
+                self.single_flight.do(key, lambda: self._execute_and_store(spec, args, key))
+            except Exception as e:
+                logger.error("Error refreshing cached response for %s: %s", key, e)
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
@@ -0,0 +1,179 @@
+import importlib
+import logging
+import threading
+from importlib.metadata import entry_points
+
+logger = logging.getLogger(__name__)
+
+# Installed packages can add commands by exposing decorated classes here, e.g.
+#   [project.entry-points."kukistibot.commands"]
+#   dice = "kukisti_dice:DiceCommand"
+ENTRY_POINT_GROUP = "kukistibot.commands"
+
+
+class LazyCommand:
+    """
+    Stands in for a command object until the command is first used: only
+    then is its module imported (with e.g. yfinance/pandas behind it) and
+    the class instantiated. A command that fails to load (missing API key,
+    missing package...) answers with an error instead of stopping the bot
+    from starting, and loading is tried again on the next use.
+    """
+
+    def __init__(self, module_name, class_name):
+        self.module_name = module_name
+        self.class_name = class_name
+        self._command = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._command is not None
+
+    def load(self):
+        """Returns the real command object, importing and creating it if needed."""
+        if self._command is None:
+            with self._lock:
+                if self._command is None:
+                    module = importlib.import_module(self.module_name)
+                    self._command = getattr(module, self.class_name)()
+        return self._command
+
+    def execute(self, args, **kwargs):
+        try:
+            command = self.load()
+        except Exception as e:
+            logger.error("Error loading %s from %s: %s", self.class_name, self.module_name, e)
+            return f"Error: {self.class_name} is unavailable right now."
+        return command.execute(args, **kwargs)
+
+    def resume(self, irc_bot):
+        # A command that was never loaded has nothing to resume.
+        resume = getattr(self._command, "resume", None)
+        if resume is not None:
+            resume(irc_bot)
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"LazyCommand({self.module_name}.{self.class_name}, {state})"
+
+
+class CommandSpec:
+    """
+    A command and everything CommandHandler needs to know about it:
+
+      aliases       - triggers, the first one is the command's name
+      allow_args    - False: the command is ignored if given arguments
+      cooldown      - seconds before the command may run again on the same channel
+      timeout       - seconds it may run on the worker pool (None = handler default)
+      cache_ttl     - seconds a response stays fresh for the same (normalized) args
+      stale_ttl     - seconds an expired response may still be served while
+                      it's refreshed in the background
+      needs_context - execute() also gets irc_bot= and channel=, and bypasses the cache
+      admin         - only users matching BOT_ADMINS may run it
+    """
+
+    __slots__ = ("name", "aliases", "command", "allow_args", "cooldown", "timeout",
+                 "cache_ttl", "stale_ttl", "needs_context", "admin")
+
+    def __init__(self, aliases, command, allow_args=True, cooldown=0, timeout=None,
+                 cache_ttl=None, stale_ttl=0, needs_context=False, admin=False):
+        self.aliases = tuple(alias.lower() for alias in aliases)
+        self.name = self.aliases[0]
+        self.command = command
+        self.allow_args = allow_args
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.stale_ttl = stale_ttl
+        self.needs_context = needs_context
+        self.admin = admin
+
+    def __repr__(self):
+        return f"CommandSpec({self.name!r}, {self.command!r})"
+
+
+# Classes marked with @command, in the order their modules were imported
+decorated_commands = []
+
+
+def command(*aliases, **metadata):
+    """
+    Class decorator declaring a command, for plugins:
+
+        @command("!dice", "!d", cooldown=5)
+        class DiceCommand:
+            def execute(self, args): ...
+
+    `metadata` takes the CommandSpec keywords. The class is still only
+    instantiated on first use.
+    """
+    def decorate(cls):
+        cls.command_aliases = aliases
+        cls.command_metadata = metadata
+        decorated_commands.append(cls)
+        return cls
+    return decorate
+
+
+def spec_for_class(cls):
+    """Builds the CommandSpec of a class marked with @command."""
+    return CommandSpec(cls.command_aliases, LazyCommand(cls.__module__, cls.__name__),
+                       **cls.command_metadata)
+
+
+class CommandRegistry:
+    """Alias -> CommandSpec map, so finding a command is one dict lookup."""
+
+    def __init__(self, specs=()):
+        self._specs = []
+        self._by_alias = {}
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec):
+        taken = [alias for alias in spec.aliases if alias in self._by_alias]
+        if taken:
+            raise ValueError(f"Alias already registered: {', '.join(taken)}")
+        self._specs.append(spec)
+        for alias in spec.aliases:
+            self._by_alias[alias] = spec
+        return spec
+
+    def register_class(self, cls):
+        return self.register(spec_for_class(cls))
+
+    def register_decorated(self):
+        """Registers every @command class imported so far (skipping ones already registered)."""
+        for cls in decorated_commands:
+            if not any(alias.lower() in self._by_alias for alias in cls.command_aliases):
+                self.register_class(cls)
+
+    def load_entry_points(self, group=ENTRY_POINT_GROUP):
+        """Registers the @command classes installed packages expose under `group`."""
+        for entry_point in entry_points(group=group):
+            try:
+                self.register_class(entry_point.load())
+            except Exception as e:
+                logger.error("Error registering command plugin %s: %s", entry_point.name, e)
+
+    def lookup(self, alias):
+        """Returns the CommandSpec for `alias` (lowercase), or None."""
+        return self._by_alias.get(alias)
+
+    def replace(self, alias, command):
+        """Swaps the command object behind `alias` (and its other aliases)."""
+        spec = self._by_alias.get(alias)
+        if spec is None:
+            raise KeyError(alias)
+        spec.command = command
+        return spec
+
+    def __iter__(self):
+        return iter(list(self._specs))
+
+    def __len__(self):
+        return len(self._specs)
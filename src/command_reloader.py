@@ -0,0 +1,156 @@
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+from command_registry import CommandRegistry, LazyCommand
+
+logger = logging.getLogger(__name__)
+
+
+def _source_mtime(module):
+    path = getattr(module, "__file__", None)
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
+
+
+def _compile_source(module):
+    """Compiles `module`'s current source without running it; raises SyntaxError."""
+    source = module.__spec__.loader.get_source(module.__name__)
+    compile(source, module.__file__, "exec")
+
+
+class CommandReloader:
+    """
+    Re-imports command modules edited since they were loaded and swaps the
+    new commands into the handler, without touching the IRC connection.
+
+    - Only modules that are already imported and whose source file changed
+      are reloaded; a command that was never used just imports the new code
+      on first use anyway.
+    - The command table (`builtin_commands()` in `table_module`) is re-read,
+      so aliases and settings can change too. Commands whose module didn't
+      change keep their instance (and whatever it has cached). Plugin
+      commands aren't part of the table and are left as they are.
+    - A reloaded command with export_state()/import_state() hands its state
+      over to the new instance (LiigaCommand moves its live trackers);
+      otherwise it simply starts fresh.
+    - The new registry replaces the old one in a single assignment:
+      commands already running finish on the old code, the next one gets
+      the new.
+
+    Runs as an ordinary pooled command, so the read loop keeps going.
+    """
+
+    def __init__(self, handler, table_names, table_module="command_handler", clock=time.time):
+        self.handler = handler
+        self.table_module = table_module
+        self.clock = clock
+        self._table_names = set(table_names)  # names of the specs that came from the table
+        self._loaded_at = {}  # module name -> time of its last reload
+        self._unswapped = set()  # modules reloaded by a reload that failed further on
+        self._started = clock()
+        self._lock = threading.Lock()
+
+    def changed_modules(self):
+        """Names of the imported command modules whose source changed since they were loaded."""
+        names = {spec.command.module_name for spec in self.handler.registry
+                 if spec.name in self._table_names and isinstance(spec.command, LazyCommand)}
+        names.add(self.table_module)
+        changed = []
+        for name in sorted(names):
+            module = sys.modules.get(name)
+            if module is None:
+                continue
+            mtime = _source_mtime(module)
+            if mtime is not None and mtime > self._loaded_at.get(name, self._started):
+                changed.append(name)
+        return changed
+
+    def reload(self):
+        """Reloads what changed; returns a one-line summary for the channel."""
+        with self._lock:  # one reload at a time
+            changed = self.changed_modules()
+            if not changed:
+                return "Nothing to reload."
+
+            # Syntax errors (the usual kind) are caught before any module is
+            # touched, so the bot keeps running the old code rather than half of each.
+            for name in changed:
+                try:
+                    _compile_source(sys.modules[name])
+                except Exception as e:
+                    logger.error("Error reloading %s: %s", name, e)
+                    return f"Error: reloading {name} failed ({type(e).__name__}), commands unchanged."
+
+            for i, name in enumerate(changed):
+                try:
+                    importlib.reload(sys.modules[name])
+                except Exception as e:
+                    # Failed while running: the modules before it already have their
+                    # new code. Their commands get swapped in with the next reload.
+                    logger.error("Error reloading %s: %s", name, e)
+                    done = changed[:i]
+                    now = self.clock()
+                    for reloaded in done:
+                        self._loaded_at[reloaded] = now
+                    self._unswapped.update(done)
+                    summary = f"Error: reloading {name} failed ({type(e).__name__}), commands unchanged."
+                    if done:
+                        summary += f" Already reloaded: {', '.join(done)}."
+                    return summary
+            now = self.clock()
+            for name in changed:
+                self._loaded_at[name] = now
+            changed = sorted(set(changed) | self._unswapped)
+            self._unswapped.clear()
+
+            old_registry = self.handler.registry
+            new_specs = sys.modules[self.table_module].builtin_commands()
+            registry = CommandRegistry(new_specs)
+            for spec in old_registry:
+                # Plugins and !reload itself aren't in the table: carry them over.
+                if spec.name not in self._table_names and not any(
+                        registry.lookup(alias) for alias in spec.aliases):
+                    registry.register(spec)
+
+            restored = []
+            for spec in new_specs:
+                old = old_registry.lookup(spec.name)
+                if old is None or not isinstance(old.command, LazyCommand):
+                    continue
+                new, previous = spec.command, old.command
+                if (new.module_name, new.class_name) == (previous.module_name, previous.class_name) \
+                        and new.module_name not in changed:
+                    spec.command = previous  # unchanged: keep the instance and its state
+                elif previous.loaded and hasattr(previous._command, "export_state"):
+                    try:
+                        command = new.load()
+                        command.import_state(previous._command.export_state())
+                        restored.append(spec.name)
+                    except Exception as e:
+                        logger.error("Error migrating state of %s: %s", spec.name, e)
+
+            self.handler.registry = registry
+            self._table_names = {spec.name for spec in new_specs}
+            # Cached responses were produced by the old code.
+            self.handler.cache.clear()
+
+        summary = f"Reloaded {', '.join(changed)}."
+        if restored:
+            summary += f" Carried over state of {', '.join(restored)}."
+        return summary
+
+
+class ReloadCommand:
+    """!reload: picks up edited command modules (admins only, see BOT_ADMINS)."""
+
+    def __init__(self, reloader):
+        self.reloader = reloader
+
+    def execute(self, args=None, **kwargs):
+        return self.reloader.reload()
@@ -1,11 +1,17 @@
 from pycoingecko import CoinGeckoAPI
 import requests
 
+from http_client import get_http_client
+
 class CryptoCommand:
     """Handles cryptocurrency price queries using CoinGecko API."""
 
     def __init__(self):
         self.cg = CoinGeckoAPI()
+        # Swap pycoingecko's private session for the shared pooled one (which
+        # has its own retry policy), and its 120s default timeout for ours.
+        self.cg.session = get_http_client()
+        self.cg.request_timeout = self.cg.session.default_timeout
 
     def execute(self, args):
         """Handles user request for cryptocurrency price."""
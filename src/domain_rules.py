@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DomainRule:
+    """What URLFetcher should do with links to a domain (and its subdomains)."""
+
+    __slots__ = ("domain", "action", "timeout")
+
+    def __init__(self, domain, action="generic", timeout=None):
+        self.domain = domain
+        self.action = action
+        self.timeout = timeout  # seconds, None = the fetcher's default
+
+    def __repr__(self):
+        return f"DomainRule({self.domain!r}, {self.action!r}, timeout={self.timeout!r})"
+
+
+DEFAULT_RULE = DomainRule("", "generic")
+
+
+class DomainRules:
+    """
+    Domain -> rule lookup backed by a trie of reversed host labels, so
+    "www.youtube.com" is looked up as com -> youtube -> www. A rule for a
+    domain also covers its subdomains, and the most specific rule wins.
+    A lookup walks the host's labels once, however many rules there are.
+
+    Rules are loaded from a JSON file:
+
+        {"rules": [
+            {"domain": "x.com", "action": "block"},
+            {"domain": "youtube.com", "action": "youtube"},
+            {"domain": "bit.ly", "action": "shortener"},
+            {"domain": "slow.example.com", "timeout": 10}
+        ]}
+
+    `action` defaults to "generic". reload_if_changed() picks up edits to
+    the file while the bot is running; the new trie is swapped in whole.
+    """
+
+    ACTIONS = {"block", "youtube", "instagram", "shortener", "generic"}
+    CHECK_INTERVAL = 30  # seconds between mtime checks of the rules file
+
+    _RULE = object()  # key of the rule stored at a trie node
+
+    def __init__(self, rules=(), path=None, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = None
+        rules = list(rules)
+        self._root = self._build(rules)
+        self.size = len(rules)
+        if path is not None:
+            self.reload()
+
+    @classmethod
+    def _build(cls, rules):
+        root = {}
+        for rule in rules:
+            if rule.action not in cls.ACTIONS:
+                raise ValueError(f"Unknown action {rule.action!r} for {rule.domain}")
+            node = root
+            for label in reversed(rule.domain.lower().strip(".").split(".")):
+                node = node.setdefault(label, {})
+            node[cls._RULE] = rule
+        return root
+
+    @staticmethod
+    def parse(data):
+        """Turns the decoded JSON document into a list of DomainRule."""
+        return [
+            DomainRule(entry["domain"], entry.get("action", "generic"), entry.get("timeout"))
+            for entry in data.get("rules", [])
+        ]
+
+    def match(self, host):
+        """Returns the most specific rule for `host`, or DEFAULT_RULE."""
+        node = self._root
+        rule = DEFAULT_RULE
+        for label in reversed(host.lower().rstrip(".").split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            rule = node.get(self._RULE, rule)
+        return rule
+
+    def reload(self):
+        """(Re)reads the rules file. A broken file keeps the current rules."""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding="utf-8") as f:
+                rules = self.parse(json.load(f))
+            root = self._build(rules)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error("Error loading domain rules from %s: %s", self.path, e)
+            return False
+        with self._lock:
+            self._root = root  # Lookups in progress keep using the old trie
+            self.size = len(rules)
+            self._mtime = mtime
+        logger.info("Loaded %s domain rules from %s", len(rules), self.path)
+        return True
+
+    def reload_if_changed(self):
+        """Reloads the rules file if it was modified, checking at most every CHECK_INTERVAL."""
+        if self.path is None:
+            return False
+        now = self.clock()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.CHECK_INTERVAL:
+                return False
+            self._checked_at = now
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return False
+        return self.reload() if changed else False
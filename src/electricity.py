@@ -3,6 +3,8 @@ import datetime
 import pytz
 from decimal import Decimal, ROUND_HALF_UP
 
+from http_client import get_http_client
+
 
 class ElectricityCommand:
     """Fetches electricity prices in Finland for the current date and time with 15-minute resolution."""
@@ -11,6 +13,9 @@ class ElectricityCommand:
     _cached_result = None
     _cache_until_timestamp = 0  # Use timestamp for faster comparison
 
+    def __init__(self):
+        self.session = get_http_client()
+
     def execute(self, args=None):
         try:
             # Define Helsinki timezone (do this once at class level if possible)
@@ -32,7 +37,7 @@ class ElectricityCommand:
             url = f"https://api.porssisahko.net/v2/price.json?date={iso_timestamp}"
 
             # Fetch data from API with a timeout
-            response = requests.get(url, timeout=5)
+            response = self.session.get(url, timeout=5)
             response.raise_for_status()  # Raise exception for HTTP errors
             
             # Parse JSON response safely
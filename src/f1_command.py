@@ -2,6 +2,7 @@ import requests
 import datetime
 import pytz
 
+from http_client import get_http_client
 
 class F1Command:
     """
@@ -25,12 +26,13 @@ class F1Command:
         ("Qualifying",     "Qualifying"),
     ]
 
+    HEADERS = {
+        "User-Agent": "KukistiBot-F1/1.0",
+        "Accept": "application/json",
+    }
+
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "KukistiBot-F1/1.0",
-            "Accept": "application/json",
-        })
+        self.session = get_http_client()
 
     def execute(self, args=None) -> str:
         try:
@@ -38,6 +40,7 @@ class F1Command:
             resp = self.session.get(
                 f"{self.JOLPICA_URL}/{year}/races.json",
                 params={"limit": 30},
+                headers=self.HEADERS,
                 timeout=5,
             )
             resp.raise_for_status()
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class HostUnavailable(Exception):
+    """Raised instead of making a request the host limiter won't allow right now."""
+
+
+class _HostState:
+    __slots__ = ("active", "next_start", "failures", "blocked_until")
+
+    def __init__(self):
+        self.active = 0         # requests to the host in progress
+        self.next_start = 0.0   # earliest time the next request may start
+        self.failures = 0       # consecutive timeouts / 429 / 5xx answers
+        self.blocked_until = 0.0
+
+
+class _Slot:
+    """Context manager for one request; see HostLimiter.limit()."""
+
+    def __init__(self, limiter, host):
+        self._limiter = limiter
+        self._host = host
+        self.status_code = None
+
+    def record(self, status_code):
+        """Tell the limiter how the host answered."""
+        self.status_code = status_code
+
+    def __enter__(self):
+        self._limiter.acquire(self._host)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.status_code is not None:
+            failed = self.status_code == 429 or self.status_code >= 500
+        else:
+            failed = exc_type is not None  # No answer at all: timeout, refused, reset...
+        self._limiter.release(self._host, failed=failed)
+        return False
+
+
+class HostLimiter:
+    """
+    Politeness limits for outgoing requests, per host:
+
+    - at most `max_concurrent` requests in flight at once,
+    - at least `min_interval` seconds between the starts of two requests,
+    - after FAILURE_THRESHOLD consecutive failures (no answer, 429 or 5xx)
+      the host is left alone for a while, doubling from BACKOFF_BASE up to
+      BACKOFF_CAP seconds; one good answer resets it.
+
+    A caller waits up to `max_wait` seconds for its turn, after which (or
+    straight away, for a host in backoff) HostUnavailable is raised, so a
+    spammed link to a slow site can't tie up every worker.
+
+    State is kept for at most `max_hosts` hosts; the least recently used
+    idle host is forgotten first.
+    """
+
+    MAX_CONCURRENT = 2
+    MIN_INTERVAL = 0.5
+    MAX_WAIT = 3.0
+    MAX_HOSTS = 1024
+    FAILURE_THRESHOLD = 2
+    BACKOFF_BASE = 30.0
+    BACKOFF_CAP = 600.0
+
+    def __init__(self, max_concurrent=None, min_interval=None, max_wait=None, max_hosts=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.max_concurrent = max_concurrent or self.MAX_CONCURRENT
+        self.min_interval = self.MIN_INTERVAL if min_interval is None else min_interval
+        self.max_wait = self.MAX_WAIT if max_wait is None else max_wait
+        self.max_hosts = max_hosts or self.MAX_HOSTS
+        self.clock = clock
+        self.sleep = sleep
+        self._cond = threading.Condition()
+        self._hosts = OrderedDict()  # host -> _HostState, least recently used first
+
+        self.rejected = 0
+        self.waited = 0
+
+    def limit(self, host):
+        """
+        with limiter.limit(host) as slot:
+            response = session.get(...)
+            slot.record(response.status_code)
+        """
+        return _Slot(self, host)
+
+    def acquire(self, host):
+        """Waits for a turn to request `host`, or raises HostUnavailable."""
+        deadline = self.clock() + self.max_wait
+        with self._cond:
+            while True:
+                now = self.clock()
+                state = self._state(host)
+                if state.blocked_until > now:
+                    self.rejected += 1
+                    raise HostUnavailable(f"{host} is backing off after repeated failures")
+                if state.active < self.max_concurrent:
+                    start = max(now, state.next_start)
+                    if start > deadline:
+                        self.rejected += 1
+                        raise HostUnavailable(f"{host} was requested too often")
+                    state.active += 1
+                    state.next_start = start + self.min_interval
+                    if start > now:
+                        self.waited += 1
+                    break
+                if now >= deadline:
+                    self.rejected += 1
+                    raise HostUnavailable(f"too many requests to {host} in progress")
+                self.waited += 1
+                self._cond.wait(deadline - now)
+
+        if start > now:
+            self.sleep(start - now)  # Our start time is reserved, so nobody else takes it meanwhile
+
+    def release(self, host, failed=False):
+        with self._cond:
+            state = self._state(host)
+            state.active = max(0, state.active - 1)
+            if failed:
+                state.failures += 1
+                if state.failures >= self.FAILURE_THRESHOLD:
+                    backoff = self.BACKOFF_BASE * 2 ** (state.failures - self.FAILURE_THRESHOLD)
+                    state.blocked_until = self.clock() + min(self.BACKOFF_CAP, backoff)
+            else:
+                state.failures = 0
+                state.blocked_until = 0.0
+            self._cond.notify_all()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is not None:
+            self._hosts.move_to_end(host)
+            return state
+        if len(self._hosts) >= self.max_hosts:
+            self._evict_one()
+        state = self._hosts[host] = _HostState()
+        return state
+
+    def _evict_one(self):
+        now = self.clock()
+        for host, state in self._hosts.items():
+            if state.active == 0 and state.blocked_until <= now:
+                del self._hosts[host]
+                return
+        # Every host is busy or backing off; going over the limit beats forgetting a backoff.
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = self.clock()
+            return {
+                "hosts": len(self._hosts),
+                "active": sum(s.active for s in self._hosts.values()),
+                "backing_off": sum(1 for s in self._hosts.values() if s.blocked_until > now),
+                "waited": self.waited,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,218 @@
+import codecs
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+# Pages rarely need more than this to get through <head>; anything beyond is
+# body we never look at.
+MAX_HTML_BYTES = 256 * 1024
+
+_CONTENT_TYPE_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+# Covers both <meta charset="..."> and <meta http-equiv="Content-Type" content="...; charset=...">
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+META_PRESCAN_BYTES = 4096
+# Where the head is over for sure; cheap to look for in raw bytes.
+_HEAD_END = re.compile(rb"</head|<body", re.IGNORECASE)
+
+
+class TitleParser(HTMLParser):
+    """
+    Incremental parser that only cares about the page title.
+
+    Feed it decoded text as it arrives; `done` turns True as soon as an
+    og:title meta tag is seen (it wins over <title>) or the head is over
+    (</head> or <body>), at which point the caller can stop reading.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.og_title = None
+        self._title_parts = None  # None until a <title> is opened
+        self._in_title = False
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            prop = (attrs.get("property") or attrs.get("name") or "").lower()
+            content = (attrs.get("content") or "").strip()
+            if prop == "og:title" and content:
+                self.og_title = content
+                self.done = True
+        elif tag == "title" and self._title_parts is None:
+            self._title_parts = []
+            self._in_title = True
+        elif tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+
+    @property
+    def title(self):
+        if self.og_title:
+            return self.og_title
+        if self._title_parts:
+            return "".join(self._title_parts).strip() or None
+        return None
+
+
+def charset_from_content_type(content_type):
+    """Returns the charset parameter of a Content-Type header, if any."""
+    if not content_type:
+        return None
+    match = _CONTENT_TYPE_CHARSET.search(content_type)
+    return match.group(1) if match else None
+
+
+def sniff_meta_charset(head_bytes):
+    """Looks for a <meta> charset declaration near the start of the document."""
+    match = _META_CHARSET.search(head_bytes[:META_PRESCAN_BYTES])
+    return match.group(1).decode("ascii", errors="ignore") if match else None
+
+
+def detect_encoding(sample):
+    """Last resort when neither the header nor the page declares a charset:
+    accept UTF-8 if the sample is valid UTF-8, otherwise run detection on
+    the sample only (not the whole body, like response.apparent_encoding)."""
+    try:
+        sample.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        if e.start >= len(sample) - 3:
+            return "utf-8"  # only a multi-byte character cut off by the chunk boundary
+    from charset_normalizer import from_bytes
+    best = from_bytes(sample).best()
+    return best.encoding if best else "utf-8"
+
+
+def _incremental_decoder(encoding):
+    try:
+        return codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def extract_title(chunks, header_charset=None, max_bytes=MAX_HTML_BYTES):
+    """
+    Reads byte chunks of an HTML document until the title is known (or the
+    head has ended, or `max_bytes` have been read) and returns the og:title
+    or <title> text, or None.
+
+    The encoding is taken from the Content-Type charset if given, else from
+    a <meta> declaration in the first chunk, else detected from it.
+    """
+    parser = TitleParser()
+    decoder = None
+    read = 0
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if decoder is None:
+            encoding = header_charset or sniff_meta_charset(chunk) or detect_encoding(chunk)
+            decoder = _incremental_decoder(encoding)
+
+        chunk = chunk[:max_bytes - read]
+        read += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or read >= max_bytes:
+            break
+
+    if not parser.done and decoder is not None:
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()  # flush text still buffered inside an unterminated tag
+    return parser.title
+
+
+def read_head(chunks, max_bytes=MAX_HTML_BYTES):
+    """
+    Collects raw bytes up to the end of <head> (or `max_bytes`) without
+    parsing them, for handing off to a TitleParsePool.
+    """
+    data = bytearray()
+    for chunk in chunks:
+        if not chunk:
+            continue
+        start = max(0, len(data) - 6)  # A marker may straddle two chunks
+        data += chunk[:max_bytes - len(data)]
+        if len(data) >= max_bytes or _HEAD_END.search(data, start):
+            break
+    return bytes(data)
+
+
+def _warm_up_worker():
+    """Process pool initializer: pay the imports and first-parse cost up front."""
+    import charset_normalizer  # noqa: F401  (detect_encoding imports it lazily)
+    extract_title([b"<html><head><title>warm-up</title></head></html>"])
+
+
+def _extract_title_from_head(head, header_charset, max_bytes):
+    return extract_title([head], header_charset=header_charset, max_bytes=max_bytes)
+
+
+class TitleParsePool:
+    """
+    Optional process pool for the parse step, so a burst of links doesn't
+    keep the listener and Liiga poller threads waiting on the GIL.
+
+    Only the head bytes (see read_head) are sent to a worker; workers come
+    up with the parser and charset detection preloaded, on start() or else
+    on the first link.
+
+    Workers are never forked straight from the bot: by the time a pool starts
+    it runs a dozen threads (worker pool, send queue, pollers...), and a
+    child forked while one of them held a lock can deadlock on it.
+    """
+
+    PARSE_TIMEOUT = 5  # seconds
+    START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+    def __init__(self, processes=2, max_bytes=MAX_HTML_BYTES):
+        self.processes = processes
+        self.max_bytes = max_bytes
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes, initializer=_warm_up_worker,
+                    mp_context=multiprocessing.get_context(self.START_METHOD),
+                )
+            return self._executor
+
+    def start(self, wait=True):
+        """
+        Starts the worker processes now rather than on the first link.
+        With wait=False they come up in the background.
+        """
+        executor = self._get_executor()
+        futures = [executor.submit(_extract_title_from_head, b"", None, 0)
+                   for _ in range(self.processes)]
+        if wait:
+            for future in futures:
+                future.result()
+
+    def extract_title(self, head, header_charset=None):
+        """Parses `head` (bytes) in a worker process; same result as extract_title()."""
+        future = self._get_executor().submit(
+            _extract_title_from_head, head, header_charset, self.max_bytes
+        )
+        return future.result(timeout=self.PARSE_TIMEOUT)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,139 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import metrics as shared_metrics
+
+
+class HttpClient(requests.Session):
+    """
+    The bot's one shared HTTP session. Every command uses it (instead of
+    bare requests.get or a Session of its own), so repeat lookups reuse a
+    kept-alive connection rather than paying a new TCP+TLS handshake.
+
+    - Connection pools are kept per host, at most POOL_MAXSIZE idle
+      connections each. Requests past that don't wait: they get a fresh
+      connection that's closed afterwards, so the pool never has to be sized
+      to match the worker pool, URL fetchers and pollers.
+    - Every request gets DEFAULT_TIMEOUT unless the caller passes its own.
+    - Connection failures and 502/503/504 answers are retried once, with a
+      short backoff. Read timeouts are not retried, so the worst case stays
+      close to the caller's timeout.
+    - Per-upstream request/error counts and latency are recorded; see
+      upstream_stats(). Only the API hosts in UPSTREAM_HOSTS get their own
+      entry, everything else is counted under "other" - or under the
+      caller's `upstream=` name, e.g. URLFetcher's "link_titles" for
+      whatever links people paste. Latency histograms go to `metrics` too.
+
+    It's a requests.Session subclass so libraries that take a session
+    (e.g. pycoingecko) can be pointed at it too.
+    """
+
+    DEFAULT_TIMEOUT = 5
+    POOL_CONNECTIONS = 16  # hosts with a pool kept around
+    POOL_MAXSIZE = 6       # idle connections kept per host
+    USER_AGENT = "KukistiBot/1.0"
+
+    # The APIs commands talk to; stats for any other host go under OTHER_UPSTREAM.
+    UPSTREAM_HOSTS = frozenset({
+        "api.weatherapi.com",      # !weather
+        "api.coingecko.com",       # !crypto
+        "api.jolpi.ca",            # !f1
+        "www.liiga.fi",            # !liiga
+        "www.youtube.com",         # YouTube link titles (oEmbed)
+        "api.porssisahko.net",     # !sähkö
+        "api.ipgeolocation.io",    # !time
+    })
+    OTHER_UPSTREAM = "other"
+
+    def __init__(self, pool_maxsize=None, timeout=None, metrics=None):
+        super().__init__()
+        self.metrics = metrics or shared_metrics
+        self.default_timeout = timeout or self.DEFAULT_TIMEOUT
+        self.headers.update({"User-Agent": self.USER_AGENT})
+
+        retries = Retry(
+            total=1,
+            connect=1,
+            read=0,
+            status=1,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or self.POOL_MAXSIZE,
+            pool_block=False,
+            max_retries=retries,
+        )
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+        self._stats_lock = threading.Lock()
+        self._upstreams = {}  # upstream -> {"requests", "errors", "total_time", "max_time"}
+
+    def request(self, method, url, upstream=None, **kwargs):
+        """requests.Session.request(), plus `upstream`: the name to count it under in the stats."""
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout
+        upstream = upstream or self.upstream_name(urlsplit(url).hostname or "")
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self._record(upstream, time.perf_counter() - start, error=True)
+            raise
+        self._record(upstream, time.perf_counter() - start, error=response.status_code >= 400)
+        return response
+
+    def upstream_name(self, host):
+        """The upstream a request to `host` is counted under: the host if it's a known API, else "other"."""
+        return host if host in self.UPSTREAM_HOSTS else self.OTHER_UPSTREAM
+
+    def _record(self, upstream, elapsed, error):
+        self.metrics.observe("upstream", upstream, elapsed, error)
+        with self._stats_lock:
+            stats = self._upstreams.get(upstream)
+            if stats is None:
+                stats = self._upstreams[upstream] = {
+                    "requests": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0,
+                }
+            stats["requests"] += 1
+            if error:
+                stats["errors"] += 1
+            stats["total_time"] += elapsed
+            if elapsed > stats["max_time"]:
+                stats["max_time"] = elapsed
+
+    def upstream_stats(self) -> dict:
+        """Returns {upstream: {"requests", "errors", "avg_time", "max_time"}}."""
+        with self._stats_lock:
+            return {
+                host: {
+                    "requests": s["requests"],
+                    "errors": s["errors"],
+                    "avg_time": s["total_time"] / s["requests"] if s["requests"] else 0.0,
+                    "max_time": s["max_time"],
+                }
+                for host, s in self._upstreams.items()
+            }
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Returns the process-wide HttpClient, creating it on first use."""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = HttpClient()
+    return _shared_client
@@ -1,90 +1,188 @@
+import logging
+import os
+import random
 import socket
 import threading
-import time
 import sys
 
 from command_handler import CommandHandler
+from irc_protocol import LineFramer, parse_message
+from log import TRAFFIC_LOGGER, setup_logging
+from metrics import MetricsReporter
+from send_queue import SendQueue
 from url_fetcher import URLFetcher
+from worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+traffic = logging.getLogger(TRAFFIC_LOGGER)  # Raw lines, sampled (see log.py)
+
+class ReconnectBackoff:
+    """
+    Jittered exponential backoff for reconnect attempts: the ceiling doubles
+    from `base` up to `cap` seconds, and each delay is drawn from the upper
+    half of it so a whole netsplit's worth of bots doesn't reconnect in lockstep.
+    """
+
+    def __init__(self, base=2.0, cap=300.0, rng=random.random):
+        self.base = base
+        self.cap = cap
+        self.rng = rng
+        self.attempt = 0
+
+    def next_delay(self) -> float:
+        ceiling = min(self.cap, self.base * (2 ** self.attempt))
+        self.attempt += 1
+        return ceiling / 2 + self.rng() * ceiling / 2
+
+    def reset(self):
+        self.attempt = 0
+
 
 class IrcBot:
-    def __init__(self, server="irc.quakenet.org", port=6667, nickname="KukistiBot", channels=None):
+    URL_TIMEOUT = 20  # seconds; a message can hold several links
+    READ_TIMEOUT = 300  # no traffic (not even a PING) for this long -> connection is dead
+
+    def __init__(self, server="irc.quakenet.org", port=6667, nickname="KukistiBot", channels=None,
+                 workers=None, max_backlog=None):
         self.server = server
         self.port = port
         self.nickname = nickname
         self.channels = channels if channels else ["#bottest123"]  # Default channel
         self.running = False
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.registered = False  # True between the server's 001 and the connection dropping
+        self.sock = None  # A fresh socket is opened for every connection attempt
+        self.backoff = ReconnectBackoff()
+        self._stop_event = threading.Event()
         self.command_handler = CommandHandler()  # Initialize command handler
         self.url_fetcher = URLFetcher(self)  # Initialize URL fetcher
+        self.send_queue = SendQueue(self._write_line)  # Rate-limited single writer
+        self.worker_pool = WorkerPool(self, workers=workers, max_backlog=max_backlog)
+        self.metrics_reporter = MetricsReporter()  # Periodic latency summary in the log
+        self.metrics_server = None  # Prometheus endpoint, if METRICS_PORT is set
+        self.lines_received = 0
 
     def connect(self):
-        """Connect to the IRC server and join the channel."""
-        print(f"Connecting to {self.server}:{self.port} as {self.nickname}...")
+        """Connect to the IRC server and keep the connection up until stop().
+
+        This is the reconnect supervisor: whenever the connection drops it
+        waits out a jittered exponential backoff, then opens a fresh socket,
+        registers again and rejoins self.channels on the welcome.
+        """
+        self.running = True
+        self._stop_event.clear()
+        self.send_queue.start()
+        self.worker_pool.start()
+        self.metrics_reporter.start()
+        self.start_metrics_server()
+
+        while self.running:
+            try:
+                self.connect_once()
+            except Exception as e:
+                logger.warning("Connection error: %s", e)
+
+            was_registered = self.registered
+            self.registered = False
+            self.send_queue.clear()  # Stale lines; registration/JOINs are resent on reconnect
+            self._close_socket()
+            if not self.running:
+                break
+
+            if was_registered:
+                self.backoff.reset()  # The last connection was healthy, retry quickly
+            delay = self.backoff.next_delay()
+            logger.info("Reconnecting in %.1fs...", delay)
+            self._stop_event.wait(delay)
+
+    def start_metrics_server(self):
+        """Serves Prometheus metrics on localhost:METRICS_PORT, if that's set."""
+        port = int(os.getenv("METRICS_PORT", "0"))
+        if not port or self.metrics_server is not None:
+            return
+        from metrics_server import MetricsServer  # Only pulled in when enabled
         try:
-            self.sock.connect((self.server, self.port))
-            self.send_raw(f"NICK {self.nickname}")
-            self.send_raw(f"USER {self.nickname} 0 * :{self.nickname}")
-            self.running = True
-            
-            # Start listening in a separate thread
-            listener = threading.Thread(target=self.listen, daemon=True)
-            listener.start()
-
-            # Wait a few seconds before joining channel
-            time.sleep(3)
-            self.join_channels()
-
-            # Keep the bot running
-            while self.running:
-                time.sleep(1)
-        except Exception as e:
-            print(f"Connection error: {e}")
+            self.metrics_server = MetricsServer(self, port=port)
+            self.metrics_server.start()
+        except OSError as e:
+            logger.error("Could not start the metrics endpoint on port %s: %s", port, e)
+            self.metrics_server = None
+
+    def connect_once(self):
+        """Open a new connection, register, and listen until it drops."""
+        logger.info("Connecting to %s:%s as %s...", self.server, self.port, self.nickname)
+        sock = socket.create_connection((self.server, self.port), timeout=30)
+        sock.settimeout(self.READ_TIMEOUT)
+        self.sock = sock
+        self.send_raw(f"NICK {self.nickname}")
+        self.send_raw(f"USER {self.nickname} 0 * :{self.nickname}")
+        self.listen()
+
+    def _close_socket(self):
+        sock, self.sock = self.sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
 
     def listen(self):
-        """Listen for messages from the server."""
+        """Listen for messages from the server until the connection drops."""
+        framer = LineFramer()
         while self.running:
             try:
-                response = self.sock.recv(2048).decode("utf-8", errors="ignore").strip()
-                if not response:
-                    print("Connection lost. Exiting...")
-                    self.running = False
-                    break
-
-                for line in response.split("\n"):
-                    line = line.strip()
-                    print(f"< {line}")  # Debugging
-
-                    if line.startswith("PING"):
-                        self.pong(line)
-                    elif " 001 " in line:  # Server welcome message
-                        print("Server welcome message received. Joining channels...")
-                        self.join_channels()  # Join multiple channels
-                    elif "PRIVMSG" in line:
-                        self.process_message(line)
+                data = self.sock.recv(4096)
+                if not data:
+                    logger.warning("Connection lost.")
+                    return
+
+                for line in framer.feed(data):
+                    message = parse_message(line)
+                    if message is None:
+                        continue
+                    traffic.debug("< %s", message)
+                    self.dispatch(message)
+            except socket.timeout:
+                logger.warning("No data from server in %ss, assuming the connection is dead.", self.READ_TIMEOUT)
+                return
             except Exception as e:
-                print(f"Error in listen loop: {e}")
-                self.running = False
+                logger.error("Error in listen loop: %s", e)
+                return
+
+    def dispatch(self, message):
+        """Route a parsed server message to the matching handler."""
+        self.lines_received += 1  # Only ever bumped by the reading thread
+        if message.command == "PING":
+            self.pong(message)
+        elif message.command == "001":  # Server welcome message
+            logger.info("Server welcome message received. Joining channels...")
+            self.registered = True
+            self.join_channels()  # Join multiple channels
+            self.command_handler.resume(self)  # Pick up e.g. Liiga tracking after a reconnect
+        elif message.command == "PRIVMSG":
+            self.process_message(message)
 
     def pong(self, message):
         """Respond to PING messages from the server."""
-        server = message.split()[1]
-        print(f"Responding to PING from {server}")
-        self.send_raw(f"PONG {server}")
+        token = message.params[0] if message.params else ""
+        logger.debug("Responding to PING from %s", token)
+        self.send_raw(f"PONG :{token}")
 
     def send_raw(self, message):
-        """Send a raw command to the IRC server."""
-        print(f"> {message}")  # Debugging
-        try:
-            self.sock.send((message + "\r\n").encode("utf-8"))
-        except Exception as e:
-            print(f"Failed to send message: {e}")
+        """Queue a raw command for the IRC server (safe from any thread)."""
+        self.send_queue.put(message)
+
+    def _write_line(self, message):
+        """Write one line to the socket. Only called by the send queue's writer thread."""
+        traffic.debug("> %s", message)
+        if self.sock is None:
+            raise ConnectionError("not connected")
+        self.sock.sendall((message + "\r\n").encode("utf-8"))
 
     def join_channels(self):
-        """Join multiple channels."""
+        """Join multiple channels. The send queue paces these to avoid flooding."""
         for channel in self.channels:
-            print(f"Attempting to join {channel}...")
+            logger.info("Attempting to join %s...", channel)
             self.send_raw(f"JOIN {channel}")
-            time.sleep(1)  # Prevent flooding
 
     def send_message(self, channel, message):
         """Send a message to the specified IRC channel."""
@@ -93,33 +191,60 @@ class IrcBot:
         
     def process_message(self, message):
         """Extracts sender, channel, and message, then processes commands."""
-        parts = message.split(" ", 3)
-        if len(parts) < 4:
+        if len(message.params) < 2:
             return
-        prefix, command, channel, msg = parts
-        nick = prefix.split("!")[0][1:]  # Extract nickname
-        msg = msg[1:]  # Remove leading ':'
-        
+        nick = message.nick
+        channel, msg = message.params[0], message.params[1]
+
         if channel in self.channels:
             if msg.startswith("!"):  # Command handling
-                self.command_handler.handle_command(self, nick, channel, msg)
+                self.submit(
+                    channel, "command",
+                    lambda out: self.command_handler.handle_command(
+                        out, nick, channel, msg, hostmask=message.prefix),
+                    timeout=self.command_handler.timeout_for(msg),
+                )
             else:  # Check for URLs in messages
-                self.url_fetcher.detect_and_fetch(nick, channel, msg)
-    
+                self.submit(
+                    channel, "url",
+                    lambda out: self.url_fetcher.detect_and_fetch(nick, channel, msg, bot=out),
+                    timeout=self.URL_TIMEOUT,
+                )
+
+    def submit(self, channel, kind, func, timeout=None):
+        """Hand a command/URL job to the worker pool, off the read loop.
+        `func` receives a reply collector to send its replies through."""
+        return self.worker_pool.submit(channel, kind, func, timeout=timeout)
+
     def stop(self):
         """Stop the bot and close the connection."""
-        print("Stopping bot...")
+        logger.info("Stopping bot...")
         self.running = False
+        self._stop_event.set()
         self.send_raw("QUIT :Bot shutting down")
-        self.sock.close()
+        self.send_queue.close()  # Flushes the QUIT from the priority lane
+        self.worker_pool.stop()
+        self.metrics_reporter.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        self.url_fetcher.close()
+        self._close_socket()
 
 if __name__ == "__main__":
     debug_mode = "--debug" in sys.argv  # Check if --debug argument is present
+    # In debug mode every raw IRC line is logged, unless LOG_TRAFFIC_SAMPLE says otherwise.
+    traffic_sample = 1 if debug_mode and not os.getenv("LOG_TRAFFIC_SAMPLE") else None
+    setup_logging(traffic_sample=traffic_sample)
+
+    bot_class = IrcBot
+    if "--async" in sys.argv:  # asyncio connection core instead of threads
+        from async_irc_bot import AsyncIrcBot
+        bot_class = AsyncIrcBot
 
     if debug_mode:
-        print("Running in debug mode: Joining only the default channel.")
-        bot = IrcBot()  # No channels argument, so it defaults to ["#bottest123"]
+        logger.info("Running in debug mode: Joining only the default channel.")
+        bot = bot_class()  # No channels argument, so it defaults to ["#bottest123"]
     else:
-        bot = IrcBot(channels=["#smliiga", "#valioliiga", "#nakkimuusi"])
+        bot = bot_class(channels=["#smliiga", "#valioliiga", "#nakkimuusi"])
 
     bot.connect()
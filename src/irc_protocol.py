@@ -0,0 +1,220 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IrcMessage:
+    """
+    A single parsed IRC line: optional IRCv3 tags, optional prefix, the
+    command and its parameters.
+
+    Only the command is decoded eagerly (it's short ASCII and everything is
+    dispatched on it). Tags, prefix and params stay as raw bytes until
+    something actually reads them, so the bulk of server traffic we ignore
+    (NAMES lists, MODE changes, other people's NOTICEs...) is never decoded.
+    """
+
+    __slots__ = ("raw", "command", "_tags_raw", "_prefix_raw", "_params_raw",
+                 "_tags", "_prefix", "_params")
+
+    def __init__(self, raw, command, tags_raw=None, prefix_raw=None, params_raw=b""):
+        self.raw = raw
+        self.command = command
+        self._tags_raw = tags_raw
+        self._prefix_raw = prefix_raw
+        self._params_raw = params_raw
+        self._tags = None
+        self._prefix = None
+        self._params = None
+
+    @property
+    def tags(self) -> dict:
+        if self._tags is None:
+            self._tags = parse_tags(self._tags_raw) if self._tags_raw else {}
+        return self._tags
+
+    @property
+    def prefix(self):
+        if self._prefix is None and self._prefix_raw is not None:
+            self._prefix = decode_text(self._prefix_raw)
+        return self._prefix
+
+    @property
+    def nick(self):
+        """Nickname part of a nick!user@host prefix (or the server name)."""
+        prefix = self.prefix
+        if prefix is None:
+            return None
+        return prefix.split("!", 1)[0]
+
+    @property
+    def params(self) -> list:
+        if self._params is None:
+            self._params = [decode_text(p) for p in split_params(self._params_raw)]
+        return self._params
+
+    def __str__(self):
+        return decode_text(self.raw)
+
+    def __repr__(self):
+        return f"IrcMessage({self.raw!r})"
+
+
+class LineFramer:
+    """
+    Incremental splitter that turns arbitrary recv() chunks into complete
+    IRC lines. Partial lines are kept in a reusable bytearray until the rest
+    arrives, so a line straddling two reads is never cut in half.
+
+    Lines are normally CRLF-terminated, but a bare LF is accepted too since
+    some servers/bouncers send those.
+    """
+
+    # IRCv3 allows 8191 bytes of tags plus the classic 512 byte message.
+    # Anything longer without a line ending is garbage - drop it rather than
+    # letting the buffer grow without bound.
+    MAX_LINE_LENGTH = 8191 + 512
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        """Append `data` and return every line it completed (without CRLF)."""
+        buf = self._buffer
+        buf += data
+
+        lines = []
+        start = 0
+        while True:
+            newline = buf.find(b"\n", start)
+            if newline == -1:
+                break
+            end = newline
+            if end > start and buf[end - 1] == 0x0D:  # '\r'
+                end -= 1
+            if end > start:
+                lines.append(bytes(buf[start:end]))
+            start = newline + 1
+
+        if start:
+            del buf[:start]
+        if len(buf) > self.MAX_LINE_LENGTH:
+            logger.warning("Discarding %s bytes of unterminated input", len(buf))
+            buf.clear()
+        return lines
+
+    def pending(self) -> int:
+        """Number of buffered bytes still waiting for a line ending."""
+        return len(self._buffer)
+
+
+def parse_message(line: bytes):
+    """
+    Parse one raw IRC line (without CRLF) into an IrcMessage.
+    Returns None for lines that don't contain a command at all.
+    """
+    pos = 0
+    length = len(line)
+    tags_raw = None
+    prefix_raw = None
+
+    if line.startswith(b"@"):
+        space = line.find(b" ")
+        if space == -1:
+            return None
+        tags_raw = line[1:space]
+        pos = space + 1
+        while pos < length and line[pos] == 0x20:
+            pos += 1
+
+    if line.startswith(b":", pos):
+        space = line.find(b" ", pos)
+        if space == -1:
+            return None
+        prefix_raw = line[pos + 1:space]
+        pos = space + 1
+        while pos < length and line[pos] == 0x20:
+            pos += 1
+
+    space = line.find(b" ", pos)
+    if space == -1:
+        command = line[pos:]
+        params_raw = b""
+    else:
+        command = line[pos:space]
+        params_raw = line[space + 1:]
+
+    if not command:
+        return None
+
+    return IrcMessage(
+        line,
+        command.decode("ascii", errors="replace").upper(),
+        tags_raw=tags_raw,
+        prefix_raw=prefix_raw,
+        params_raw=params_raw,
+    )
+
+
+def split_params(params_raw: bytes) -> list:
+    """Split the raw parameter section into middle params plus the trailing one."""
+    params = []
+    pos = 0
+    length = len(params_raw)
+    while pos < length:
+        if params_raw[pos] == 0x20:
+            pos += 1
+            continue
+        if params_raw[pos] == 0x3A:  # ':' - trailing param, may contain spaces
+            params.append(params_raw[pos + 1:])
+            break
+        space = params_raw.find(b" ", pos)
+        if space == -1:
+            params.append(params_raw[pos:])
+            break
+        params.append(params_raw[pos:space])
+        pos = space + 1
+    return params
+
+
+_TAG_ESCAPES = {":": ";", "s": " ", "\\": "\\", "r": "\r", "n": "\n"}
+
+
+def parse_tags(tags_raw: bytes) -> dict:
+    """Parse an IRCv3 message-tags section (without the leading '@')."""
+    tags = {}
+    for item in decode_text(tags_raw).split(";"):
+        if not item:
+            continue
+        key, _, value = item.partition("=")
+        if "\\" in value:
+            value = _unescape_tag_value(value)
+        tags[key] = value
+    return tags
+
+
+def _unescape_tag_value(value: str) -> str:
+    out = []
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char == "\\" and i + 1 < len(value):
+            out.append(_TAG_ESCAPES.get(value[i + 1], value[i + 1]))
+            i += 2
+            continue
+        if char != "\\":  # a lone trailing backslash is dropped
+            out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def decode_text(data: bytes) -> str:
+    """
+    Decode IRC text as UTF-8, falling back to latin-1 for the legacy
+    (mostly Finnish ISO-8859-1/15) clients that still don't send UTF-8.
+    latin-1 maps every byte, so this never fails.
+    """
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
@@ -1,9 +1,16 @@
 import datetime
+import logging
 import threading
+import time
 
 import pytz
 import requests
 
+from http_client import get_http_client
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
 
 class LiigaCommand:
     """
@@ -20,8 +27,7 @@ class LiigaCommand:
     liiga.fi response can't stall the bot's main IRC loop.
     """
 
-    # Tells CommandHandler to pass irc_bot/channel into execute().
-    needs_irc_context = True
+    # execute() takes irc_bot/channel: registered with needs_context=True in command_handler.py.
 
     BASE_URL = "https://www.liiga.fi/api/v2/games"
     TOURNAMENTS = ["runkosarja", "playoffs", "playout", "qualifications", "valmistavat_ottelut"]
@@ -40,14 +46,15 @@ class LiigaCommand:
     GOAL_PREFIX = f"{BOLD}{GREEN}GOAL:{COLOR_RESET}"
     FINAL_PREFIX = f"{BOLD}{ORANGE}FINAL:{COLOR_RESET}"
 
+    HEADERS = {
+        "User-Agent": "KukistiBot-Liiga/1.0",
+        "Accept": "application/json",
+    }
+
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "KukistiBot-Liiga/1.0",
-            "Accept": "application/json",
-        })
+        self.session = get_http_client()
         self._lock = threading.Lock()
-        self._channels = {}  # channel -> {"stop_event", "thread", "games"}
+        self._channels = {}  # channel -> {"stop_event", "thread", "games", "irc_bot"}
 
     def execute(self, args=None, irc_bot=None, channel=None, **kwargs) -> str:
         arg = (args or "").strip().lower()
@@ -70,7 +77,9 @@ class LiigaCommand:
             # Reserve the slot up front (before any network I/O) so a second
             # !liiga start can't race in while the first lookup is in flight.
             stop_event = threading.Event()
-            self._channels[channel] = {"stop_event": stop_event, "thread": None, "games": {}}
+            self._channels[channel] = {
+                "stop_event": stop_event, "thread": None, "games": {}, "irc_bot": irc_bot,
+            }
 
         thread = threading.Thread(
             target=self._run,
@@ -93,6 +102,85 @@ class LiigaCommand:
         entry["stop_event"].set()
         return "Stopped live Liiga tracking."
 
+    def resume(self, irc_bot):
+        """Called by CommandHandler once the bot has (re)joined its channels.
+
+        Pollers normally survive a reconnect on their own (they just skip
+        polling while the bot is disconnected), but if one has died, start
+        a fresh one for that channel so tracking carries on.
+        """
+        with self._lock:
+            dead = [
+                (channel, entry) for channel, entry in self._channels.items()
+                if entry["thread"] is None or not entry["thread"].is_alive()
+            ]
+
+        for channel, entry in dead:
+            entry["irc_bot"] = irc_bot
+            if self._spawn(channel, entry):
+                logger.info("Liiga: resumed live tracking in %s", channel)
+
+    def _spawn(self, channel, entry):
+        """Starts the poller thread of `entry`: straight into polling if its
+        games are known, else from the initial lookup."""
+        irc_bot, stop_event = entry["irc_bot"], entry["stop_event"]
+        if entry["games"]:
+            target, args = self._poll_loop, (irc_bot, channel, stop_event)
+        else:
+            target, args = self._run, (irc_bot, channel, stop_event)
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        with self._lock:
+            if self._channels.get(channel) is not entry:
+                return False  # stopped in the meantime
+            entry["thread"] = thread
+        thread.start()
+        return True
+
+    @property
+    def active_trackers(self):
+        """Number of channels with live tracking on."""
+        return len(self._channels)
+
+    # ---- hot reload -----------------------------------------------------
+
+    def export_state(self):
+        """Stops this instance's pollers and hands over what they were
+        tracking (see CommandReloader): {channel: {"games", "irc_bot"}}.
+
+        Waits briefly for a poll in flight to finish, so its goals aren't
+        announced again by the new instance.
+        """
+        with self._lock:
+            entries = list(self._channels.values())
+        for entry in entries:
+            entry["stop_event"].set()
+        for entry in entries:
+            thread = entry["thread"]
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(self.REQUEST_TIMEOUT_SECONDS)
+        with self._lock:
+            channels, self._channels = self._channels, {}
+        return {
+            channel: {"games": entry["games"], "irc_bot": entry.get("irc_bot")}
+            for channel, entry in channels.items()
+        }
+
+    def import_state(self, state):
+        """Takes over the trackers exported by a previous instance."""
+        started = []
+        with self._lock:
+            for channel, tracked in state.items():
+                if channel in self._channels:
+                    continue
+                entry = {
+                    "stop_event": threading.Event(), "thread": None,
+                    "games": tracked["games"], "irc_bot": tracked["irc_bot"],
+                }
+                self._channels[channel] = entry
+                started.append((channel, entry))
+        for channel, entry in started:
+            self._spawn(channel, entry)
+
     # ---- background thread entry point --------------------------------
 
     def _run(self, irc_bot, channel, stop_event):
@@ -102,7 +190,7 @@ class LiigaCommand:
         try:
             games = self._fetch_today_games()
         except Exception as e:
-            print(f"Liiga initial fetch error: {e}")
+            logger.warning("Liiga initial fetch error: %s", e)
             games = None
 
         if games is None:
@@ -140,18 +228,29 @@ class LiigaCommand:
         try:
             irc_bot.send_message(channel, message)
         except Exception as e:
-            print(f"Liiga: failed to send message to {channel}: {e}")
+            logger.warning("Liiga: failed to send message to %s: %s", channel, e)
 
     # ---- polling loop -------------------------------------------------
 
     def _poll_loop(self, irc_bot, channel, stop_event):
         while not stop_event.is_set():
+            if getattr(irc_bot, "registered", True) is False:
+                # Disconnected: don't poll, so the last announced state is kept
+                # and goals scored meanwhile are announced once we're back.
+                stop_event.wait(self.POLL_INTERVAL_SECONDS)
+                continue
+
+            start = time.perf_counter()
             try:
                 all_ended = self._poll_once(irc_bot, channel)
+                metrics.observe("poll", "liiga", time.perf_counter() - start)
             except Exception as e:
-                print(f"Liiga poll error: {e}")
+                metrics.observe("poll", "liiga", time.perf_counter() - start, error=True)
+                logger.warning("Liiga poll error: %s", e)
                 all_ended = False
 
+            if stop_event.is_set():
+                return  # stopped (or handed over to a reloaded instance) mid-poll
             if all_ended:
                 self._drop_if_current(channel, stop_event)
                 self._safe_send(
@@ -203,7 +302,7 @@ class LiigaCommand:
                 # Don't let one malformed game entry take down the whole poll
                 # cycle (or the ones after it) - keep the previous state for
                 # this game and try again next cycle.
-                print(f"Liiga: failed to process game {gid}: {e}")
+                logger.warning("Liiga: failed to process game %s: %s", gid, e)
                 new_state[gid] = prev_state.get(gid) or self._snapshot(game)
                 all_ended = False
 
@@ -316,6 +415,7 @@ class LiigaCommand:
                 resp = self.session.get(
                     self.BASE_URL,
                     params={"tournament": tournament, "season": season, "date": date_str},
+                    headers=self.HEADERS,
                     timeout=self.REQUEST_TIMEOUT_SECONDS,
                 )
                 resp.raise_for_status()
@@ -326,9 +426,9 @@ class LiigaCommand:
                         games[gid] = g
                 any_success = True
             except requests.exceptions.RequestException as e:
-                print(f"Liiga API request failed for tournament={tournament}: {e}")
+                logger.warning("Liiga API request failed for tournament=%s: %s", tournament, e)
             except (ValueError, AttributeError, TypeError) as e:
-                print(f"Liiga API returned unexpected data for tournament={tournament}: {e}")
+                logger.warning("Liiga API returned unexpected data for tournament=%s: %s", tournament, e)
 
         if not any_success:
             return None
@@ -0,0 +1,108 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# Structured fields: pass them as extra={...} and they're appended to the
+# line as key=value, e.g. "Handled !weather channel=#chan command=!weather latency_ms=120".
+FIELDS = ("channel", "nick", "command", "kind", "host", "url", "latency_ms")
+
+# Raw IRC lines ("< ..." / "> ...") go to this logger, at DEBUG.
+TRAFFIC_LOGGER = "traffic"
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class StructuredFormatter(logging.Formatter):
+    """LOG_FORMAT plus the FIELDS a record carries, as key=value pairs."""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = [f"{key}={getattr(record, key)}" for key in FIELDS if hasattr(record, key)]
+        if fields:
+            first, newline, rest = line.partition("\n")  # keep a traceback below the fields
+            line = f"{first} {' '.join(fields)}{newline}{rest}"
+        return line
+
+
+class SampleFilter(logging.Filter):
+    """Lets through one record in `every` (1 = all of them)."""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, every)
+        self._seen = 0
+
+    def filter(self, record):
+        self._seen += 1  # An occasional miscount between threads doesn't matter here
+        return (self._seen - 1) % self.every == 0
+
+
+_listener = None
+
+
+def setup_logging(level=None, path=None, traffic_sample=None, max_bytes=None, backups=None):
+    """
+    Routes all logging through a queue to one background thread that writes
+    to stdout and, with a `path`, a rotating file. Logging from the IRC loop
+    or a worker is then just a queue put; the slow write happens elsewhere.
+
+    Defaults come from the environment:
+      LOG_LEVEL           - DEBUG, INFO (default), WARNING...
+      LOG_FILE            - rotating log file (default kukistibot.log, "" = stdout only)
+      LOG_MAX_BYTES       - size at which the file is rotated (default 10 MB)
+      LOG_BACKUPS         - rotated files kept (default 5)
+      LOG_TRAFFIC_SAMPLE  - log every Nth raw IRC line (default 0 = none)
+    """
+    global _listener
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    path = os.getenv("LOG_FILE", "kukistibot.log") if path is None else path
+    if traffic_sample is None:
+        traffic_sample = int(os.getenv("LOG_TRAFFIC_SAMPLE", "0"))
+    max_bytes = max_bytes or int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    backups = int(os.getenv("LOG_BACKUPS", "5")) if backups is None else backups
+
+    formatter = StructuredFormatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if path:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    # Raw traffic is off unless sampled in; when it's off, a traffic.debug()
+    # call costs one level check and the line is never even formatted.
+    traffic = logging.getLogger(TRAFFIC_LOGGER)
+    for old in list(traffic.filters):
+        traffic.removeFilter(old)
+    if traffic_sample > 0:
+        traffic.setLevel(logging.DEBUG)
+        traffic.addFilter(SampleFilter(traffic_sample))
+    else:
+        traffic.setLevel(logging.INFO)
+    return _listener
+
+
+def shutdown_logging():
+    """Writes out whatever is still queued; called at exit."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
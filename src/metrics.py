@@ -0,0 +1,171 @@
+import bisect
+import logging
+import math
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency buckets. Anything slower lands in
+# an overflow bucket, reported as the slowest time seen.
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """
+    Latency distribution over fixed buckets: recording is a bisect and a
+    counter increment, and memory doesn't grow with the number of samples.
+    Percentiles are read off as the upper bound of the bucket they fall in,
+    so they're accurate to a bucket (about 2.5x) - plenty to tell a 200 ms
+    upstream from a 5 s one.
+    """
+
+    __slots__ = ("bounds", "buckets", "count", "errors", "total", "max")
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds, error=False):
+        self.buckets[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        if error:
+            self.errors += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Returns the `q` (0..1) percentile in seconds, or 0 without samples."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                bound = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def copy(self):
+        histogram = Histogram(self.bounds)
+        histogram.buckets = list(self.buckets)
+        histogram.count, histogram.errors = self.count, self.errors
+        histogram.total, histogram.max = self.total, self.max
+        return histogram
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+def format_duration(seconds):
+    """0.2ms, 120ms, 1.2s..."""
+    if seconds < 0.001:
+        return f"{seconds * 1000:.1f}ms"
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    return f"{seconds:.1f}s"
+
+
+class Metrics:
+    """
+    Named latency histograms, in groups:
+
+      command  - handle_command time per command (errors: exceptions and
+                 "Error..." replies)
+      cache    - response cache lookups per command (errors: misses)
+      upstream - HTTP requests per API host, recorded by HttpClient (errors:
+                 exceptions and 4xx/5xx answers); other hosts share one name
+      poll     - background poll cycles, e.g. LiigaCommand's (errors: failed polls)
+    """
+
+    ERROR_LABELS = {"cache": "miss"}  # what an "error" means in the group, for summaries
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (group, name) -> Histogram
+
+    def observe(self, group, name, seconds, error=False):
+        key = (group, name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds, error)
+
+    def snapshot(self, group) -> dict:
+        """Returns {name: Histogram.snapshot()} for `group`."""
+        with self._lock:
+            return {name: h.snapshot() for (g, name), h in self._histograms.items() if g == group}
+
+    def histograms(self, group) -> dict:
+        """Returns {name: copy of the Histogram} for `group`."""
+        with self._lock:
+            return {name: h.copy() for (g, name), h in self._histograms.items() if g == group}
+
+    def summary(self, group, limit=None) -> str:
+        """One line for `group`, busiest first: "!weather 12x p50=120ms p95=480ms p99=1.2s err=1; ..."."""
+        stats = sorted(self.snapshot(group).items(), key=lambda item: -item[1]["count"])
+        parts = []
+        for name, s in stats[:limit]:
+            part = (f"{name} {s['count']}x p50={format_duration(s['p50'])}"
+                    f" p95={format_duration(s['p95'])} p99={format_duration(s['p99'])}")
+            if s["errors"]:
+                part += f" {self.ERROR_LABELS.get(group, 'err')}={s['errors']}"
+            parts.append(part)
+        return "; ".join(parts)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+# The process-wide instance everything records into.
+metrics = Metrics()
+
+
+class MetricsReporter:
+    """Prints a metrics summary every `interval` seconds (METRICS_LOG_INTERVAL, 0 = off)."""
+
+    INTERVAL = int(os.getenv("METRICS_LOG_INTERVAL", "900"))
+    GROUPS = ("command", "cache", "upstream", "poll")
+
+    def __init__(self, metrics=metrics, interval=None):
+        self.metrics = metrics
+        self.interval = self.INTERVAL if interval is None else interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if not self.interval or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-reporter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.report()
+
+    def report(self):
+        for group in self.GROUPS:
+            line = self.metrics.summary(group)
+            if line:
+                logger.info("Metrics (%s): %s", group, line)
+
+    def stop(self):
+        self._stop_event.set()
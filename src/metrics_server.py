@@ -0,0 +1,188 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics import metrics as shared_metrics
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "kukistibot_"
+
+# Metrics group -> (histogram name, label its names go in)
+HISTOGRAMS = {
+    "command": ("command_duration_seconds", "command"),
+    "cache": ("response_cache_lookup_duration_seconds", "command"),
+    "upstream": ("upstream_request_duration_seconds", "host"),
+    "poll": ("poll_duration_seconds", "poller"),
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class PrometheusExporter:
+    """
+    Renders the bot's state in the Prometheus text format. Everything is
+    read at scrape time from the counters and stats() the components
+    already keep, so the IRC hot path does no extra work for it.
+    """
+
+    def __init__(self, bot, metrics=None):
+        self.bot = bot
+        self.metrics = metrics or shared_metrics
+
+    def render(self) -> str:
+        lines = []
+        for section in (self._irc, self._workers, self._caches, self._coalescing, self._url_titles,
+                        self._liiga, self._histograms):
+            section(lines)
+        return "\n".join(lines) + "\n"
+
+    # ---- output helpers ---------------------------------------------------
+
+    @staticmethod
+    def _metric(lines, name, kind, help_text, samples):
+        """`samples`: [(labels dict, value)]."""
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+
+    # ---- sections -----------------------------------------------------------
+
+    def _irc(self, lines):
+        bot = self.bot
+        send_stats = bot.send_queue.stats()
+        self._metric(lines, "lines_received_total", "counter", "IRC lines received.",
+                     [({}, bot.lines_received)])
+        self._metric(lines, "lines_sent_total", "counter", "IRC lines written to the server.",
+                     [({}, send_stats["sent"])])
+        self._metric(lines, "send_queue_depth", "gauge", "Lines waiting in the send queue.",
+                     [({}, send_stats["depth"])])
+        self._metric(lines, "registered", "gauge", "1 while registered with the IRC server.",
+                     [({}, int(bool(bot.registered)))])
+        self._metric(lines, "threads", "gauge", "Live threads in the process.",
+                     [({}, threading.active_count())])
+        tasks = getattr(bot, "_tasks", None)
+        if tasks is not None:
+            self._metric(lines, "asyncio_tasks", "gauge", "Command/URL tasks on the event loop.",
+                         [({}, len(tasks))])
+
+    def _workers(self, lines):
+        stats = self.bot.worker_pool.stats()
+        self._metric(lines, "worker_backlog", "gauge", "Jobs waiting for a worker.",
+                     [({}, stats["backlog"])])
+        self._metric(lines, "worker_jobs_total", "counter", "Command/URL jobs by result.", [
+            ({"result": "completed"}, stats["completed"]),
+            ({"result": "error"}, stats["errors"]),
+            ({"result": "timeout"}, stats["timeouts"]),
+        ] + [({"result": f"shed_{kind}"}, count) for kind, count in sorted(stats["shed"].items())])
+
+    def _caches(self, lines):
+        caches = {"responses": self.bot.command_handler.cache,
+                  "titles": self.bot.url_fetcher.title_cache,
+                  "redirects": self.bot.url_fetcher.redirect_cache}
+        stats = {name: cache.stats() for name, cache in caches.items() if hasattr(cache, "stats")}
+        self._metric(lines, "cache_lookups_total", "counter", "Cache lookups by result.", [
+            ({"cache": name, "result": result}, s[key])
+            for name, s in stats.items()
+            for result, key in (("hit", "hits"), ("stale", "stale_hits"), ("miss", "misses"))
+        ])
+        self._metric(lines, "cache_entries", "gauge", "Entries held in each cache.",
+                     [({"cache": name}, s["size"]) for name, s in stats.items()])
+
+    def _coalescing(self, lines):
+        stats = self.bot.command_handler.single_flight.stats()
+        self._metric(lines, "command_executions_total", "counter",
+                     "Uncached command executions: run, or shared with an identical one in flight.", [
+                         ({"result": "executed"}, stats["executed"]),
+                         ({"result": "collapsed"}, stats["collapsed"]),
+                         ({"result": "timed_out"}, stats["timed_out"]),
+                     ])
+
+    def _url_titles(self, lines):
+        outcomes = dict(self.bot.url_fetcher.outcomes)
+        self._metric(lines, "url_titles_total", "counter", "Link title lookups by outcome.",
+                     [({"outcome": outcome}, count) for outcome, count in sorted(outcomes.items())])
+
+    def _liiga(self, lines):
+        spec = self.bot.command_handler.registry.lookup("!liiga")
+        command = getattr(spec, "command", None)
+        if getattr(command, "loaded", True) is False:
+            trackers = 0  # Never used since startup
+        else:
+            trackers = getattr(command, "active_trackers", 0)
+        self._metric(lines, "liiga_trackers", "gauge", "Channels with live Liiga tracking on.",
+                     [({}, trackers)])
+
+    def _histograms(self, lines):
+        for group, (name, label) in HISTOGRAMS.items():
+            histograms = self.metrics.histograms(group)
+            if not histograms:
+                continue
+            lines.append(f"# HELP {PREFIX}{name} Latency of {group} operations.")
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            errors = []
+            for key, histogram in sorted(histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.buckets):
+                    cumulative += count
+                    labels = _labels({label: key, "le": bound})
+                    lines.append(f"{PREFIX}{name}_bucket{labels} {cumulative}")
+                labels = _labels({label: key, "le": "+Inf"})
+                lines.append(f"{PREFIX}{name}_bucket{labels} {histogram.count}")
+                lines.append(f"{PREFIX}{name}_sum{_labels({label: key})} {histogram.total}")
+                lines.append(f"{PREFIX}{name}_count{_labels({label: key})} {histogram.count}")
+                errors.append(({label: key}, histogram.errors))
+            if group != "cache":  # Its "errors" are misses, already in cache_lookups_total
+                self._metric(lines, f"{group}_errors_total", "counter", f"Failed {group} operations.", errors)
+
+
+class MetricsServer:
+    """
+    Serves PrometheusExporter output at http://127.0.0.1:<port>/metrics from
+    a daemon thread. Only listens on localhost: it's meant for a Prometheus
+    (or agent) running next to the bot.
+    """
+
+    def __init__(self, bot, port, host="127.0.0.1", metrics=None):
+        exporter = PrometheusExporter(bot, metrics)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # One line per scrape would just be noise
+
+        self.exporter = exporter
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        logger.info("Serving metrics on http://%s:%s/metrics", self.httpd.server_address[0], self.port)
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread = None
+        self.httpd.server_close()
@@ -0,0 +1,148 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership test: "no" is always right, "yes" is wrong
+    for about `error_rate` of the keys never added. Sized up front for
+    `capacity` keys, and never grows past that.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenLinks:
+    """
+    Remembers who first posted each (normalized) link on each channel, and when.
+
+    - The most recent MEMORY_SIZE links are kept in an in-memory LRU.
+    - Everything is also written to a SQLite file (`path`), the long-term
+      store. Without a path, only the LRU is used.
+    - A Bloom filter over everything in the store answers "never seen" for
+      new links (the usual case) without a disk lookup.
+
+    The LRU and the Bloom filter have a fixed size, so memory stays flat no
+    matter how long the bot has been logging links.
+    """
+
+    MEMORY_SIZE = 10_000
+    BLOOM_CAPACITY = 1_000_000  # ~1.2 MB; past this the filter just lets more lookups through
+
+    def __init__(self, path=None, memory_size=None, clock=time.time):
+        self.path = path
+        self.memory_size = memory_size or self.MEMORY_SIZE
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()  # "channel url" -> (nick, posted_at)
+        self._bloom = BloomFilter(self.BLOOM_CAPACITY)
+        self._db = None  # Opened on first use
+
+    @staticmethod
+    def _key(channel, url):
+        return f"{channel.lower()} {url}"
+
+    def _connect(self):
+        if self._db is None and self.path:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS seen_links ("
+                " channel TEXT NOT NULL, url TEXT NOT NULL, nick TEXT NOT NULL,"
+                " posted_at REAL NOT NULL, PRIMARY KEY (channel, url))"
+            )
+            self._db.commit()
+            for channel, url in self._db.execute("SELECT channel, url FROM seen_links"):
+                self._bloom.add(self._key(channel, url))
+        return self._db
+
+    def lookup(self, channel, url):
+        """Returns (nick, posted_at) of the first post of `url` on `channel`, or None."""
+        key = self._key(channel, url)
+        with self._lock:
+            return self._lookup(key, channel, url)
+
+    def _lookup(self, key, channel, url):
+        entry = self._recent.get(key)
+        if entry is not None:
+            self._recent.move_to_end(key)
+            return entry
+        db = self._connect()
+        if db is None or key not in self._bloom:
+            return None
+        row = db.execute(
+            "SELECT nick, posted_at FROM seen_links WHERE channel = ? AND url = ?",
+            (channel.lower(), url),
+        ).fetchone()
+        if row is None:
+            return None  # Bloom filter false positive
+        self._remember(key, (row[0], row[1]))
+        return row[0], row[1]
+
+    def check_and_record(self, channel, url, nick):
+        """
+        Returns who posted `url` on `channel` before, and when, as
+        (nick, posted_at), or None if it's new; in that case it's recorded
+        as posted by `nick` now.
+        """
+        key = self._key(channel, url)
+        with self._lock:
+            previous = self._lookup(key, channel, url)
+            if previous is not None:
+                return previous
+            posted_at = self.clock()
+            self._remember(key, (nick, posted_at))
+            db = self._connect()
+            if db is not None:
+                db.execute(
+                    "INSERT OR IGNORE INTO seen_links (channel, url, nick, posted_at) VALUES (?, ?, ?, ?)",
+                    (channel.lower(), url, nick, posted_at),
+                )
+                db.commit()
+                self._bloom.add(key)
+            return None
+
+    def _remember(self, key, entry):
+        self._recent[key] = entry
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.memory_size:
+            self._recent.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            db, self._db = self._db, None
+        if db is not None:
+            db.close()
+
+
+def format_age(seconds):
+    """3h, 5min, 2d... for "(posted by nick 3h ago)"."""
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}min"
+    if seconds < 86400:
+        return f"{seconds // 3600}h"
+    if seconds < 365 * 86400:
+        return f"{seconds // 86400}d"
+    return f"{seconds // (365 * 86400)}y"
@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens and refills at
+    `rate` tokens per second. Each outgoing line costs one token.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def consume(self) -> float:
+        """Take a token if one is available and return 0.0; otherwise return
+        how many seconds to wait until the next token is available."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class SendQueue:
+    """
+    Single-writer outbound queue for the IRC connection.
+
+    Any thread may put() a line; only the writer thread touches the socket.
+    Lines are paced by a token bucket and served from per-target queues
+    in round-robin order, so one channel's burst of goal announcements
+    can't starve the others. PONG and QUIT go in a priority lane that is
+    always served first.
+
+    The defaults follow ircu's (QuakeNet's) flood model: a client may run
+    about 10 seconds "ahead" at ~2 seconds per line before getting kicked
+    for Excess Flood, i.e. a burst of ~5 lines, then one line every 2 seconds.
+    """
+
+    RATE = 0.5   # lines per second once the burst is used up
+    BURST = 5    # lines that can be sent back-to-back
+    PRIORITY_COMMANDS = frozenset({"PONG", "QUIT"})
+    TARGETED_COMMANDS = frozenset({"PRIVMSG", "NOTICE"})
+
+    def __init__(self, write, rate=None, burst=None, clock=time.monotonic):
+        self._write = write
+        self.clock = clock
+        self.bucket = TokenBucket(rate or self.RATE, burst or self.BURST, clock=clock)
+        self._cond = threading.Condition()
+        self._priority = deque()
+        self._queues = {}          # target -> deque of (line, enqueued_at)
+        self._rotation = deque()   # targets with pending lines, in serving order
+        self._thread = None
+        self._running = False
+
+        # Metrics
+        self.dequeued = 0
+        self.sent = 0
+        self.write_errors = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    # ---- producer side --------------------------------------------------
+
+    def put(self, line):
+        """Queue a raw line (without CRLF) for sending."""
+        command, target = self._classify(line)
+        item = (line, self.clock())
+        with self._cond:
+            if command in self.PRIORITY_COMMANDS:
+                self._priority.append(item)
+            else:
+                queue = self._queues.get(target)
+                if queue is None:
+                    queue = self._queues[target] = deque()
+                    self._rotation.append(target)
+                queue.append(item)
+            depth = self._depth()
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._cond.notify()
+
+    def _classify(self, line):
+        parts = line.split(" ", 2)
+        command = parts[0].upper()
+        if command in self.TARGETED_COMMANDS and len(parts) > 1:
+            return command, parts[1].lower()
+        return command, ""  # registration, JOIN etc. share the server lane
+
+    # ---- writer side ----------------------------------------------------
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="send-queue", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout=5):
+        """Stop the writer, first giving it up to `timeout` seconds to send
+        what is still in the priority lane (e.g. a final QUIT)."""
+        deadline = self.clock() + timeout
+        with self._cond:
+            while self._priority and self._running and self.clock() < deadline:
+                self._cond.wait(0.05)
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=max(0.0, deadline - self.clock()))
+
+    def clear(self):
+        """Drop everything that hasn't been sent (e.g. after a disconnect)."""
+        with self._cond:
+            self._priority.clear()
+            self._queues.clear()
+            self._rotation.clear()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._depth():
+                    self._cond.wait()
+                if not self._running:
+                    return
+                wait = self.bucket.consume()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                line, enqueued_at = self._pop_next()
+                waited = self.clock() - enqueued_at
+                self.dequeued += 1
+                self.total_wait += waited
+                if waited > self.max_wait:
+                    self.max_wait = waited
+                self._cond.notify_all()
+
+            try:
+                self._write(line)
+                self.sent += 1
+            except Exception as e:
+                self.write_errors += 1
+                logger.warning("Failed to send message: %s", e)
+
+    def _pop_next(self):
+        """Priority lane first, then one line from the next target in rotation."""
+        if self._priority:
+            return self._priority.popleft()
+        target = self._rotation.popleft()
+        queue = self._queues[target]
+        item = queue.popleft()
+        if queue:
+            self._rotation.append(target)
+        else:
+            del self._queues[target]
+        return item
+
+    def _depth(self):
+        return len(self._priority) + sum(len(q) for q in self._queues.values())
+
+    # ---- metrics --------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._cond:
+            depth = self._depth()
+            per_target = {target: len(q) for target, q in self._queues.items()}
+            priority_depth = len(self._priority)
+        return {
+            "depth": depth,
+            "priority_depth": priority_depth,
+            "per_target": per_target,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "write_errors": self.write_errors,
+            "avg_wait": self.total_wait / self.dequeued if self.dequeued else 0.0,
+            "max_wait": self.max_wait,
+        }
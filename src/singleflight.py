@@ -0,0 +1,72 @@
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlightTimeout(TimeoutError):
+    """A waiter gave up on the call it was sharing."""
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one.
+
+    While a call for `key` is in flight, further do(key, ...) calls don't
+    run their function; they wait for the first one and get its result (or
+    its exception). Once it finishes the key is free again - results aren't
+    remembered, that's the cache's job.
+
+    Waiters give up after `timeout` seconds with SingleFlightTimeout, so a
+    hung call ties up one thread rather than everyone asking the same thing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+        self.executed = 0   # calls that actually ran
+        self.collapsed = 0  # calls that piggybacked on one already in flight
+        self.timed_out = 0  # waiters that gave up on the call they shared
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self.timed_out += 1
+                raise SingleFlightTimeout(f"gave up waiting for {key!r} after {timeout}s")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls)
+        return {"executed": self.executed, "collapsed": self.collapsed,
+                "timed_out": self.timed_out, "in_flight": in_flight}
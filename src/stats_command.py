@@ -0,0 +1,34 @@
+from metrics import metrics as shared_metrics
+
+
+class StatsCommand:
+    """
+    !stats [commands|upstreams|cache]: call counts, p50/p95/p99 latency and
+    errors of the busiest commands, upstream hosts or cached commands
+    (admins only, see BOT_ADMINS). The cache section also says how many
+    executions were shared by identical concurrent commands.
+    """
+
+    SECTIONS = {"commands": "command", "upstreams": "upstream", "cache": "cache"}
+    LIMIT = 5  # entries per reply, to stay within one IRC line
+
+    def __init__(self, metrics=None, cache=None, single_flight=None):
+        self.metrics = metrics or shared_metrics
+        self.cache = cache
+        self.single_flight = single_flight
+
+    def execute(self, args=None, **kwargs):
+        section = (args or "").strip().lower() or "commands"
+        group = self.SECTIONS.get(section)
+        if group is None:
+            return "Usage: !stats [commands|upstreams|cache]"
+
+        line = self.metrics.summary(group, limit=self.LIMIT) or "nothing recorded yet"
+        if group == "cache" and self.cache is not None:
+            stats = self.cache.stats()
+            line = f"{stats['size']}/{stats['maxsize']} entries, hit rate {stats['hit_rate']:.0%}; {line}"
+        if group == "cache" and self.single_flight is not None:
+            flights = self.single_flight.stats()
+            line += (f"; coalesced {flights['collapsed']} of {flights['executed'] + flights['collapsed']}"
+                     f" executions, {flights['timed_out']} timed out")
+        return f"Stats ({section}): {line}"
@@ -1,9 +1,15 @@
+import logging
 import os
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 import requests
 
+from http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+
 class TimeCommand:
     """
     Fetches local time for a given city, or a given timezone abbreviation,
@@ -71,12 +77,11 @@ class TimeCommand:
         "PKT": "Asia/Karachi",
     }
 
+    HEADERS = {"User-Agent": "KukistiBot-Time/1.0"}
+
     def __init__(self):
         self.api_key = os.getenv("TIME_API_KEY")
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "KukistiBot-Time/1.0"
-        })
+        self.session = get_http_client()
 
     def execute(self, city_name: str) -> str:
         city_name = city_name.strip()
@@ -94,6 +99,7 @@ class TimeCommand:
             resp = self.session.get(
                 self.API_URL,
                 params={"apiKey": self.api_key, "location": city_name},
+                headers=self.HEADERS,
                 timeout=5,
             )
             resp.raise_for_status()
@@ -171,7 +177,7 @@ class TimeCommand:
                 naive_dt = datetime.strptime(f"{date_str} {time_str}", f"%Y-%m-%d {time_format}")
                 tz_abbr = naive_dt.replace(tzinfo=ZoneInfo(timezone_name)).tzname()
             except Exception as e:
-                print(f"Failed to resolve timezone abbreviation for '{timezone_name}': {e}")
+                logger.warning("Failed to resolve timezone abbreviation for '%s': %s", timezone_name, e)
                 tz_abbr = None
 
         if len(time_str) == 5:
@@ -197,7 +203,7 @@ class TimeCommand:
         try:
             now = datetime.now(ZoneInfo(iana_name))
         except Exception as e:
-            print(f"Failed to resolve timezone '{iana_name}' for abbreviation '{abbr}': {e}")
+            logger.warning("Failed to resolve timezone '%s' for abbreviation '%s': %s", iana_name, abbr, e)
             return f"Error: Could not resolve timezone for {abbr}."
 
         formatted_date = now.strftime("%d/%m/%y")
@@ -1,7 +1,27 @@
+import logging
+import os
 import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urljoin, urlparse, parse_qsl, urlencode, urlsplit, urlunsplit
+
+from cache import TTLCache
+from domain_rules import DomainRules
+from host_limiter import HostLimiter, HostUnavailable
+from html_title import (
+    MAX_HTML_BYTES, TitleParsePool, charset_from_content_type, extract_title, read_head,
+)
+from http_client import get_http_client
+from seen_links import SeenLinks, format_age
+from singleflight import SingleFlightTimeout
+from youtube import YouTubeClient, extract_video_id
+
+logger = logging.getLogger(__name__)
 
 
 class URLFetcher:
@@ -9,42 +29,152 @@ class URLFetcher:
 
     MAX_IRC_MESSAGE_LENGTH = 400  # Safe maximum for IRC message length
     MAX_TITLE_LENGTH = 300        # Max allowed title length to avoid excess flood kicks
+    MAX_HTML_BYTES = MAX_HTML_BYTES  # Never read more than this much of a page
+    CHUNK_SIZE = 8192
+
+    # Content types worth parsing for a title; anything else (images, PDFs,
+    # videos, archives...) only gets a short type/size summary.
+    HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+
+    MAX_URLS_PER_MESSAGE = 5   # links past this in one message are ignored
+    MAX_FETCHES_PER_MESSAGE = 3  # titles of one message fetched at the same time
+    MAX_PARALLEL_FETCHES = 8   # fetches in flight across all messages
+
+    TITLE_CACHE_SIZE = 1024
+    TITLE_TTL = 3600  # seconds a fetched title is reused for the same (normalized) URL
+    ERROR_TTL = 60    # failures are remembered briefly, so a dead link isn't hammered
+
+    REDIRECT_CACHE_SIZE = 1024
+    REDIRECT_TTL = 24 * 3600  # short link -> final URL mappings hardly ever change
+    MAX_REDIRECTS = 5
+    REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+    # Query parameters that only track where a link was shared from
+    TRACKING_PARAMS = {"fbclid", "si"}
+    TRACKING_PARAM_PREFIXES = ("utm_",)
+
+    FETCH_TIMEOUT = 5  # seconds, unless a domain rule says otherwise
+
+    # What page/redirect fetches are counted as in the HTTP client's stats and
+    # metrics: one name for all of them, however many hosts people link to.
+    UPSTREAM = "link_titles"
+
+    # Parse page heads in this many worker processes instead of the fetching
+    # thread (0 = parse in-thread). Worth it when bursts of links slow the bot down.
+    PARSE_PROCESSES = int(os.getenv("TITLE_PARSE_PROCESSES", "0"))
+
+    # Who posted which link where, for "(posted by nick 3h ago)" on reposts
+    SEEN_LINKS_DB = os.getenv("SEEN_LINKS_DB", "seen_links.db")
+    # Video ID -> title/author, kept across restarts
+    YOUTUBE_CACHE_DB = os.getenv("YOUTUBE_CACHE_DB", "youtube_cache.db")
+
+    # Blacklisted domains, service-specific handlers and per-domain timeouts.
+    # Edits to the file are picked up while the bot runs.
+    RULES_FILE = os.getenv(
+        "DOMAIN_RULES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "domain_rules.json")
+    )
 
-    # Domains that should be ignored (no title fetching)
-    BLACKLISTED_DOMAINS = {
-        "maps.google.com",
-        "maps.app.goo.gl",
-        "x.com",
-        "twitter.com",
-        "reddit.com",
-        "nettiauto.com"
-    }
+    # A common browser user-agent, sent with every request to avoid being blocked
+    HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
 
     def __init__(self, bot):
         """
         Initialize the URLFetcher with a reference to the IRC bot.
-        Sets up a session with a common browser user-agent to avoid being blocked.
+        Requests go through the bot's shared pooled HTTP client.
         """
         self.bot = bot
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-        })
+        self.session = get_http_client()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.title_cache = TTLCache(maxsize=self.TITLE_CACHE_SIZE)
+        self.redirect_cache = TTLCache(maxsize=self.REDIRECT_CACHE_SIZE)
+        self.domain_rules = DomainRules(path=self.RULES_FILE)
+        self.host_limiter = HostLimiter()  # Per-host concurrency, pacing and backoff
+        self.parse_pool = None
+        if self.PARSE_PROCESSES > 0:
+            self.parse_pool = TitleParsePool(self.PARSE_PROCESSES)
+            self.parse_pool.start(wait=False)  # Warm workers before the first link, without holding up connecting
+        self.seen_links = SeenLinks(path=self.SEEN_LINKS_DB)
+        self.youtube = YouTubeClient(self.session, cache_path=self.YOUTUBE_CACHE_DB, headers=self.HEADERS)
+        # get_title() results by outcome, for the metrics endpoint. Bumped without
+        # a lock: a count lost to a race now and then is fine for a dashboard.
+        self.outcomes = Counter()
 
-    def detect_and_fetch(self, nick, channel, message):
+    def detect_and_fetch(self, nick, channel, message, bot=None):
         """
         Extracts URLs from a message and fetches their titles.
         Sends shortened titles back to the IRC channel to avoid flooding.
+        `bot` overrides where replies go (the worker pool passes a reply collector).
         """
-        urls = self.extract_urls(message)
+        bot = bot or self.bot
+        urls = list(dict.fromkeys(self.extract_urls(message)))[:self.MAX_URLS_PER_MESSAGE]
         if not urls:
             return  # No URLs found in the message
 
-        for url in urls:
-            title_info = self.get_title(url)
+        seen_before = [self.check_seen(channel, url, nick) for url in urls]
+        for title_info, previous in zip(self.fetch_titles(urls), seen_before):
             if title_info:
-                safe_msg = self.trim_message(title_info)
-                self.bot.send_message(channel, safe_msg)
+                note = ""
+                if previous is not None and previous[0] != nick:  # No note on reposting your own link
+                    first_nick, posted_at = previous
+                    note = f" (posted by {first_nick} {format_age(time.time() - posted_at)} ago)"
+                # The title gives way to the note, so the whole line stays within MAX_TITLE_LENGTH
+                safe_msg = self.trim_message(title_info, self.MAX_TITLE_LENGTH - len(note)) + note
+                bot.send_message(channel, safe_msg)
+
+    def check_seen(self, channel, url, nick):
+        """
+        Records `url` as posted on `channel` by `nick`, and returns who posted
+        it there first and when, as (nick, posted_at), if it's a repost.
+        """
+        try:
+            return self.seen_links.check_and_record(channel, self.normalize_url(url), nick)
+        except sqlite3.Error as e:
+            logger.error("Error accessing seen links: %s", e)  # Titles still go out, just without the note
+            return None
+
+    def fetch_titles(self, urls):
+        """
+        Yields get_title() results in the same order as `urls`.
+        The titles are fetched concurrently: at most MAX_FETCHES_PER_MESSAGE for
+        these urls and MAX_PARALLEL_FETCHES across everyone sharing this fetcher.
+        Each result is yielded as soon as it and every result before it are ready.
+        """
+        if len(urls) == 1:
+            yield self.get_title(urls[0])  # Nothing to overlap with
+            return
+
+        executor = self._get_executor()
+        window = threading.BoundedSemaphore(self.MAX_FETCHES_PER_MESSAGE)
+        futures = []
+        for url in urls:
+            window.acquire()  # Wait for a slot of this message's window
+            future = executor.submit(self.get_title, url)
+            future.add_done_callback(lambda _: window.release())
+            futures.append(future)
+            while futures and futures[0].done():  # Post the ready prefix right away
+                yield futures.pop(0).result()
+        for future in futures:
+            yield future.result()
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.MAX_PARALLEL_FETCHES, thread_name_prefix="url-fetch"
+                )
+            return self._executor
+
+    def close(self):
+        """Shuts down the fetch threads and parse processes; a later fetch starts new ones."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+        self.seen_links.close()
+        self.youtube.close()
 
     def extract_urls(self, text):
         """
@@ -59,56 +189,151 @@ class URLFetcher:
         Returns True if the domain is blacklisted.
         Matches both exact domains and their subdomains.
         """
-        domain = domain.lower()
-        for blocked in self.BLACKLISTED_DOMAINS:
-            if domain == blocked or domain.endswith("." + blocked):
-                return True
-        return False
+        return self.domain_rules.match(domain).action == "block"
 
     def get_title(self, url):
         """
         Dispatches URL to service-specific handlers, or falls back to generic.
         Skips known services (like X and Reddit) where scraping is unreliable or blocked.
-        Also skips any URL whose domain is in the blacklist.
+        Which is which comes from the domain rules (see RULES_FILE).
         """
-        domain = urlparse(url).netloc.lower()
+        self.domain_rules.reload_if_changed()
+        rule = self.domain_rules.match(urlparse(url).hostname or "")
 
-        # Check blacklist first
-        if self.is_blacklisted(domain):
+        if rule.action == "shortener":
+            # Decide on the link's real destination, e.g. skip a t.co link to x.com
+            try:
+                url = self.resolve_short_url(url)
+            except HostUnavailable as e:
+                logger.info("Skipping %s: %s", url, e)
+                self.outcomes["skipped"] += 1
+                return None
+            except requests.exceptions.RequestException:
+                self.outcomes["error"] += 1
+                return "Error: Could not resolve the short link."
+            rule = self.domain_rules.match(urlparse(url).hostname or "")
+
+        if rule.action == "block":
+            self.outcomes["blocked"] += 1
             return None  # Silently skip blacklisted domains
 
+        key = self.cache_key(url, rule)
+        cached = self.title_cache.get(key)
+        if cached is not None:
+            self.outcomes["cached"] += 1
+            return cached or None  # "" stands for "page has no title"
+
+        timeout = rule.timeout or self.FETCH_TIMEOUT
         try:
-            if "youtube.com" in domain or "youtu.be" in domain:
-                return self.get_youtube_info(url)
-            elif "instagram.com" in domain:
-                return self.get_instagram_title(url)
+            if rule.action == "youtube":
+                title = self.get_youtube_info(url, timeout=timeout)
+            elif rule.action == "instagram":
+                title = self.get_instagram_title(url, timeout=timeout)
             else:
-                return self.get_generic_title(url)
+                title = self.get_generic_title(url, timeout=timeout)
+        except HostUnavailable as e:
+            logger.info("Skipping %s: %s", url, e)
+            self.outcomes["skipped"] += 1
+            return None  # Not cached: the host may be fine again in a moment
         except Exception as e:
-            return f"Error fetching title: {e}"
+            title = f"Error fetching title: {e}"
 
-    def get_generic_title(self, url):
+        failed = bool(title) and title.startswith("Error")
+        self.outcomes["error" if failed else "title" if title else "no_title"] += 1
+        ttl = self.ERROR_TTL if failed else self.TITLE_TTL
+        self.title_cache.set(key, title or "", ttl)
+        return title
+
+    def resolve_short_url(self, url):
         """
-        Fetches a title from a regular webpage.
-        Tries Open Graph <meta property="og:title"> first, falls back to <title>.
-        Ensures encoding is properly handled.
+        Follows a shortener's redirects with HEAD requests, without downloading
+        anything, until the link leads off shortener domains (or MAX_REDIRECTS).
+        Resolved chains are cached for REDIRECT_TTL, so a repeat paste costs no
+        round trips at all. Raises requests exceptions / HostUnavailable on failure.
         """
-        try:
-            response = self.session.get(url, timeout=5)
-            response.raise_for_status()
+        key = self.normalize_url(url)
+        final_url = self.redirect_cache.get(key)
+        if final_url is not None:
+            return final_url
 
-            response.encoding = response.apparent_encoding
-            soup = BeautifulSoup(response.text, "html.parser")
+        final_url = url
+        for _ in range(self.MAX_REDIRECTS):
+            host = urlparse(final_url).hostname or ""
+            rule = self.domain_rules.match(host)
+            if rule.action != "shortener":
+                break
+            with self.host_limiter.limit(host) as slot:
+                response = self.session.head(
+                    final_url, headers=self.HEADERS, timeout=rule.timeout or self.FETCH_TIMEOUT,
+                    allow_redirects=False, upstream=self.UPSTREAM,
+                )
+                slot.record(response.status_code)
+                response.close()
+            location = response.headers.get("Location")
+            if response.status_code not in self.REDIRECT_STATUSES or not location:
+                break
+            final_url = urljoin(final_url, location)
 
-            og_title = soup.find("meta", property="og:title")
-            if og_title and og_title.get("content"):
-                return og_title["content"].strip()
+        self.redirect_cache.set(key, final_url, self.REDIRECT_TTL)
+        return final_url
 
-            if soup.title and soup.title.string:
-                return soup.title.string.strip()
+    def cache_key(self, url, rule):
+        """
+        Key for the title cache. Links that point to the same thing map to
+        the same key: YouTube links by video ID, everything else by the URL
+        with a lowercased scheme/host and without fragment or tracking parameters.
+        """
+        video_id = self.youtube_video_id(url) if rule.action == "youtube" else None
+        if video_id:
+            return ("youtube", video_id)
+        return ("url", self.normalize_url(url))
 
-            return None  # No usable title found
+    def normalize_url(self, url):
+        """E.g. HTTPS://Example.com/a?utm_source=x&id=1#top -> https://example.com/a?id=1"""
+        parts = urlsplit(url)
+        query = [
+            (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if name.lower() not in self.TRACKING_PARAMS
+            and not name.lower().startswith(self.TRACKING_PARAM_PREFIXES)
+        ]
+        return urlunsplit((
+            parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(query), ""
+        ))
 
+    def get_generic_title(self, url, timeout=None):
+        """
+        Fetches a title from a regular webpage.
+        Tries Open Graph <meta property="og:title"> first, falls back to <title>.
+        The body is streamed and parsed incrementally: reading stops as soon as
+        the title is known or the <head> ends, and never goes past MAX_HTML_BYTES.
+        Encoding comes from the Content-Type header, then <meta charset>, then detection.
+        Non-HTML resources are summarized from their headers, without reading the body.
+        """
+        try:
+            with self.host_limiter.limit(urlparse(url).hostname or "") as slot:
+                response = self.session.get(
+                    url, headers=self.HEADERS, timeout=timeout or self.FETCH_TIMEOUT, stream=True,
+                    upstream=self.UPSTREAM,
+                )
+                slot.record(response.status_code)
+                try:
+                    response.raise_for_status()
+                    content_type = response.headers.get("Content-Type")
+                    if not self.is_html(content_type):
+                        return self.describe_resource(content_type, response.headers.get("Content-Length"))
+                    charset = charset_from_content_type(content_type)
+                    chunks = response.iter_content(chunk_size=self.CHUNK_SIZE)
+                    if self.parse_pool is not None:
+                        head = read_head(chunks, max_bytes=self.MAX_HTML_BYTES)
+                        return self.parse_pool.extract_title(head, header_charset=charset)
+                    return extract_title(
+                        chunks, header_charset=charset, max_bytes=self.MAX_HTML_BYTES,
+                    )  # None if no usable title found
+                finally:
+                    response.close()  # Hand the connection back without reading the rest
+
+        except HostUnavailable:
+            raise
         except requests.exceptions.Timeout:
             return "Error: The request timed out."
         except requests.exceptions.ConnectionError:
@@ -120,37 +345,58 @@ class URLFetcher:
         except Exception:
             return "Error: Unexpected error while fetching the title."
 
-    def get_youtube_info(self, url):
+    def is_html(self, content_type):
+        """
+        True if the Content-Type looks like a web page.
+        A missing header is given the benefit of the doubt.
+        """
+        if not content_type:
+            return True
+        return content_type.split(";", 1)[0].strip().lower() in self.HTML_CONTENT_TYPES
+
+    def describe_resource(self, content_type, content_length=None):
         """
-        Handles both regular YouTube and Shorts URLs.
-        Uses YouTube's oEmbed API to fetch video title and author safely.
+        Compact summary for a link that isn't a web page, e.g. "[application/pdf, 2.4 MB]".
+        The size is left out if the server didn't send a usable Content-Length.
         """
+        mime = content_type.split(";", 1)[0].strip().lower()
         try:
-            video_id = None
-            parsed_url = urlparse(url)
-
-            if "youtube.com" in parsed_url.netloc:
-                if "/shorts/" in parsed_url.path:
-                    video_id = parsed_url.path.split("/shorts/")[1]
-                else:
-                    query = parse_qs(parsed_url.query)
-                    video_id = query.get("v", [None])[0]
-            elif "youtu.be" in parsed_url.netloc:
-                video_id = parsed_url.path.lstrip('/')
+            size = int(content_length)
+        except (TypeError, ValueError):
+            size = None
+        if size is None or size < 0:
+            return f"[{mime}]"
+        return f"[{mime}, {self.format_size(size)}]"
+
+    @staticmethod
+    def format_size(size):
+        """Human-readable byte count: 512 B, 3.4 kB, 2.1 MB, 1.5 GB..."""
+        if size < 1000:
+            return f"{size} B"
+        for unit in ("kB", "MB", "GB", "TB"):
+            size /= 1000
+            if size < 1000 or unit == "TB":
+                return f"{size:.1f} {unit}"
 
+    def get_youtube_info(self, url, timeout=None):
+        """
+        Handles all YouTube link forms (watch, Shorts, live, embed, youtu.be, m./music.).
+        Uses YouTube's oEmbed API to fetch video title and author safely;
+        answers are cached by video ID for a long time, across restarts too.
+        """
+        try:
+            video_id = self.youtube_video_id(url)
             if not video_id:
                 return "Error: Invalid YouTube URL."
 
-            api_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-            response = self.session.get(api_url, timeout=5)
-            response.raise_for_status()
-            data = response.json()
-
-            return f"YouTube: {data['title']} (by {data['author_name']})"
+            title, author = self.youtube.get_info(video_id, timeout=timeout or self.FETCH_TIMEOUT)
+            return f"YouTube: {title} (by {author})"
 
+        except HostUnavailable:
+            raise
         except requests.exceptions.HTTPError as e:
             return f"Error: HTTP {e.response.status_code} while retrieving YouTube details."
-        except requests.exceptions.Timeout:
+        except (requests.exceptions.Timeout, SingleFlightTimeout):
             return "Error: YouTube request timed out."
         except requests.exceptions.ConnectionError:
             return "Error: Could not connect to YouTube."
@@ -159,12 +405,16 @@ class URLFetcher:
         except Exception:
             return "Error: Unexpected issue while fetching YouTube info."
 
-    def get_instagram_title(self, url):
+    def youtube_video_id(self, url):
+        """Returns the video ID of a YouTube link, else None."""
+        return extract_video_id(url)
+
+    def get_instagram_title(self, url, timeout=None):
         """
         Instagram often blocks scraping.
         Fall back to generic title method, which may return a basic page title.
         """
-        return self.get_generic_title(url)
+        return self.get_generic_title(url, timeout=timeout)
 
     def get_x_title(self, url):
         """Fallback for X (Twitter). Currently unused due to unreliable access."""
@@ -174,11 +424,12 @@ class URLFetcher:
         """Fallback for Reddit. Currently unused due to inconsistent structure."""
         return self.get_generic_title(url)
 
-    def trim_message(self, text):
+    def trim_message(self, text, max_length=None):
         """
         Trims message length to avoid flooding the IRC server.
-        Adds ellipsis if trimmed.
+        Adds ellipsis if trimmed. `max_length` defaults to MAX_TITLE_LENGTH.
         """
-        if len(text) <= self.MAX_TITLE_LENGTH:
+        max_length = max_length or self.MAX_TITLE_LENGTH
+        if len(text) <= max_length:
             return text
-        return text[:self.MAX_TITLE_LENGTH - 3].rstrip() + "..."
+        return text[:max_length - 3].rstrip() + "..."
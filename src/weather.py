@@ -2,6 +2,8 @@ import os
 from dotenv import load_dotenv
 import requests
 
+from http_client import get_http_client
+
 class WeatherCommand:
     """Fetches current weather for a given city."""
 
@@ -9,6 +11,7 @@ class WeatherCommand:
         load_dotenv()  # Load environment variables from .env
         self.api_key = os.getenv("WEATHER_API_KEY")
         self.base_url = "http://api.weatherapi.com/v1/current.json"
+        self.session = get_http_client()
 
         if not self.api_key:
             raise ValueError("Error: WEATHER_API_KEY is missing. Set it in the .env file.")
@@ -27,7 +30,7 @@ class WeatherCommand:
             query = f"{city},{country}" if country else city
             params = {"key": self.api_key, "q": query, "aqi": "no"}
 
-            response = requests.get(self.base_url, params=params, timeout=5)
+            response = self.session.get(self.base_url, params=params, timeout=5)
             response.raise_for_status()  # Raises error for HTTP 4xx and 5xx responses
             data = response.json()
 
@@ -0,0 +1,281 @@
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class ReplyCollector:
+    """
+    Stands in for the IrcBot while a pooled job runs, so replies can be
+    released in the order the triggering messages arrived in each channel.
+
+    While an earlier job in the same channel is still running, send_message()
+    calls are buffered; once this job is at the head of its channel they go
+    straight through. Everything else is proxied to the real bot, so commands
+    that keep a reference for later (LiigaCommand's poller) keep working
+    after the job has finished.
+    """
+
+    WAITING = "waiting"      # an earlier job in the channel is still running
+    HEAD = "head"            # oldest unfinished job in the channel: send directly
+    DONE = "done"            # finished, but an earlier job is still running
+    RELEASED = "released"    # out of the ordering entirely: send directly
+    TIMED_OUT = "timed_out"  # gave up on it: drop replies until it returns
+
+    def __init__(self, pool, bot, channel):
+        self._pool = pool
+        self._bot = bot
+        self._channel = channel
+        self._state = self.WAITING
+        self._buffer = []
+
+    def send_message(self, channel, message):
+        with self._pool._order_lock:
+            if self._state in (self.HEAD, self.RELEASED):
+                self._bot.send_message(channel, message)
+            elif self._state == self.TIMED_OUT:
+                logger.info("Dropping late reply to %s from a timed-out job", channel)
+            else:
+                self._buffer.append((channel, message))
+
+    def __getattr__(self, name):
+        return getattr(self._bot, name)
+
+
+class _Job:
+    __slots__ = ("kind", "channel", "func", "timeout", "collector", "future", "enqueued_at")
+
+    def __init__(self, kind, channel, func, timeout, collector, enqueued_at):
+        self.kind = kind
+        self.channel = channel
+        self.func = func
+        self.timeout = timeout
+        self.collector = collector
+        self.future = Future()
+        self.enqueued_at = enqueued_at
+
+
+class WorkerPool:
+    """
+    Bounded thread pool for command and URL jobs, keeping slow upstreams off
+    the IRC read loop (which must stay free to answer PINGs - those are
+    handled inline by the bot and never enter this pool).
+
+    - `workers` threads pull jobs from a backlog of at most `max_backlog`.
+    - When the backlog is full, the oldest queued URL lookup is shed first,
+      then the oldest queued command.
+    - Each job can have a timeout; a job that overruns is abandoned (its
+      thread can't be killed, but its replies are dropped) so it doesn't
+      hold up later replies in the same channel.
+    - Replies are released per channel in the order the jobs were submitted.
+    """
+
+    WORKERS = 4
+    MAX_BACKLOG = 50
+    SHED_ORDER = ("url", "command")
+
+    def __init__(self, bot, workers=None, max_backlog=None, clock=time.monotonic):
+        self.bot = bot
+        self.workers = workers or self.WORKERS
+        self.max_backlog = max_backlog or self.MAX_BACKLOG
+        self.clock = clock
+
+        self._cond = threading.Condition()
+        self._backlog = deque()
+        self._deadlines = []  # heap of (deadline, seq, job) for running jobs
+        self._deadline_seq = 0
+        self._threads = []
+        self._running = False
+
+        self._order_lock = threading.Lock()
+        self._channel_order = {}  # channel -> deque of ReplyCollector
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.shed = {kind: 0 for kind in self.SHED_ORDER}
+        self.max_backlog_seen = 0
+
+    # ---- lifecycle --------------------------------------------------------
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        reaper = threading.Thread(target=self._reaper, name="worker-reaper", daemon=True)
+        reaper.start()
+        self._threads.append(reaper)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._threads = []
+
+    # ---- submission -------------------------------------------------------
+
+    def submit(self, channel, kind, func, timeout=None):
+        """
+        Queue `func(collector)` to run on a worker. `func` should send its
+        replies through the collector it's given (it behaves like the bot).
+
+        Returns a Future for the job, or None if the job itself was shed.
+        """
+        collector = ReplyCollector(self, self.bot, channel)
+        job = _Job(kind, channel, func, timeout, collector, self.clock())
+
+        with self._cond:
+            if len(self._backlog) >= self.max_backlog and not self._shed_one(kind):
+                self.shed[kind] = self.shed.get(kind, 0) + 1
+                logger.warning("Worker backlog full, dropping %s job for %s", kind, channel)
+                return None
+            self._enqueue_order(collector)
+            self._backlog.append(job)
+            self.submitted += 1
+            if len(self._backlog) > self.max_backlog_seen:
+                self.max_backlog_seen = len(self._backlog)
+            self._cond.notify_all()
+        return job.future
+
+    def _shed_one(self, incoming_kind):
+        """Drop the oldest queued job of the most expendable kind. Never
+        sheds a queued job that's more important than the incoming one."""
+        for kind in self.SHED_ORDER:
+            for job in self._backlog:
+                if job.kind == kind:
+                    self._backlog.remove(job)
+                    self.shed[kind] = self.shed.get(kind, 0) + 1
+                    logger.warning("Worker backlog full, shedding oldest %s job for %s", kind, job.channel)
+                    job.future.cancel()
+                    self._release(job.collector, ReplyCollector.RELEASED)
+                    return True
+            if kind == incoming_kind:
+                return False
+        return False
+
+    # ---- workers ----------------------------------------------------------
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and not self._backlog:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                job = self._backlog.popleft()
+                if job.timeout:
+                    self._deadline_seq += 1
+                    heapq.heappush(
+                        self._deadlines, (self.clock() + job.timeout, self._deadline_seq, job)
+                    )
+                    self._cond.notify_all()
+
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = job.func(job.collector)
+            except Exception as e:
+                self.errors += 1
+                logger.error("Error in %s job for %s: %s", job.kind, job.channel, e,
+                             extra={"channel": job.channel, "kind": job.kind})
+                self._release(job.collector, ReplyCollector.RELEASED)
+                job.future.set_exception(e)
+            else:
+                self.completed += 1
+                self._release(job.collector, ReplyCollector.RELEASED)
+                job.future.set_result(result)
+
+    def _reaper(self):
+        """Abandons jobs that overrun their timeout."""
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                now = self.clock()
+                expired = []
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    expired.append(heapq.heappop(self._deadlines)[2])
+                wait = self._deadlines[0][0] - now if self._deadlines else None
+                if not expired:
+                    self._cond.wait(wait)
+                    continue
+
+            for job in expired:
+                if not job.future.done():
+                    self.timeouts += 1
+                    logger.warning("%s job for %s timed out after %ss", job.kind, job.channel, job.timeout,
+                                   extra={"channel": job.channel, "kind": job.kind})
+                    self._release(job.collector, ReplyCollector.TIMED_OUT)
+
+    # ---- per-channel reply ordering ---------------------------------------
+
+    def _enqueue_order(self, collector):
+        with self._order_lock:
+            order = self._channel_order.setdefault(collector._channel, deque())
+            order.append(collector)
+            if len(order) == 1:
+                collector._state = ReplyCollector.HEAD
+
+    def _release(self, collector, final_state):
+        """Mark a job finished (or abandoned) and flush any later jobs in its
+        channel that were only waiting for it."""
+        with self._order_lock:
+            if collector._state == ReplyCollector.TIMED_OUT:
+                # The job came back after we gave up on it; anything it sends
+                # from now on (e.g. a poller thread) goes straight through.
+                collector._state = ReplyCollector.RELEASED
+                return
+            if collector._state == ReplyCollector.RELEASED:
+                return
+
+            order = self._channel_order.get(collector._channel)
+            if final_state == ReplyCollector.TIMED_OUT or collector._state == ReplyCollector.HEAD:
+                collector._state = final_state
+                if order and collector in order:
+                    order.remove(collector)
+            else:
+                collector._state = ReplyCollector.DONE
+                return
+
+            # Promote the next jobs: flush those already done, stop at the
+            # first one still running and make it the new head.
+            while order:
+                head = order[0]
+                for channel, message in head._buffer:
+                    self.bot.send_message(channel, message)
+                head._buffer = []
+                if head._state == ReplyCollector.DONE:
+                    head._state = ReplyCollector.RELEASED
+                    order.popleft()
+                    continue
+                head._state = ReplyCollector.HEAD
+                break
+            if not order:
+                self._channel_order.pop(collector._channel, None)
+
+    # ---- metrics ----------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._cond:
+            backlog = len(self._backlog)
+        return {
+            "workers": self.workers,
+            "backlog": backlog,
+            "max_backlog_seen": self.max_backlog_seen,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "shed": dict(self.shed),
+        }
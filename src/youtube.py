@@ -0,0 +1,151 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+from host_limiter import HostLimiter
+from singleflight import SingleFlight
+
+_VIDEO_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+# youtube.com/<prefix>/<id>
+_PATH_PREFIXES = {"shorts", "live", "embed", "v", "e"}
+
+
+def extract_video_id(url):
+    """
+    Returns the video ID of a YouTube link, else None. Understands
+    watch?v=, /shorts/, /live/, /embed/ and /v/ links on any youtube.com
+    host (www., m., music.), youtube-nocookie.com embeds and youtu.be.
+    """
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    parts = [p for p in parsed.path.split("/") if p]
+
+    if host == "youtu.be" or host.endswith(".youtu.be"):
+        video_id = parts[0] if parts else None
+    elif len(parts) >= 2 and parts[0] in _PATH_PREFIXES:
+        video_id = parts[1]
+    else:
+        video_id = parse_qs(parsed.query).get("v", [None])[0]
+
+    if video_id and _VIDEO_ID.match(video_id):
+        return video_id
+    return None
+
+
+class VideoInfoCache:
+    """
+    video ID -> (title, author), for CACHE_TTL. The most recently used
+    MEMORY_SIZE entries are kept in memory; with a `path` everything is
+    also stored in SQLite, so the cache survives restarts.
+    """
+
+    CACHE_TTL = 30 * 86400  # Titles of published videos rarely change
+    MEMORY_SIZE = 2048
+
+    def __init__(self, path=None, ttl=None, memory_size=None, clock=time.time):
+        self.path = path
+        self.ttl = ttl or self.CACHE_TTL
+        self.memory_size = memory_size or self.MEMORY_SIZE
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # video_id -> (title, author, fetched_at)
+        self._db = None  # Opened on first use
+
+    def _connect(self):
+        if self._db is None and self.path:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS youtube_videos ("
+                " video_id TEXT PRIMARY KEY, title TEXT NOT NULL, author TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, video_id):
+        now = self.clock()
+        with self._lock:
+            entry = self._memory.get(video_id)
+            if entry is None:
+                db = self._connect()
+                if db is not None:
+                    entry = db.execute(
+                        "SELECT title, author, fetched_at FROM youtube_videos WHERE video_id = ?",
+                        (video_id,),
+                    ).fetchone()
+            if entry is None or now - entry[2] >= self.ttl:
+                return None
+            self._remember(video_id, tuple(entry))
+            return entry[0], entry[1]
+
+    def set(self, video_id, title, author):
+        entry = (title, author, self.clock())
+        with self._lock:
+            self._remember(video_id, entry)
+            db = self._connect()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO youtube_videos (video_id, title, author, fetched_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (video_id, *entry),
+                )
+                db.commit()
+
+    def _remember(self, video_id, entry):
+        self._memory[video_id] = entry
+        self._memory.move_to_end(video_id)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            db, self._db = self._db, None
+        if db is not None:
+            db.close()
+
+
+class YouTubeClient:
+    """
+    Video title/author lookups through YouTube's oEmbed endpoint, with a
+    long-lived VideoInfoCache in front. Concurrent lookups of the same video
+    share one request, and oEmbed gets its own limiter so a message full of
+    music links is fetched side by side rather than paced like a web page.
+    """
+
+    OEMBED_URL = "https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
+    MAX_CONCURRENT = 5
+
+    def __init__(self, session, cache_path=None, headers=None):
+        self.session = session
+        self.headers = headers
+        self.cache = VideoInfoCache(path=cache_path)
+        self.single_flight = SingleFlight()
+        self.limiter = HostLimiter(max_concurrent=self.MAX_CONCURRENT, min_interval=0)
+
+    def get_info(self, video_id, timeout=None):
+        """
+        Returns (title, author) for `video_id`. Raises the usual requests
+        exceptions (or HostUnavailable) if it isn't cached and can't be fetched,
+        or SingleFlightTimeout if a lookup of the same video already running
+        doesn't finish within `timeout`.
+        """
+        info = self.cache.get(video_id)
+        if info is not None:
+            return info
+        return self.single_flight.do(video_id, lambda: self._fetch(video_id, timeout), timeout=timeout)
+
+    def _fetch(self, video_id, timeout):
+        api_url = self.OEMBED_URL.format(video_id=video_id)
+        with self.limiter.limit("www.youtube.com") as slot:
+            response = self.session.get(api_url, headers=self.headers, timeout=timeout)
+            slot.record(response.status_code)
+        response.raise_for_status()
+        data = response.json()
+        self.cache.set(video_id, data["title"], data["author_name"])
+        return data["title"], data["author_name"]
+
+    def close(self):
+        self.cache.close()
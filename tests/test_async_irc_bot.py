@@ -0,0 +1,164 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from async_irc_bot import AsyncIrcBot
+
+
+@pytest.fixture
+def make_bot():
+    def factory(port):
+        bot = AsyncIrcBot(server="127.0.0.1", port=port, channels=["#chan"])
+        bot.url_fetcher = MagicMock()
+        return bot
+
+    return factory
+
+
+async def read_line(reader):
+    line = await asyncio.wait_for(reader.readline(), timeout=2)
+    return line.decode().rstrip("\r\n")
+
+
+def run_with_server(make_bot, script):
+    """Start a throwaway local server running `script(reader, writer, bot)`
+    and run an AsyncIrcBot against it until the server hangs up."""
+    async def main():
+        holder = {}
+
+        async def handle(reader, writer):
+            try:
+                await script(reader, writer, holder["bot"])
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        holder["bot"] = bot = make_bot(port)
+        bot.running = True  # As run_forever() would
+        async with server:
+            try:
+                await asyncio.wait_for(bot.run(), timeout=5)
+            finally:
+                bot.send_queue.close(timeout=0)
+                bot.worker_pool.stop()
+        return bot
+
+    return asyncio.run(main())
+
+
+class TestAsyncIrcBot:
+    def test_registers_and_joins_only_after_welcome(self, make_bot):
+        seen = []
+
+        async def script(reader, writer, bot):
+            seen.append(await read_line(reader))
+            seen.append(await read_line(reader))
+            # Nothing else should be sent before the welcome.
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(reader.readline(), timeout=0.2)
+            writer.write(b":srv 001 KukistiBot :Welcome\r\n")
+            seen.append(await read_line(reader))
+
+        run_with_server(make_bot, script)
+        assert seen == ["NICK KukistiBot", "USER KukistiBot 0 * :KukistiBot", "JOIN #chan"]
+
+    def test_ping_is_answered(self, make_bot):
+        seen = []
+
+        async def script(reader, writer, bot):
+            await read_line(reader)
+            await read_line(reader)
+            writer.write(b"PING :srv.example\r\n")
+            seen.append(await read_line(reader))
+
+        run_with_server(make_bot, script)
+        assert seen == ["PONG :srv.example"]
+
+    def test_commands_run_on_executor_and_reply_from_worker_thread(self, make_bot):
+        seen = []
+
+        async def script(reader, writer, bot):
+            bot.command_handler = MagicMock()
+            bot.command_handler.timeout_for.return_value = 5
+            bot.command_handler.handle_command.side_effect = (
+                lambda irc_bot, nick, channel, msg, **kwargs: irc_bot.send_message(channel, f"hi {nick}")
+            )
+            await read_line(reader)
+            await read_line(reader)
+            writer.write(b":nick!u@h PRIVMSG #chan :!hello\r\n")
+            seen.append(await read_line(reader))
+
+        bot = run_with_server(make_bot, script)
+        assert seen == ["PRIVMSG #chan :hi nick"]
+        bot.command_handler.handle_command.assert_called_once()
+
+    def test_split_line_across_packets(self, make_bot):
+        seen = []
+
+        async def script(reader, writer, bot):
+            await read_line(reader)
+            await read_line(reader)
+            writer.write(b"PI")
+            await writer.drain()
+            await asyncio.sleep(0.05)
+            writer.write(b"NG :abc\r\n")
+            seen.append(await read_line(reader))
+
+        run_with_server(make_bot, script)
+        assert seen == ["PONG :abc"]
+
+    def test_disconnect_does_not_wait_for_hung_jobs(self, make_bot):
+        release = threading.Event()
+
+        async def script(reader, writer, bot):
+            bot.command_handler = MagicMock()
+            bot.command_handler.timeout_for.return_value = 0.1
+            bot.command_handler.handle_command.side_effect = lambda *args, **kwargs: release.wait(5)
+            await read_line(reader)
+            await read_line(reader)
+            writer.write(b":nick!u@h PRIVMSG #chan :!stuck\r\n")
+            await writer.drain()
+            await asyncio.sleep(0.1)  # The job is running; now hang up
+
+        try:
+            bot = run_with_server(make_bot, script)  # run() would time out if it waited
+            bot.command_handler.handle_command.assert_called_once()
+        finally:
+            release.set()
+
+    def test_supervisor_survives_unexpected_errors(self, make_bot, monkeypatch):
+        bot = make_bot(1)
+        bot.backoff.next_delay = lambda: 0
+        attempts = []
+
+        async def run():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ValueError("boom")
+            bot.running = False
+
+        monkeypatch.setattr(bot, "run", run)
+        asyncio.run(asyncio.wait_for(bot.run_forever(), timeout=5))
+        assert len(attempts) == 2
+
+    def test_stop_closes_the_url_fetcher(self, make_bot):
+        bot = make_bot(1)
+        bot.stop()
+        bot.url_fetcher.close.assert_called_once()
+
+    def test_stop_during_connect_is_not_undone(self, make_bot):
+        async def main():
+            server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+            bot = make_bot(server.sockets[0].getsockname()[1])
+            bot.running = False  # stop() ran before the connection came up
+            async with server:
+                await asyncio.wait_for(bot.run(), timeout=2)
+            return bot
+
+        bot = asyncio.run(main())
+        assert bot.running is False
+        assert bot.writer.is_closing()
+        assert bot.send_queue.stats()["sent"] == 0
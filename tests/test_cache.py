@@ -0,0 +1,64 @@
+from cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    def test_fresh_entry_is_a_hit(self):
+        cache = TTLCache(clock=FakeClock())
+        cache.set("k", "v", ttl=10)
+        assert cache.get("k") == "v"
+        assert cache.lookup("k") == ("v", False)
+        assert cache.stats()["hits"] == 2
+
+    def test_expired_entry_is_a_miss(self):
+        clock = FakeClock()
+        cache = TTLCache(clock=clock)
+        cache.set("k", "v", ttl=10)
+        clock.now += 10
+        assert cache.get("k") is None
+        assert cache.stats()["misses"] == 1
+        assert len(cache) == 0
+
+    def test_stale_window_serves_stale_value(self):
+        clock = FakeClock()
+        cache = TTLCache(clock=clock)
+        cache.set("k", "v", ttl=10, stale_ttl=5)
+        clock.now += 12
+        assert cache.lookup("k") == ("v", True)
+        assert cache.get("k") is None  # get() only returns fresh values
+        clock.now += 5
+        assert cache.lookup("k") is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache(maxsize=2, clock=FakeClock())
+        cache.set("a", 1, ttl=10)
+        cache.set("b", 2, ttl=10)
+        cache.get("a")  # a is now more recently used than b
+        cache.set("c", 3, ttl=10)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_hit_rate(self):
+        cache = TTLCache(clock=FakeClock())
+        cache.set("a", 1, ttl=10)
+        cache.get("a")
+        cache.get("missing")
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_delete_and_clear(self):
+        cache = TTLCache(clock=FakeClock())
+        cache.set("a", 1, ttl=10)
+        cache.set("b", 2, ttl=10)
+        cache.delete("a")
+        assert cache.get("a") is None
+        cache.clear()
+        assert len(cache) == 0
@@ -1,3 +1,5 @@
+import threading
+import time
 from unittest.mock import MagicMock
 
 import pytest
@@ -5,27 +7,25 @@ import pytest
 # Bare import to match command_handler.py's own sibling-import style (see
 # tests/conftest.py for the sys.path setup that makes this resolve).
 from command_handler import CommandHandler
+from command_registry import CommandSpec, LazyCommand
+from metrics import Metrics
 
 
 @pytest.fixture
 def handler(monkeypatch):
-    # WeatherCommand.__init__ raises if WEATHER_API_KEY is unset; the other
-    # command constructors don't make network calls, so a real
-    # CommandHandler can be built safely as long as this is set.
+    # Commands are only created on first use, but a test that does load
+    # WeatherCommand needs the key (its __init__ raises without it).
     monkeypatch.setenv("WEATHER_API_KEY", "test-key")
     return CommandHandler()
 
 
 def replace_command(handler, alias, mock_command):
     """Swap the real command object registered for `alias` with a mock,
-    keeping its original allow_args setting."""
-    for cmd_obj, cmd_data in list(handler.command_aliases.items()):
-        if alias in cmd_data["aliases"]:
-            cmd_data_copy = dict(cmd_data)
-            del handler.command_aliases[cmd_obj]
-            handler.command_aliases[mock_command] = cmd_data_copy
-            return
-    raise AssertionError(f"No command registered for alias {alias}")
+    keeping its original settings (allow_args, caching...)."""
+    try:
+        handler.registry.replace(alias, mock_command)
+    except KeyError:
+        raise AssertionError(f"No command registered for alias {alias}")
 
 
 class TestCommandHandler:
@@ -105,3 +105,288 @@ class TestCommandHandler:
         handler.handle_command(bot, "nick", "#chan", "!weather austin")
 
         bot.send_message.assert_not_called()
+
+    def test_timeout_for_uses_per_command_override(self, handler):
+        assert handler.timeout_for("!stock TSLA") == 20
+        assert handler.timeout_for("!weather austin") == CommandHandler.DEFAULT_TIMEOUT
+        assert handler.timeout_for("!nonsense") == CommandHandler.DEFAULT_TIMEOUT
+
+    def test_resume_calls_stateful_commands_and_survives_errors(self, handler):
+        bot = MagicMock()
+        failing = MagicMock()
+        failing.resume.side_effect = RuntimeError("boom")
+        resumable = MagicMock()
+        replace_command(handler, "!f1", failing)
+        replace_command(handler, "!liiga", resumable)
+
+        handler.resume(bot)
+
+        resumable.resume.assert_called_once_with(bot)
+
+    def test_needs_context_command_gets_bot_and_channel(self, handler):
+        bot = MagicMock()
+        mock_liiga = MagicMock()
+        mock_liiga.execute.return_value = "tracking"
+        replace_command(handler, "!liiga", mock_liiga)
+
+        handler.handle_command(bot, "nick", "#chan", "!liiga start")
+
+        mock_liiga.execute.assert_called_once_with("start", irc_bot=bot, channel="#chan")
+
+    def test_cooldown_is_per_channel(self):
+        now = [0.0]
+        handler = CommandHandler(clock=lambda: now[0])
+        mock_dice = MagicMock()
+        mock_dice.execute.return_value = "4"
+        handler.registry.register(CommandSpec(["!dice"], mock_dice, cooldown=30))
+        bot = MagicMock()
+
+        handler.handle_command(bot, "a", "#chan", "!dice")
+        handler.handle_command(bot, "b", "#chan", "!dice")  # On cooldown
+        handler.handle_command(bot, "b", "#other", "!dice")
+        now[0] += 30
+        handler.handle_command(bot, "c", "#chan", "!dice")
+
+        assert [c.args[0] for c in bot.send_message.call_args_list] == ["#chan", "#other", "#chan"]
+
+
+class TestLazyLoading:
+    def test_commands_are_not_loaded_until_used(self, handler):
+        lazy = [spec.command for spec in handler.registry if isinstance(spec.command, LazyCommand)]
+        assert len(lazy) > 0
+        assert not any(command.loaded for command in lazy)
+
+    def test_first_use_loads_the_command(self, handler):
+        bot = MagicMock()
+        handler.handle_command(bot, "nick", "#chan", "!time utc")
+        loaded = [spec.command.class_name for spec in handler.registry
+                  if isinstance(spec.command, LazyCommand) and spec.command.loaded]
+        assert loaded == ["TimeCommand"]
+        assert bot.send_message.call_args.args[1].startswith("Local time in UTC")
+
+    def test_command_that_fails_to_load_answers_with_error(self, handler):
+        bot = MagicMock()
+        handler.registry.register(CommandSpec(["!broken"], LazyCommand("no_such_module", "BrokenCommand")))
+
+        handler.handle_command(bot, "nick", "#chan", "!broken now")
+
+        bot.send_message.assert_called_once_with("#chan", "Error: BrokenCommand is unavailable right now.")
+
+    def test_missing_weather_key_does_not_block_startup(self, monkeypatch):
+        import weather
+        monkeypatch.setattr(weather, "load_dotenv", lambda: None)  # Ignore any local .env
+        monkeypatch.delenv("WEATHER_API_KEY", raising=False)
+        handler = CommandHandler()
+        bot = MagicMock()
+
+        handler.handle_command(bot, "nick", "#chan", "!weather helsinki")
+
+        bot.send_message.assert_called_once_with("#chan", "Error: WeatherCommand is unavailable right now.")
+
+    def test_unloaded_command_is_not_resumed(self):
+        command = LazyCommand("liiga_command", "LiigaCommand")
+        command.resume(MagicMock())
+        assert not command.loaded
+
+
+class TestResponseCache:
+    def test_repeat_query_is_served_from_cache(self, handler):
+        bot = MagicMock()
+        mock_weather = MagicMock()
+        mock_weather.execute.return_value = "sunny"
+        replace_command(handler, "!weather", mock_weather)
+
+        handler.handle_command(bot, "a", "#chan", "!weather Helsinki")
+        handler.handle_command(bot, "b", "#other", "!w  helsinki")
+
+        mock_weather.execute.assert_called_once_with("Helsinki")
+        assert bot.send_message.call_count == 2
+        bot.send_message.assert_called_with("#other", "sunny")
+
+    def test_cache_key_normalizes_case_whitespace_and_commas(self):
+        spec = CommandSpec(["!weather", "!w"], None)
+        assert CommandHandler.cache_key(spec, " Austin ,  US ") == ("!weather", "austin,us")
+
+    def test_errors_are_not_cached(self, handler):
+        bot = MagicMock()
+        mock_crypto = MagicMock()
+        mock_crypto.execute.return_value = "Error: Request to CoinGecko timed out."
+        replace_command(handler, "!crypto", mock_crypto)
+
+        handler.handle_command(bot, "a", "#chan", "!crypto bitcoin")
+        handler.handle_command(bot, "a", "#chan", "!crypto bitcoin")
+
+        assert mock_crypto.execute.call_count == 2
+
+    def test_uncached_commands_always_execute(self, handler):
+        bot = MagicMock()
+        mock_time = MagicMock()
+        mock_time.execute.return_value = "Local time in X"
+        replace_command(handler, "!time", mock_time)
+
+        handler.handle_command(bot, "a", "#chan", "!time cdt")
+        handler.handle_command(bot, "a", "#chan", "!time cdt")
+
+        assert mock_time.execute.call_count == 2
+
+    def test_stale_response_is_served_and_refreshed_in_background(self, handler):
+        bot = MagicMock()
+        refreshed = threading.Event()
+        mock_f1 = MagicMock()
+        mock_f1.execute.side_effect = lambda args: refreshed.set() or "new schedule"
+        replace_command(handler, "!f1", mock_f1)
+        key = CommandHandler.cache_key(handler.registry.lookup("!f1"), "")
+        handler.cache.set(key, "old schedule", ttl=0, stale_ttl=60)
+
+        handler.handle_command(bot, "a", "#chan", "!f1")
+
+        bot.send_message.assert_called_once_with("#chan", "old schedule")
+        assert refreshed.wait(2)
+        for _ in range(100):
+            if handler.cache.get(key) == "new schedule":
+                break
+            time.sleep(0.01)
+        assert handler.cache.get(key) == "new schedule"
+
+
+class TestRequestCoalescing:
+    def test_concurrent_identical_commands_share_one_execution(self, handler):
+        release = threading.Event()
+        started = threading.Event()
+        mock_stock = MagicMock()
+
+        def slow_quote(args):
+            started.set()
+            release.wait(2)
+            return "TSLA 100.00 USD"
+
+        mock_stock.execute.side_effect = slow_quote
+        replace_command(handler, "!stock", mock_stock)
+
+        bots = [MagicMock() for _ in range(3)]
+        first = threading.Thread(target=handler.handle_command, args=(bots[0], "a", "#chan", "!stock TSLA"))
+        first.start()
+        assert started.wait(2)
+        others = [
+            threading.Thread(target=handler.handle_command, args=(bot, "b", "#chan", "!stock tsla"))
+            for bot in bots[1:]
+        ]
+        for t in others:
+            t.start()
+        while handler.single_flight.stats()["collapsed"] < 2:
+            time.sleep(0.001)
+        release.set()
+        for t in [first] + others:
+            t.join(2)
+
+        mock_stock.execute.assert_called_once()
+        for bot in bots:
+            bot.send_message.assert_called_once_with("#chan", "TSLA 100.00 USD")
+
+    def test_waiters_give_up_on_a_hung_execution(self, handler):
+        release = threading.Event()
+        started = threading.Event()
+        mock_stock = MagicMock()
+        mock_stock.execute.side_effect = lambda args: started.set() or release.wait(5) and "TSLA 100.00 USD"
+        replace_command(handler, "!stock", mock_stock)
+        handler.registry.lookup("!stock").timeout = 0.1
+
+        first = threading.Thread(target=handler.handle_command, args=(MagicMock(), "a", "#chan", "!stock TSLA"))
+        first.start()
+        try:
+            assert started.wait(2)
+            waiter = MagicMock()
+            handler.handle_command(waiter, "b", "#chan", "!stock tsla")
+            waiter.send_message.assert_called_once()
+            assert waiter.send_message.call_args.args[1].startswith("Error")
+            assert handler.single_flight.stats()["timed_out"] == 1
+        finally:
+            release.set()
+            first.join(2)
+        mock_stock.execute.assert_called_once()
+
+
+class TestMetrics:
+    @pytest.fixture
+    def handler(self):
+        return CommandHandler(metrics=Metrics())
+
+    def test_command_latency_and_errors_are_recorded(self, handler):
+        mock_crypto = MagicMock()
+        mock_crypto.execute.side_effect = ["1 BTC = 1 BTC", "Error: no such coin"]
+        replace_command(handler, "!crypto", mock_crypto)
+
+        handler.handle_command(MagicMock(), "nick", "#chan", "!crypto bitcoin")
+        handler.handle_command(MagicMock(), "nick", "#chan", "!crypto nosuchcoin")
+
+        stats = handler.metrics.snapshot("command")["!crypto"]
+        assert stats["count"] == 2
+        assert stats["errors"] == 1
+
+    def test_exceptions_count_as_errors(self, handler):
+        mock_stock = MagicMock()
+        mock_stock.execute.side_effect = RuntimeError("boom")
+        replace_command(handler, "!stock", mock_stock)
+
+        handler.handle_command(MagicMock(), "nick", "#chan", "!stock TSLA")
+
+        assert handler.metrics.snapshot("command")["!stock"]["errors"] == 1
+
+    def test_cache_lookups_are_recorded_with_misses(self, handler):
+        mock_crypto = MagicMock()
+        mock_crypto.execute.return_value = "1 BTC = 1 BTC"
+        replace_command(handler, "!crypto", mock_crypto)
+
+        handler.handle_command(MagicMock(), "nick", "#chan", "!crypto bitcoin")
+        handler.handle_command(MagicMock(), "nick", "#chan", "!crypto bitcoin")
+
+        stats = handler.metrics.snapshot("cache")["!crypto"]
+        assert stats["count"] == 2
+        assert stats["errors"] == 1  # the first lookup missed
+
+
+class TestAdminCommands:
+    @pytest.fixture
+    def handler(self, monkeypatch):
+        monkeypatch.setenv("BOT_ADMINS", "*!*@admin.example.org, boss!*@*")
+        return CommandHandler()
+
+    def test_admins_are_read_from_environment(self, handler):
+        assert handler.is_admin("anyone!user@ADMIN.example.org")
+        assert handler.is_admin("boss!b@somewhere")
+        assert not handler.is_admin("nick!user@elsewhere")
+        assert not handler.is_admin(None)
+
+    def test_admin_command_runs_for_admin(self, handler):
+        bot = MagicMock()
+        mock_reload = MagicMock()
+        mock_reload.execute.return_value = "Nothing to reload."
+        replace_command(handler, "!reload", mock_reload)
+
+        handler.handle_command(bot, "boss", "#chan", "!reload", hostmask="boss!b@somewhere")
+
+        bot.send_message.assert_called_once_with("#chan", "Nothing to reload.")
+
+    def test_admin_command_ignored_for_others(self, handler):
+        bot = MagicMock()
+        mock_reload = MagicMock()
+        replace_command(handler, "!reload", mock_reload)
+
+        handler.handle_command(bot, "nick", "#chan", "!reload", hostmask="nick!user@elsewhere")
+        handler.handle_command(bot, "nick", "#chan", "!reload")
+
+        mock_reload.execute.assert_not_called()
+        bot.send_message.assert_not_called()
+
+    def test_stats_is_admin_only(self, handler):
+        bot = MagicMock()
+        handler.handle_command(bot, "nick", "#chan", "!stats", hostmask="nick!user@elsewhere")
+        bot.send_message.assert_not_called()
+
+        handler.handle_command(bot, "boss", "#chan", "!stats upstreams", hostmask="boss!b@somewhere")
+        assert bot.send_message.call_args.args[1].startswith("Stats (upstreams):")
+
+    def test_reload_with_nothing_changed(self, handler):
+        bot = MagicMock()
+        handler.handle_command(bot, "boss", "#chan", "!reload", hostmask="boss!b@somewhere")
+        bot.send_message.assert_called_once_with("#chan", "Nothing to reload.")
@@ -0,0 +1,104 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+import command_registry
+from command_registry import CommandRegistry, CommandSpec, LazyCommand, command, spec_for_class
+
+
+class TestCommandRegistry:
+    def test_every_alias_resolves_to_the_same_spec(self):
+        spec = CommandSpec(["!weather", "!w"], MagicMock(), cache_ttl=600)
+        registry = CommandRegistry([spec])
+        assert registry.lookup("!weather") is spec
+        assert registry.lookup("!w") is spec
+        assert registry.lookup("!nope") is None
+
+    def test_aliases_are_lowercased_and_first_is_the_name(self):
+        spec = CommandSpec(["!Sähkö", "!sahko"], MagicMock())
+        assert spec.aliases == ("!sähkö", "!sahko")
+        assert spec.name == "!sähkö"
+
+    def test_alias_conflict_is_rejected(self):
+        registry = CommandRegistry([CommandSpec(["!w"], MagicMock())])
+        with pytest.raises(ValueError):
+            registry.register(CommandSpec(["!wiki", "!w"], MagicMock()))
+        assert registry.lookup("!wiki") is None
+
+    def test_replace_swaps_command_for_all_aliases(self):
+        spec = CommandSpec(["!weather", "!w"], MagicMock())
+        registry = CommandRegistry([spec])
+        new = MagicMock()
+        registry.replace("!w", new)
+        assert registry.lookup("!weather").command is new
+        with pytest.raises(KeyError):
+            registry.replace("!nope", new)
+
+    def test_iterates_in_registration_order(self):
+        specs = [CommandSpec([f"!c{i}"], MagicMock()) for i in range(5)]
+        assert list(CommandRegistry(specs)) == specs
+
+
+class TestDecorator:
+    def test_decorated_class_becomes_lazy_spec(self, monkeypatch):
+        monkeypatch.setattr(command_registry, "decorated_commands", [])
+
+        @command("!dice", "!d", cooldown=5, allow_args=False)
+        class DiceCommand:
+            def execute(self, args):
+                return "4"
+
+        spec = spec_for_class(DiceCommand)
+        assert spec.aliases == ("!dice", "!d")
+        assert spec.cooldown == 5
+        assert spec.allow_args is False
+        assert isinstance(spec.command, LazyCommand)
+        assert not spec.command.loaded
+
+    def test_register_decorated_skips_already_registered(self, monkeypatch):
+        monkeypatch.setattr(command_registry, "decorated_commands", [])
+
+        @command("!roll")
+        class RollCommand:
+            pass
+
+        registry = CommandRegistry()
+        registry.register_decorated()
+        registry.register_decorated()
+        assert len(registry) == 1
+        assert registry.lookup("!roll").name == "!roll"
+
+
+class TestEntryPoints:
+    def test_plugins_are_registered_and_broken_ones_skipped(self, monkeypatch):
+        monkeypatch.setattr(command_registry, "decorated_commands", [])
+
+        @command("!plugin")
+        class PluginCommand:
+            pass
+
+        good = MagicMock()
+        good.load.return_value = PluginCommand
+        broken = MagicMock()
+        broken.name = "broken"
+        broken.load.side_effect = ImportError("missing dependency")
+        monkeypatch.setattr(command_registry, "entry_points", lambda group: [broken, good])
+
+        registry = CommandRegistry()
+        registry.load_entry_points()
+
+        assert registry.lookup("!plugin") is not None
+        assert len(registry) == 1
+
+
+class TestLazyCommand:
+    def test_loads_on_first_use_only(self):
+        lazy = LazyCommand("time_command", "TimeCommand")
+        assert not lazy.loaded
+        assert lazy.execute("utc").startswith("Local time in UTC")
+        assert lazy.loaded
+
+    def test_load_failure_returns_error_and_retries(self):
+        lazy = LazyCommand("no_such_module", "Nothing")
+        assert lazy.execute("") == "Error: Nothing is unavailable right now."
+        assert not lazy.loaded
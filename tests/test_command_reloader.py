@@ -0,0 +1,225 @@
+import os
+import sys
+import textwrap
+from types import SimpleNamespace
+
+import pytest
+
+from cache import TTLCache
+from command_registry import CommandRegistry, CommandSpec
+from command_reloader import CommandReloader, ReloadCommand
+
+TABLE = """
+from command_registry import CommandSpec, LazyCommand
+
+def builtin_commands():
+    return [
+        CommandSpec(["!greet"], LazyCommand("{prefix}_greet", "GreetCommand"){greet_options}),
+        CommandSpec(["!count"], LazyCommand("{prefix}_count", "CountCommand")),
+    ]
+"""
+
+GREET = """
+class GreetCommand:
+    def execute(self, args):
+        return "{greeting}"
+"""
+
+COUNT = """
+class CountCommand:
+    def __init__(self):
+        self.count = 0
+
+    def execute(self, args):
+        self.count += 1
+        return "{label} %d" % self.count
+
+    def export_state(self):
+        return self.count
+
+    def import_state(self, count):
+        self.count = count
+"""
+
+
+class Workspace:
+    """Command modules in a temp dir, with controllable mtimes."""
+
+    def __init__(self, path, prefix):
+        self.path = path
+        self.prefix = prefix
+        self.now = 2000.0
+
+    def write(self, name, source, mtime):
+        path = self.path / f"{self.prefix}_{name}.py"
+        path.write_text(textwrap.dedent(source))
+        os.utime(path, (mtime, mtime))
+
+    def write_table(self, mtime=1000, greet_options=""):
+        self.write("table", TABLE.format(prefix=self.prefix, greet_options=greet_options), mtime)
+
+    def table(self):
+        return __import__(f"{self.prefix}_table")
+
+    def clock(self):
+        return self.now
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    prefix = f"reload_{tmp_path.name.replace('-', '_')}"
+    monkeypatch.syspath_prepend(str(tmp_path))
+    ws = Workspace(tmp_path, prefix)
+    ws.write_table()
+    ws.write("greet", GREET.format(greeting="hello"), 1000)
+    ws.write("count", COUNT.format(label="count"), 1000)
+    yield ws
+    for name in [name for name in sys.modules if name.startswith(prefix)]:
+        del sys.modules[name]
+
+
+def make_handler(workspace):
+    specs = workspace.table().builtin_commands()
+    handler = SimpleNamespace(registry=CommandRegistry(specs), cache=TTLCache(maxsize=16))
+    handler.reloader = CommandReloader(
+        handler, [spec.name for spec in specs],
+        table_module=f"{workspace.prefix}_table", clock=workspace.clock,
+    )
+    return handler
+
+
+def run(handler, alias, args=""):
+    return handler.registry.lookup(alias).command.execute(args)
+
+
+class TestCommandReloader:
+    def test_nothing_changed(self, workspace):
+        handler = make_handler(workspace)
+        run(handler, "!greet")
+        registry = handler.registry
+
+        assert handler.reloader.reload() == "Nothing to reload."
+        assert handler.registry is registry
+
+    def test_edited_module_is_swapped_in(self, workspace):
+        handler = make_handler(workspace)
+        assert run(handler, "!greet") == "hello"
+
+        workspace.write("greet", GREET.format(greeting="moi"), 3000)
+        summary = handler.reloader.reload()
+
+        assert summary == f"Reloaded {workspace.prefix}_greet."
+        assert run(handler, "!greet") == "moi"
+
+    def test_unused_module_is_not_reloaded(self, workspace):
+        handler = make_handler(workspace)
+        workspace.write("greet", GREET.format(greeting="moi"), 3000)
+
+        assert handler.reloader.reload() == "Nothing to reload."
+        assert run(handler, "!greet") == "moi"  # imported fresh on first use
+
+    def test_unchanged_commands_keep_their_instance(self, workspace):
+        handler = make_handler(workspace)
+        run(handler, "!greet")
+        run(handler, "!count")
+        count = handler.registry.lookup("!count").command
+
+        workspace.write("greet", GREET.format(greeting="moi"), 3000)
+        handler.reloader.reload()
+
+        assert handler.registry.lookup("!count").command is count
+        assert run(handler, "!count") == "count 2"
+
+    def test_state_is_carried_over(self, workspace):
+        handler = make_handler(workspace)
+        run(handler, "!count")
+        run(handler, "!count")
+
+        workspace.write("count", COUNT.format(label="total"), 3000)
+        summary = handler.reloader.reload()
+
+        assert summary.endswith("Carried over state of !count.")
+        assert run(handler, "!count") == "total 3"
+
+    def test_table_changes_are_picked_up(self, workspace):
+        handler = make_handler(workspace)
+        workspace.write_table(mtime=3000, greet_options=", allow_args=False")
+
+        handler.reloader.reload()
+
+        assert handler.registry.lookup("!greet").allow_args is False
+
+    def test_commands_outside_the_table_are_carried_over(self, workspace):
+        handler = make_handler(workspace)
+        reload_spec = handler.registry.register(CommandSpec(["!reload"], ReloadCommand(handler.reloader)))
+        workspace.write_table(mtime=3000)
+
+        handler.reloader.reload()
+
+        assert handler.registry.lookup("!reload") is reload_spec
+
+    def test_broken_module_keeps_the_old_commands(self, workspace):
+        handler = make_handler(workspace)
+        run(handler, "!greet")
+        registry = handler.registry
+
+        workspace.write("greet", "class GreetCommand(:\n", 3000)
+        summary = handler.reloader.reload()
+
+        assert summary.startswith(f"Error: reloading {workspace.prefix}_greet failed")
+        assert handler.registry is registry
+        assert run(handler, "!greet") == "hello"
+
+    def test_syntax_error_anywhere_reloads_nothing(self, workspace):
+        handler = make_handler(workspace)
+        run(handler, "!greet")
+        greet = sys.modules[f"{workspace.prefix}_greet"]
+
+        workspace.write("greet", GREET.format(greeting="moi"), 3000)
+        workspace.write_table(mtime=3000, greet_options=", ((")  # Sorts after greet, doesn't compile
+        summary = handler.reloader.reload()
+
+        assert summary.startswith(f"Error: reloading {workspace.prefix}_table failed (SyntaxError)")
+        assert sys.modules[f"{workspace.prefix}_greet"].GreetCommand is greet.GreetCommand  # not re-run
+        assert run(handler, "!greet") == "hello"
+
+    def test_partial_reload_is_reported_and_swapped_in_later(self, workspace):
+        handler = make_handler(workspace)
+        run(handler, "!greet")
+
+        workspace.write("greet", GREET.format(greeting="moi"), 3000)
+        workspace.write("table", "raise RuntimeError('half-edited')\n", 3000)  # Compiles, fails to run
+        workspace.now = 4000.0
+        summary = handler.reloader.reload()
+
+        assert summary == (f"Error: reloading {workspace.prefix}_table failed (RuntimeError), commands unchanged."
+                           f" Already reloaded: {workspace.prefix}_greet.")
+        assert run(handler, "!greet") == "hello"
+
+        workspace.write_table(mtime=5000)
+        workspace.now = 6000.0
+        summary = handler.reloader.reload()
+
+        assert summary == f"Reloaded {workspace.prefix}_greet, {workspace.prefix}_table."
+        assert run(handler, "!greet") == "moi"
+        assert handler.reloader.reload() == "Nothing to reload."
+
+    def test_reload_clears_cached_responses(self, workspace):
+        handler = make_handler(workspace)
+        handler.cache.set(("!greet", ""), "hello", 600)
+        run(handler, "!greet")
+
+        workspace.write("greet", GREET.format(greeting="moi"), 3000)
+        handler.reloader.reload()
+
+        assert handler.cache.get(("!greet", "")) is None
+
+    def test_module_is_only_reloaded_once_per_edit(self, workspace):
+        handler = make_handler(workspace)
+        run(handler, "!greet")
+        workspace.write("greet", GREET.format(greeting="moi"), 3000)
+        workspace.now = 4000.0
+
+        handler.reloader.reload()
+
+        assert handler.reloader.reload() == "Nothing to reload."
@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+from domain_rules import DEFAULT_RULE, DomainRule, DomainRules
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def rules():
+    return DomainRules([
+        DomainRule("x.com", "block"),
+        DomainRule("youtube.com", "youtube"),
+        DomainRule("youtu.be", "youtube"),
+        DomainRule("example.com", timeout=10),
+        DomainRule("ads.example.com", "block"),
+    ])
+
+
+def write_rules(path, entries, mtime=None):
+    path.write_text(json.dumps({"rules": entries}), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+class TestMatch:
+    def test_exact_domain(self, rules):
+        assert rules.match("x.com").action == "block"
+
+    def test_subdomain_inherits_rule(self, rules):
+        assert rules.match("www.youtube.com").action == "youtube"
+        assert rules.match("m.youtube.com").action == "youtube"
+
+    def test_most_specific_rule_wins(self, rules):
+        assert rules.match("example.com").action == "generic"
+        assert rules.match("example.com").timeout == 10
+        assert rules.match("cdn.ads.example.com").action == "block"
+
+    def test_lookalike_domains_do_not_match(self, rules):
+        assert rules.match("notyoutube.com") is DEFAULT_RULE
+        assert rules.match("youtube.com.evil") is DEFAULT_RULE
+
+    def test_case_and_trailing_dot_are_ignored(self, rules):
+        assert rules.match("WWW.YouTube.com.").action == "youtube"
+
+    def test_unknown_host_gets_default(self, rules):
+        assert rules.match("example.org") is DEFAULT_RULE
+        assert rules.match("") is DEFAULT_RULE
+
+    def test_unknown_action_is_rejected(self):
+        with pytest.raises(ValueError):
+            DomainRules([DomainRule("x.com", "explode")])
+
+    def test_many_rules(self):
+        rules = DomainRules([DomainRule(f"site{i}.com", "block") for i in range(5000)])
+        assert rules.match("www.site4321.com").action == "block"
+        assert rules.match("site5000.com") is DEFAULT_RULE
+
+
+class TestLoading:
+    def test_loads_rules_file(self, tmp_path):
+        path = tmp_path / "rules.json"
+        write_rules(path, [{"domain": "x.com", "action": "block"}, {"domain": "slow.fi", "timeout": 15}])
+        rules = DomainRules(path=str(path))
+        assert rules.size == 2
+        assert rules.match("x.com").action == "block"
+        assert rules.match("slow.fi").action == "generic"
+        assert rules.match("slow.fi").timeout == 15
+
+    def test_reload_if_changed_picks_up_edits(self, tmp_path):
+        path = tmp_path / "rules.json"
+        write_rules(path, [{"domain": "x.com", "action": "block"}], mtime=1_000_000)
+        clock = FakeClock()
+        rules = DomainRules(path=str(path), clock=clock)
+        assert rules.reload_if_changed() is False  # Unchanged
+
+        write_rules(path, [{"domain": "reddit.com", "action": "block"}], mtime=1_000_100)
+        clock.now += DomainRules.CHECK_INTERVAL - 1
+        assert rules.reload_if_changed() is False  # Checked too recently
+        clock.now += 2
+        assert rules.reload_if_changed() is True
+        assert rules.match("reddit.com").action == "block"
+        assert rules.match("x.com") is DEFAULT_RULE
+
+    def test_broken_file_keeps_current_rules(self, tmp_path):
+        path = tmp_path / "rules.json"
+        write_rules(path, [{"domain": "x.com", "action": "block"}])
+        rules = DomainRules(path=str(path))
+        path.write_text("{not json", encoding="utf-8")
+        assert rules.reload() is False
+        assert rules.match("x.com").action == "block"
+
+    def test_shipped_rules_file_is_valid(self):
+        from url_fetcher import URLFetcher
+        rules = DomainRules(path=URLFetcher.RULES_FILE)
+        assert rules.size > 0
+        assert rules.match("youtu.be").action == "youtube"
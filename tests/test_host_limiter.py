@@ -0,0 +1,151 @@
+import threading
+import time
+
+import pytest
+
+from host_limiter import HostLimiter, HostUnavailable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_limiter(clock, **kwargs):
+    return HostLimiter(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+class TestPacing:
+    def test_requests_to_a_host_are_spaced_by_min_interval(self, clock):
+        limiter = make_limiter(clock, min_interval=1.0, max_concurrent=5)
+        starts = []
+        for _ in range(3):
+            limiter.acquire("example.com")
+            starts.append(clock.now)
+            limiter.release("example.com")
+        assert starts == [1000.0, 1001.0, 1002.0]
+
+    def test_hosts_are_paced_independently(self, clock):
+        limiter = make_limiter(clock, min_interval=1.0)
+        limiter.acquire("a.com")
+        limiter.acquire("b.com")
+        assert clock.now == 1000.0
+
+    def test_request_that_would_wait_too_long_is_rejected(self, clock):
+        # Three callers arriving at once: the clock doesn't move while they wait
+        limiter = HostLimiter(min_interval=2.0, max_wait=3.0, max_concurrent=5,
+                              clock=clock, sleep=lambda seconds: None)
+        limiter.acquire("example.com")
+        limiter.acquire("example.com")  # Starts at +2
+        with pytest.raises(HostUnavailable):
+            limiter.acquire("example.com")  # Would start at +4, past the 3s wait
+        assert limiter.stats()["rejected"] == 1
+
+
+class TestConcurrency:
+    def test_concurrent_requests_per_host_are_capped(self):
+        limiter = HostLimiter(max_concurrent=2, min_interval=0, max_wait=2)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def request():
+            with limiter.limit("example.com") as slot:
+                with lock:
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                time.sleep(0.02)
+                with lock:
+                    running[0] -= 1
+                slot.record(200)
+
+        threads = [threading.Thread(target=request) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert peak[0] == 2
+
+    def test_waiting_too_long_for_a_slot_raises(self):
+        limiter = HostLimiter(max_concurrent=1, min_interval=0, max_wait=0.05)
+        limiter.acquire("example.com")
+        with pytest.raises(HostUnavailable):
+            limiter.acquire("example.com")
+
+
+class TestBackoff:
+    def test_repeated_failures_put_host_in_backoff(self, clock):
+        limiter = make_limiter(clock, min_interval=0)
+        for _ in range(HostLimiter.FAILURE_THRESHOLD):
+            limiter.acquire("slow.com")
+            limiter.release("slow.com", failed=True)
+        with pytest.raises(HostUnavailable):
+            limiter.acquire("slow.com")
+        assert limiter.stats()["backing_off"] == 1
+
+        clock.now += HostLimiter.BACKOFF_BASE
+        limiter.acquire("slow.com")  # Backoff over, one more try allowed
+
+    def test_backoff_doubles_and_success_resets(self, clock):
+        limiter = make_limiter(clock, min_interval=0)
+        for _ in range(HostLimiter.FAILURE_THRESHOLD + 1):
+            clock.now += HostLimiter.BACKOFF_CAP
+            limiter.acquire("slow.com")
+            limiter.release("slow.com", failed=True)
+        clock.now += HostLimiter.BACKOFF_BASE
+        with pytest.raises(HostUnavailable):
+            limiter.acquire("slow.com")  # Second backoff is twice as long
+        clock.now += HostLimiter.BACKOFF_BASE
+        limiter.acquire("slow.com")
+        limiter.release("slow.com", failed=False)
+        limiter.acquire("slow.com")
+        limiter.release("slow.com", failed=True)
+        limiter.acquire("slow.com")  # A single failure after a success doesn't block
+
+    @pytest.mark.parametrize("status, failed", [(200, False), (404, False), (429, True), (503, True)])
+    def test_slot_classifies_status_codes(self, clock, status, failed):
+        limiter = make_limiter(clock, min_interval=0)
+        limiter.FAILURE_THRESHOLD = 1
+        with limiter.limit("example.com") as slot:
+            slot.record(status)
+        assert (limiter.stats()["backing_off"] == 1) is failed
+
+    def test_exception_without_answer_counts_as_failure(self, clock):
+        limiter = make_limiter(clock, min_interval=0)
+        limiter.FAILURE_THRESHOLD = 1
+        with pytest.raises(TimeoutError):
+            with limiter.limit("example.com"):
+                raise TimeoutError
+        assert limiter.stats()["backing_off"] == 1
+        assert limiter.stats()["active"] == 0
+
+
+class TestBounds:
+    def test_idle_hosts_are_evicted(self, clock):
+        limiter = make_limiter(clock, min_interval=0, max_hosts=3)
+        for i in range(10):
+            limiter.acquire(f"host{i}.com")
+            limiter.release(f"host{i}.com")
+        assert limiter.stats()["hosts"] == 3
+
+    def test_hosts_in_backoff_are_not_forgotten(self, clock):
+        limiter = make_limiter(clock, min_interval=0, max_hosts=2)
+        limiter.FAILURE_THRESHOLD = 1
+        limiter.acquire("bad.com")
+        limiter.release("bad.com", failed=True)
+        for i in range(5):
+            limiter.acquire(f"host{i}.com")
+            limiter.release(f"host{i}.com")
+        with pytest.raises(HostUnavailable):
+            limiter.acquire("bad.com")
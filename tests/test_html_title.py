@@ -0,0 +1,145 @@
+import pytest
+
+from html_title import (
+    TitleParsePool,
+    TitleParser,
+    charset_from_content_type,
+    detect_encoding,
+    extract_title,
+    read_head,
+    sniff_meta_charset,
+)
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class CountingChunks:
+    """Iterable of chunks that records how many were consumed."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.consumed = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+
+class TestExtractTitle:
+    def test_og_title_wins_over_title(self):
+        html = b'<html><head><title>Plain</title><meta property="og:title" content=" OG "></head></html>'
+        assert extract_title([html]) == "OG"
+
+    def test_falls_back_to_title(self):
+        assert extract_title([b"<html><head><title> Plain &amp; simple </title></head>"]) == "Plain & simple"
+
+    def test_no_title_returns_none(self):
+        assert extract_title([b"<html><head></head><body>hi</body></html>"]) is None
+
+    def test_title_split_across_chunks(self):
+        html = b"<html><head><title>Hello world</title></head><body></body></html>"
+        assert extract_title(chunked(html, 7)) == "Hello world"
+
+    def test_stops_reading_once_head_is_over(self):
+        head = b"<html><head><title>Early</title></head><body>"
+        chunks = CountingChunks([head] + [b"<p>filler</p>" * 100] * 50)
+        assert extract_title(chunks) == "Early"
+        assert chunks.consumed == 1
+
+    def test_stops_reading_as_soon_as_og_title_is_seen(self):
+        chunks = CountingChunks([b'<head><meta property="og:title" content="OG">', b"<title>x</title>"] * 10)
+        assert extract_title(chunks) == "OG"
+        assert chunks.consumed == 1
+
+    def test_byte_cap_is_respected(self):
+        chunks = CountingChunks([b"<html><head>" + b" " * 100] + [b" " * 100] * 100 + [b"<title>Late</title>"])
+        assert extract_title(chunks, max_bytes=500) is None
+        assert chunks.consumed == 5
+
+    def test_header_charset_is_used(self):
+        html = "<title>Hyvää yötä</title>".encode("iso-8859-1")
+        assert extract_title([html], header_charset="iso-8859-1") == "Hyvää yötä"
+
+    def test_meta_charset_is_used_when_header_has_none(self):
+        html = '<head><meta charset="windows-1252"><title>Äänestys</title></head>'.encode("cp1252")
+        assert extract_title([html]) == "Äänestys"
+
+    def test_unknown_charset_falls_back_to_utf8(self):
+        assert extract_title(["<title>ok ä</title>".encode()], header_charset="bogus-charset") == "ok ä"
+
+    def test_unterminated_title_at_eof(self):
+        assert extract_title([b"<title>Cut off"]) == "Cut off"
+
+    def test_empty_body(self):
+        assert extract_title([]) is None
+
+
+class TestCharsetHelpers:
+    @pytest.mark.parametrize("header, expected", [
+        ("text/html; charset=UTF-8", "UTF-8"),
+        ('text/html; charset="iso-8859-1"', "iso-8859-1"),
+        ("text/html", None),
+        (None, None),
+    ])
+    def test_charset_from_content_type(self, header, expected):
+        assert charset_from_content_type(header) == expected
+
+    def test_sniff_meta_charset_http_equiv(self):
+        html = b'<meta http-equiv="Content-Type" content="text/html; charset=iso-8859-15">'
+        assert sniff_meta_charset(html) == "iso-8859-15"
+
+    def test_sniff_meta_charset_missing(self):
+        assert sniff_meta_charset(b"<html><head><title>x</title>") is None
+
+    def test_detect_encoding_accepts_valid_utf8(self):
+        assert detect_encoding("äö".encode("utf-8")) == "utf-8"
+
+    def test_detect_encoding_tolerates_char_cut_at_chunk_end(self):
+        assert detect_encoding("abc ä".encode("utf-8")[:-1]) == "utf-8"
+
+
+class TestTitleParser:
+    def test_body_ends_the_head(self):
+        parser = TitleParser()
+        parser.feed("<html><body>")
+        assert parser.done is True
+
+
+class TestReadHead:
+    def test_stops_at_end_of_head(self):
+        page = b"<html><head><title>T</title></head>" + b"<p>body</p>" * 10000
+        chunks = CountingChunks(chunked(page, 16))
+        head = read_head(chunks)
+        assert head.startswith(b"<html><head><title>T</title></he")
+        assert chunks.consumed < 10
+
+    def test_marker_split_across_chunks(self):
+        chunks = CountingChunks([b"<title>T</title></he", b"ad>", b"<p>more</p>"])
+        read_head(chunks)
+        assert chunks.consumed == 2
+
+    def test_respects_max_bytes(self):
+        assert len(read_head(chunked(b"x" * 1000, 64), max_bytes=100)) == 100
+
+
+class TestTitleParsePool:
+    def test_parses_in_worker_process(self):
+        pool = TitleParsePool(processes=1)
+        try:
+            page = "<html><head><title>Sää</title></head><body>".encode("latin-1")
+            assert pool.extract_title(page, header_charset="iso-8859-1") == "Sää"
+            assert pool.extract_title(b"<p>no title</p>") is None
+        finally:
+            pool.close()
+
+    def test_workers_are_not_forked_from_the_bot(self):
+        pool = TitleParsePool(processes=1)
+        try:
+            pool.start()
+            assert pool._executor._mp_context.get_start_method() in ("forkserver", "spawn")
+            assert pool.extract_title(b"<title>Ready</title>") == "Ready"
+        finally:
+            pool.close()
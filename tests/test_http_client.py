@@ -0,0 +1,108 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from http_client import HttpClient, get_http_client
+from metrics import Metrics
+
+
+def make_response(status_code=200):
+    resp = MagicMock()
+    resp.status_code = status_code
+    return resp
+
+
+@pytest.fixture
+def client():
+    return HttpClient()
+
+
+class TestHttpClient:
+    def test_default_timeout_is_applied(self, client):
+        with patch.object(requests.Session, "request", return_value=make_response()) as mock_request:
+            client.get("https://example.com/a")
+        assert mock_request.call_args.kwargs["timeout"] == HttpClient.DEFAULT_TIMEOUT
+
+    def test_explicit_timeout_wins(self, client):
+        with patch.object(requests.Session, "request", return_value=make_response()) as mock_request:
+            client.get("https://example.com/a", timeout=12)
+        assert mock_request.call_args.kwargs["timeout"] == 12
+
+    def test_stats_are_kept_per_upstream(self, client):
+        with patch.object(requests.Session, "request", return_value=make_response()):
+            client.get("https://api.weatherapi.com/v1/a")
+            client.get("https://api.weatherapi.com/v1/b")
+        with patch.object(requests.Session, "request", return_value=make_response(503)):
+            client.get("https://api.jolpi.ca/")
+
+        stats = client.upstream_stats()
+        assert stats["api.weatherapi.com"]["requests"] == 2
+        assert stats["api.weatherapi.com"]["errors"] == 0
+        assert stats["api.jolpi.ca"]["errors"] == 1
+
+    def test_unknown_hosts_share_one_entry(self, client):
+        with patch.object(requests.Session, "request", return_value=make_response()):
+            for i in range(50):
+                client.get(f"https://site{i}.example.com/")
+
+        assert client.upstream_stats() == {"other": {
+            "requests": 50, "errors": 0, "avg_time": pytest.approx(0, abs=0.1),
+            "max_time": pytest.approx(0, abs=0.1),
+        }}
+
+    def test_caller_can_name_the_upstream(self, client):
+        with patch.object(requests.Session, "request", return_value=make_response()) as mock_request:
+            client.get("https://news.example.com/story", upstream="link_titles")
+        assert "upstream" not in mock_request.call_args.kwargs
+        assert list(client.upstream_stats()) == ["link_titles"]
+
+    def test_exceptions_are_counted_and_reraised(self, client):
+        with patch.object(requests.Session, "request", side_effect=requests.exceptions.Timeout):
+            with pytest.raises(requests.exceptions.Timeout):
+                client.get("https://www.liiga.fi/api/games")
+        assert client.upstream_stats()["www.liiga.fi"] == {
+            "requests": 1, "errors": 1, "avg_time": pytest.approx(0, abs=0.1),
+            "max_time": pytest.approx(0, abs=0.1),
+        }
+
+    def test_latency_goes_to_metrics(self):
+        metrics = Metrics()
+        client = HttpClient(metrics=metrics)
+        with patch.object(requests.Session, "request", return_value=make_response(500)):
+            client.get("https://api.coingecko.com/api/v3/ping")
+
+        stats = metrics.snapshot("upstream")["api.coingecko.com"]
+        assert stats["count"] == 1
+        assert stats["errors"] == 1
+
+    def test_unknown_hosts_get_no_histograms_of_their_own(self):
+        metrics = Metrics()
+        client = HttpClient(metrics=metrics)
+        with patch.object(requests.Session, "request", return_value=make_response()):
+            for i in range(50):
+                client.get(f"https://site{i}.example.com/")
+
+        assert list(metrics.snapshot("upstream")) == ["other"]
+
+    def test_adapters_are_pooled_and_never_block(self, client):
+        adapter = client.get_adapter("https://example.com")
+        assert adapter._pool_maxsize == HttpClient.POOL_MAXSIZE
+        assert adapter._pool_block is False
+        assert adapter.max_retries.read == 0
+
+
+class TestSharedClient:
+    def test_get_http_client_returns_singleton(self):
+        assert get_http_client() is get_http_client()
+
+    def test_commands_share_the_client(self, monkeypatch):
+        monkeypatch.setenv("WEATHER_API_KEY", "test-key")
+        from crypto import CryptoCommand
+        from f1_command import F1Command
+        from weather import WeatherCommand
+
+        client = get_http_client()
+        assert WeatherCommand().session is client
+        assert F1Command().session is client
+        assert CryptoCommand().cg.session is client
@@ -0,0 +1,112 @@
+import socket
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from irc_bot import IrcBot, ReconnectBackoff
+from irc_protocol import parse_message
+
+
+@pytest.fixture
+def bot():
+    bot = IrcBot(channels=["#chan"])
+    bot.send_raw = MagicMock()
+    bot.command_handler = MagicMock()
+    bot.url_fetcher = MagicMock()
+    # Run pooled jobs inline so dispatch can be asserted synchronously.
+    bot.submit = lambda channel, kind, func, timeout=None: func(bot)
+    return bot
+
+
+class TestDispatch:
+    def test_ping_is_answered_with_pong(self, bot):
+        bot.dispatch(parse_message(b"PING :irc.example.org"))
+        bot.send_raw.assert_called_once_with("PONG :irc.example.org")
+
+    def test_welcome_joins_channels(self, bot):
+        bot.join_channels = MagicMock()
+        bot.dispatch(parse_message(b":server 001 KukistiBot :Welcome"))
+        bot.join_channels.assert_called_once()
+
+    def test_command_is_routed_to_command_handler(self, bot):
+        bot.dispatch(parse_message(b":nick!u@h PRIVMSG #chan :!weather helsinki"))
+        bot.command_handler.handle_command.assert_called_once_with(
+            bot, "nick", "#chan", "!weather helsinki", hostmask="nick!u@h"
+        )
+        bot.url_fetcher.detect_and_fetch.assert_not_called()
+
+    def test_plain_message_goes_to_url_fetcher(self, bot):
+        bot.dispatch(parse_message(b":nick!u@h PRIVMSG #chan :look https://example.com"))
+        bot.url_fetcher.detect_and_fetch.assert_called_once_with(
+            "nick", "#chan", "look https://example.com", bot=bot
+        )
+
+    def test_message_in_unknown_channel_is_ignored(self, bot):
+        bot.dispatch(parse_message(b":nick!u@h PRIVMSG #other :!weather helsinki"))
+        bot.command_handler.handle_command.assert_not_called()
+        bot.url_fetcher.detect_and_fetch.assert_not_called()
+
+    def test_privmsg_mentioning_001_is_not_treated_as_welcome(self, bot):
+        bot.join_channels = MagicMock()
+        bot.dispatch(parse_message(b":nick!u@h PRIVMSG #chan :numeric 001 here"))
+        bot.join_channels.assert_not_called()
+
+
+class TestReconnectBackoff:
+    def test_delay_doubles_up_to_cap(self):
+        backoff = ReconnectBackoff(base=2, cap=10, rng=lambda: 1.0)
+        assert [backoff.next_delay() for _ in range(5)] == [2, 4, 8, 10, 10]
+
+    def test_jitter_stays_in_upper_half(self):
+        backoff = ReconnectBackoff(base=8, cap=100, rng=lambda: 0.0)
+        assert backoff.next_delay() == 4
+
+    def test_reset_starts_over(self):
+        backoff = ReconnectBackoff(base=2, cap=10, rng=lambda: 1.0)
+        backoff.next_delay()
+        backoff.next_delay()
+        backoff.reset()
+        assert backoff.next_delay() == 2
+
+
+class TestReconnect:
+    def test_reconnects_with_fresh_socket_and_rejoins(self):
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        server.settimeout(5)
+        port = server.getsockname()[1]
+
+        bot = IrcBot(server="127.0.0.1", port=port, channels=["#chan"])
+        bot.backoff = ReconnectBackoff(base=0.01, cap=0.01)
+        bot.send_queue.bucket.rate = 1000  # don't let flood control slow the test down
+        bot.command_handler = MagicMock()
+        runner = threading.Thread(target=bot.connect, daemon=True)
+        runner.start()
+
+        received = []
+        try:
+            for _ in range(2):
+                conn, _ = server.accept()
+                conn.settimeout(5)
+                buf = b""
+                conn.sendall(b":srv 001 KukistiBot :Welcome\r\n")
+                while b"JOIN #chan\r\n" not in buf:
+                    chunk = conn.recv(1024)
+                    assert chunk, buf
+                    buf += chunk
+                received.append(buf)
+                conn.close()  # simulate the connection dropping
+            # Let the bot get into its next reconnect attempt before stopping it.
+            conn, _ = server.accept()
+            conn.close()
+        finally:
+            bot.stop()
+            runner.join(timeout=5)
+            server.close()
+
+        assert not runner.is_alive()
+        for buf in received:
+            assert buf.startswith(b"NICK KukistiBot\r\nUSER KukistiBot")
+        assert bot.command_handler.resume.call_count == 2
@@ -0,0 +1,85 @@
+import pytest
+
+from irc_protocol import LineFramer, decode_text, parse_message
+
+
+class TestLineFramer:
+    def test_splits_complete_lines(self):
+        framer = LineFramer()
+        assert framer.feed(b"PING :a\r\nPING :b\r\n") == [b"PING :a", b"PING :b"]
+
+    def test_line_split_across_reads_is_reassembled(self):
+        framer = LineFramer()
+        assert framer.feed(b":nick!u@h PRIVMSG #chan :hel") == []
+        assert framer.feed(b"lo world\r") == []
+        assert framer.feed(b"\nPING :x\r\n") == [b":nick!u@h PRIVMSG #chan :hello world", b"PING :x"]
+        assert framer.pending() == 0
+
+    def test_bare_lf_is_accepted(self):
+        framer = LineFramer()
+        assert framer.feed(b"PING :a\nPING :b\n") == [b"PING :a", b"PING :b"]
+
+    def test_empty_lines_are_skipped(self):
+        framer = LineFramer()
+        assert framer.feed(b"\r\n\r\nPING :a\r\n") == [b"PING :a"]
+
+    def test_overlong_unterminated_input_is_discarded(self):
+        framer = LineFramer()
+        framer.feed(b"x" * (LineFramer.MAX_LINE_LENGTH + 1))
+        assert framer.pending() == 0
+        assert framer.feed(b"PING :a\r\n") == [b"PING :a"]
+
+
+class TestParseMessage:
+    def test_privmsg_with_prefix_and_trailing(self):
+        msg = parse_message(b":nick!user@host PRIVMSG #chan :!weather helsinki")
+        assert msg.command == "PRIVMSG"
+        assert msg.prefix == "nick!user@host"
+        assert msg.nick == "nick"
+        assert msg.params == ["#chan", "!weather helsinki"]
+
+    def test_ping_without_prefix(self):
+        msg = parse_message(b"PING :irc.quakenet.org")
+        assert msg.command == "PING"
+        assert msg.prefix is None
+        assert msg.nick is None
+        assert msg.params == ["irc.quakenet.org"]
+
+    def test_numeric_with_middle_params(self):
+        msg = parse_message(b":server 001 KukistiBot :Welcome to QuakeNet")
+        assert msg.command == "001"
+        assert msg.params == ["KukistiBot", "Welcome to QuakeNet"]
+
+    def test_command_is_uppercased(self):
+        assert parse_message(b"ping :x").command == "PING"
+
+    def test_tags_are_parsed_and_unescaped(self):
+        msg = parse_message(b"@time=2024-01-01T00:00:00Z;msg=a\\sb\\:c;flag :n!u@h PRIVMSG #c :hi")
+        assert msg.tags == {"time": "2024-01-01T00:00:00Z", "msg": "a b;c", "flag": ""}
+        assert msg.command == "PRIVMSG"
+        assert msg.params == ["#c", "hi"]
+
+    def test_no_params(self):
+        msg = parse_message(b":server QUIT")
+        assert msg.command == "QUIT"
+        assert msg.params == []
+
+    @pytest.mark.parametrize("line", [b"@tagsonly", b":prefixonly", b": "])
+    def test_lines_without_command_return_none(self, line):
+        assert parse_message(line) is None
+
+    def test_latin1_text_falls_back(self):
+        msg = parse_message(":n!u@h PRIVMSG #c :!sähkö".encode("latin-1"))
+        assert msg.params[1] == "!sähkö"
+
+    def test_utf8_text_is_decoded(self):
+        msg = parse_message(":n!u@h PRIVMSG #c :!sähkö".encode("utf-8"))
+        assert msg.params[1] == "!sähkö"
+
+
+class TestDecodeText:
+    def test_utf8(self):
+        assert decode_text("äö".encode("utf-8")) == "äö"
+
+    def test_invalid_utf8_uses_latin1(self):
+        assert decode_text(b"\xe4\xf6") == "äö"
@@ -368,6 +368,97 @@ class TestPollOnce:
         assert result is False
 
 
+class TestReconnect:
+    def test_poll_loop_skips_polling_while_disconnected(self, liiga_command):
+        bot = MagicMock()
+        bot.registered = False
+        stop_event = MagicMock()
+        stop_event.is_set.side_effect = [False, True]
+
+        with patch.object(liiga_command, "_poll_once") as mock_poll:
+            liiga_command._poll_loop(bot, "#chan", stop_event)
+
+        mock_poll.assert_not_called()
+        stop_event.wait.assert_called_once_with(LiigaCommand.POLL_INTERVAL_SECONDS)
+
+    def test_resume_restarts_dead_poller(self, liiga_command):
+        bot = MagicMock()
+        stop_event = threading.Event()
+        dead_thread = MagicMock()
+        dead_thread.is_alive.return_value = False
+        liiga_command._channels["#chan"] = {
+            "stop_event": stop_event,
+            "thread": dead_thread,
+            "games": {1: liiga_command._snapshot(make_game())},
+        }
+
+        with patch.object(liiga_command, "_poll_loop") as mock_loop:
+            liiga_command.resume(bot)
+            join_channel_thread(liiga_command, "#chan")
+
+        mock_loop.assert_called_once_with(bot, "#chan", stop_event)
+        assert liiga_command._channels["#chan"]["thread"] is not dead_thread
+
+    def test_resume_leaves_live_poller_alone(self, liiga_command):
+        live_thread = MagicMock()
+        live_thread.is_alive.return_value = True
+        liiga_command._channels["#chan"] = {
+            "stop_event": threading.Event(),
+            "thread": live_thread,
+            "games": {},
+        }
+
+        with patch.object(liiga_command, "_run") as mock_run:
+            liiga_command.resume(MagicMock())
+
+        mock_run.assert_not_called()
+        assert liiga_command._channels["#chan"]["thread"] is live_thread
+
+
+class TestHotReload:
+    def test_export_stops_pollers_and_hands_over_games(self, liiga_command):
+        bot = MagicMock()
+        games = {1: liiga_command._snapshot(make_game(home_goals=[goal_event()]))}
+        stop_event = threading.Event()
+        thread = threading.Thread(target=stop_event.wait, daemon=True)
+        thread.start()
+        liiga_command._channels["#chan"] = {
+            "stop_event": stop_event, "thread": thread, "games": games, "irc_bot": bot,
+        }
+
+        state = liiga_command.export_state()
+
+        assert stop_event.is_set()
+        assert not thread.is_alive()
+        assert liiga_command._channels == {}
+        assert state == {"#chan": {"games": games, "irc_bot": bot}}
+
+    def test_import_resumes_polling_with_known_games(self, liiga_command):
+        bot = MagicMock()
+        games = {1: liiga_command._snapshot(make_game())}
+
+        with patch.object(liiga_command, "_poll_loop") as mock_loop:
+            liiga_command.import_state({"#chan": {"games": games, "irc_bot": bot}})
+            join_channel_thread(liiga_command, "#chan")
+
+        entry = liiga_command._channels["#chan"]
+        assert entry["games"] is games
+        mock_loop.assert_called_once_with(bot, "#chan", entry["stop_event"])
+
+    def test_handed_over_poller_does_not_announce_the_end(self, liiga_command):
+        bot = MagicMock()
+        stop_event = threading.Event()
+
+        def poll_while_exported(irc_bot, channel):
+            stop_event.set()  # export_state() ran during this poll
+            return True
+
+        with patch.object(liiga_command, "_poll_once", side_effect=poll_while_exported):
+            liiga_command._poll_loop(bot, "#chan", stop_event)
+
+        bot.send_message.assert_not_called()
+
+
 class TestFetchTodayGames:
     def _make_response(self, status_ok=True, payload=None):
         resp = MagicMock()
@@ -386,7 +477,7 @@ class TestFetchTodayGames:
     def test_one_tournament_failing_keeps_the_others(self, liiga_command):
         good_game = make_game(gid=42)
 
-        def fake_get(url, params=None, timeout=None):
+        def fake_get(url, params=None, headers=None, timeout=None):
             if params["tournament"] == "runkosarja":
                 return self._make_response(payload={"games": [good_game]})
             raise requests.exceptions.Timeout("slow tournament")
@@ -399,7 +490,7 @@ class TestFetchTodayGames:
     def test_malformed_json_shape_for_one_tournament_is_skipped(self, liiga_command):
         good_game = make_game(gid=7)
 
-        def fake_get(url, params=None, timeout=None):
+        def fake_get(url, params=None, headers=None, timeout=None):
             if params["tournament"] == "runkosarja":
                 return self._make_response(payload={"games": [good_game]})
             return self._make_response(payload=["not", "a", "dict"])
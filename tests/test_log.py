@@ -0,0 +1,104 @@
+import logging
+
+import pytest
+
+from log import FIELDS, SampleFilter, StructuredFormatter, TRAFFIC_LOGGER, setup_logging, shutdown_logging
+
+
+def make_record(msg="Handled !weather", **fields):
+    record = logging.LogRecord("command_handler", logging.INFO, __file__, 1, msg, (), None)
+    for key, value in fields.items():
+        setattr(record, key, value)
+    return record
+
+
+@pytest.fixture
+def restore_logging():
+    root = logging.getLogger()
+    traffic = logging.getLogger(TRAFFIC_LOGGER)
+    saved = (list(root.handlers), root.level, traffic.level, list(traffic.filters))
+    yield
+    shutdown_logging()
+    root.handlers[:] = saved[0]
+    root.setLevel(saved[1])
+    traffic.setLevel(saved[2])
+    traffic.filters[:] = saved[3]
+
+
+class TestStructuredFormatter:
+    def test_fields_are_appended_as_key_value(self):
+        formatter = StructuredFormatter("%(message)s")
+        record = make_record(channel="#chan", command="!weather", latency_ms=12.5)
+        assert formatter.format(record) == "Handled !weather channel=#chan command=!weather latency_ms=12.5"
+
+    def test_plain_record_is_unchanged(self):
+        assert StructuredFormatter("%(message)s").format(make_record()) == "Handled !weather"
+
+    def test_fields_stay_on_the_first_line_of_a_traceback(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = make_record(channel="#chan")
+            record.exc_info = __import__("sys").exc_info()
+        lines = StructuredFormatter("%(message)s").format(record).splitlines()
+        assert lines[0] == "Handled !weather channel=#chan"
+        assert lines[-1] == "ValueError: boom"
+
+    def test_known_fields(self):
+        assert {"channel", "command", "latency_ms"} <= set(FIELDS)
+
+
+class TestSampleFilter:
+    def test_every_nth_record_passes(self):
+        sample = SampleFilter(3)
+        assert [sample.filter(make_record()) for _ in range(7)] == [True, False, False, True, False, False, True]
+
+    def test_one_lets_everything_through(self):
+        sample = SampleFilter(1)
+        assert all(sample.filter(make_record()) for _ in range(5))
+
+
+class TestSetupLogging:
+    def test_writes_structured_lines_to_the_log_file(self, tmp_path, restore_logging):
+        path = tmp_path / "bot.log"
+        setup_logging(level="INFO", path=str(path))
+
+        logging.getLogger("command_handler").info("Handled %s", "!time", extra={"channel": "#chan"})
+        logging.getLogger("command_handler").debug("not at INFO")
+        shutdown_logging()  # Drains the queue
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1
+        assert lines[0].endswith("INFO command_handler: Handled !time channel=#chan")
+
+    def test_raw_traffic_is_off_by_default(self, tmp_path, restore_logging):
+        path = tmp_path / "bot.log"
+        setup_logging(level="DEBUG", path=str(path), traffic_sample=0)
+
+        logging.getLogger(TRAFFIC_LOGGER).debug("< PING :server")
+        shutdown_logging()
+
+        assert "PING" not in path.read_text()
+
+    def test_raw_traffic_can_be_sampled(self, tmp_path, restore_logging):
+        path = tmp_path / "bot.log"
+        setup_logging(level="INFO", path=str(path), traffic_sample=2)
+
+        for i in range(4):
+            logging.getLogger(TRAFFIC_LOGGER).debug("< line %d", i)
+        shutdown_logging()
+
+        text = path.read_text()
+        assert "< line 0" in text and "< line 2" in text
+        assert "< line 1" not in text and "< line 3" not in text
+
+    def test_file_is_rotated(self, tmp_path, restore_logging):
+        path = tmp_path / "bot.log"
+        setup_logging(level="INFO", path=str(path), max_bytes=200, backups=2)
+
+        for i in range(20):
+            logging.getLogger("irc_bot").info("line %d with some padding to fill the file", i)
+        shutdown_logging()
+
+        assert (tmp_path / "bot.log.1").exists()
+        assert not (tmp_path / "bot.log.3").exists()
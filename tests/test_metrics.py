@@ -0,0 +1,109 @@
+import logging
+from unittest.mock import MagicMock
+
+import pytest
+
+from metrics import BUCKETS, Histogram, Metrics, MetricsReporter, format_duration
+
+
+class TestHistogram:
+    def test_empty(self):
+        histogram = Histogram()
+        assert histogram.percentile(0.5) == 0.0
+        assert histogram.snapshot()["count"] == 0
+
+    def test_percentiles_are_bucket_upper_bounds(self):
+        histogram = Histogram()
+        for _ in range(90):
+            histogram.observe(0.004)   # 5 ms bucket
+        for _ in range(9):
+            histogram.observe(0.2)     # 250 ms bucket
+        histogram.observe(3.0)         # 5 s bucket
+
+        assert histogram.percentile(0.50) == 0.005
+        assert histogram.percentile(0.95) == 0.25
+        assert histogram.percentile(0.99) == 0.25
+        assert histogram.percentile(1.0) == 3.0  # capped at the slowest sample
+
+    def test_overflow_reports_the_slowest_sample(self):
+        histogram = Histogram()
+        histogram.observe(BUCKETS[-1] * 3)
+        assert histogram.percentile(0.5) == BUCKETS[-1] * 3
+
+    def test_errors_and_average(self):
+        histogram = Histogram()
+        histogram.observe(0.1)
+        histogram.observe(0.3, error=True)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 2
+        assert snapshot["errors"] == 1
+        assert snapshot["avg"] == pytest.approx(0.2)
+        assert snapshot["max"] == 0.3
+
+
+class TestMetrics:
+    def test_histograms_are_kept_per_group_and_name(self):
+        metrics = Metrics()
+        metrics.observe("command", "!weather", 0.1)
+        metrics.observe("command", "!weather", 0.2, error=True)
+        metrics.observe("upstream", "api.example.com", 0.05)
+
+        commands = metrics.snapshot("command")
+        assert list(commands) == ["!weather"]
+        assert commands["!weather"]["count"] == 2
+        assert commands["!weather"]["errors"] == 1
+        assert list(metrics.snapshot("upstream")) == ["api.example.com"]
+
+    def test_summary_lists_busiest_first(self):
+        metrics = Metrics()
+        metrics.observe("command", "!time", 0.002)
+        for _ in range(3):
+            metrics.observe("command", "!weather", 0.2, error=True)
+
+        assert metrics.summary("command") == (
+            "!weather 3x p50=200ms p95=200ms p99=200ms err=3; "
+            "!time 1x p50=2ms p95=2ms p99=2ms"
+        )
+        assert metrics.summary("command", limit=1).startswith("!weather")
+
+    def test_cache_misses_are_labelled_as_such(self):
+        metrics = Metrics()
+        metrics.observe("cache", "!weather", 0.00005, error=True)
+        assert metrics.summary("cache").endswith("miss=1")
+
+    def test_format_duration(self):
+        assert format_duration(0.00025) == "0.2ms"
+        assert format_duration(0.12) == "120ms"
+        assert format_duration(2.5) == "2.5s"
+
+
+class TestMetricsReporter:
+    def test_report_logs_one_line_per_active_group(self, caplog):
+        metrics = Metrics()
+        metrics.observe("command", "!weather", 0.1)
+
+        with caplog.at_level(logging.INFO, logger="metrics"):
+            MetricsReporter(metrics, interval=60).report()
+
+        assert caplog.messages == [
+            "Metrics (command): !weather 1x p50=100ms p95=100ms p99=100ms"
+        ]
+
+    def test_zero_interval_disables_reporting(self):
+        reporter = MetricsReporter(MagicMock(), interval=0)
+        reporter.start()
+        assert reporter._thread is None
+
+    def test_reports_periodically_until_stopped(self):
+        metrics = MagicMock()
+        metrics.summary.return_value = ""
+        reporter = MetricsReporter(metrics, interval=0.01)
+
+        reporter.start()
+        reporter._thread.join(0.05)
+        reporter.stop()
+        reporter._thread.join(1)
+
+        assert metrics.summary.called
+        assert not reporter._thread.is_alive()
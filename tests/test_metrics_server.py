@@ -0,0 +1,135 @@
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from http_client import HttpClient
+from irc_bot import IrcBot
+from irc_protocol import parse_message
+from metrics import Metrics
+from metrics_server import MetricsServer, PrometheusExporter
+
+
+@pytest.fixture
+def bot():
+    bot = IrcBot(channels=["#chan"])
+    bot.send_raw = MagicMock()
+    return bot
+
+
+def samples(text):
+    """{"name{labels}": value} of the non-comment lines."""
+    result = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            result[name] = float(value)
+    return result
+
+
+class TestPrometheusExporter:
+    def test_irc_counters(self, bot):
+        bot.dispatch(parse_message(b"PING :irc.example.org"))
+        bot.dispatch(parse_message(b":nick!u@h NOTICE #chan :hi"))
+
+        values = samples(PrometheusExporter(bot, Metrics()).render())
+
+        assert values["kukistibot_lines_received_total"] == 2
+        assert values["kukistibot_send_queue_depth"] == 0
+        assert values["kukistibot_registered"] == 0
+        assert values["kukistibot_threads"] >= 1
+        assert values["kukistibot_liiga_trackers"] == 0
+
+    def test_cache_and_url_outcomes(self, bot):
+        bot.command_handler.cache.lookup("missing")
+        bot.url_fetcher.outcomes["title"] += 3
+        bot.url_fetcher.outcomes["blocked"] += 1
+
+        values = samples(PrometheusExporter(bot, Metrics()).render())
+
+        assert values['kukistibot_cache_lookups_total{cache="responses",result="miss"}'] == 1
+        assert values['kukistibot_url_titles_total{outcome="title"}'] == 3
+        assert values['kukistibot_url_titles_total{outcome="blocked"}'] == 1
+
+    def test_coalesced_executions(self, bot):
+        bot.command_handler.single_flight.do("k", lambda: "x")
+
+        values = samples(PrometheusExporter(bot, Metrics()).render())
+
+        assert values['kukistibot_command_executions_total{result="executed"}'] == 1
+        assert values['kukistibot_command_executions_total{result="collapsed"}'] == 0
+
+    def test_histograms_are_cumulative(self, bot):
+        metrics = Metrics()
+        metrics.observe("command", "!weather", 0.03)
+        metrics.observe("command", "!weather", 0.3, error=True)
+
+        text = PrometheusExporter(bot, metrics).render()
+        values = samples(text)
+
+        assert "# TYPE kukistibot_command_duration_seconds histogram" in text
+        assert values['kukistibot_command_duration_seconds_bucket{command="!weather",le="0.01"}'] == 0
+        assert values['kukistibot_command_duration_seconds_bucket{command="!weather",le="0.05"}'] == 1
+        assert values['kukistibot_command_duration_seconds_bucket{command="!weather",le="0.5"}'] == 2
+        assert values['kukistibot_command_duration_seconds_bucket{command="!weather",le="+Inf"}'] == 2
+        assert values['kukistibot_command_duration_seconds_count{command="!weather"}'] == 2
+        assert values['kukistibot_command_duration_seconds_sum{command="!weather"}'] == pytest.approx(0.33)
+        assert values['kukistibot_command_errors_total{command="!weather"}'] == 1
+
+    def test_cache_misses_are_not_exported_as_errors(self, bot):
+        metrics = Metrics()
+        metrics.observe("cache", "!weather", 0.0001, error=True)
+
+        text = PrometheusExporter(bot, metrics).render()
+
+        assert 'kukistibot_response_cache_lookup_duration_seconds_count{command="!weather"} 1' in text
+        assert "cache_errors_total" not in text
+
+    def test_label_values_are_escaped(self, bot):
+        metrics = Metrics()
+        metrics.observe("upstream", 'we"ird\\host', 0.1)
+
+        text = PrometheusExporter(bot, metrics).render()
+
+        assert 'host="we\\"ird\\\\host"' in text
+
+
+    def test_link_titles_share_one_upstream_series(self, bot):
+        metrics = Metrics()
+        fetcher = bot.url_fetcher
+        fetcher.session = HttpClient(metrics=metrics)
+        fetcher.host_limiter.min_interval = 0
+        response = MagicMock(status_code=200, headers={"Content-Type": "text/html"})
+        response.iter_content.side_effect = lambda chunk_size=1: iter([b"<title>Page</title>"])
+        with patch.object(requests.Session, "request", return_value=response):
+            for i in range(20):
+                assert fetcher.get_title(f"https://site{i}.example.com/") == "Page"
+
+        text = PrometheusExporter(bot, metrics).render()
+
+        hosts = {line.split('host="', 1)[1].split('"', 1)[0]
+                 for line in text.splitlines() if 'host="' in line}
+        assert hosts == {"link_titles"}
+        assert samples(text)['kukistibot_upstream_request_duration_seconds_count{host="link_titles"}'] == 20
+
+
+class TestMetricsServer:
+    def test_serves_metrics_on_localhost(self, bot):
+        server = MetricsServer(bot, port=0, metrics=Metrics())
+        server.start()
+        try:
+            url = f"http://127.0.0.1:{server.port}"
+            with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+                assert b"kukistibot_lines_received_total 0" in response.read()
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{url}/other", timeout=5)
+        finally:
+            server.stop()
+
+    def test_bot_starts_it_only_when_configured(self, bot, monkeypatch):
+        monkeypatch.delenv("METRICS_PORT", raising=False)
+        bot.start_metrics_server()
+        assert bot.metrics_server is None
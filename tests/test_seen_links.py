@@ -0,0 +1,88 @@
+import pytest
+
+from seen_links import BloomFilter, SeenLinks, format_age
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestBloomFilter:
+    def test_added_keys_are_always_found(self):
+        bloom = BloomFilter(capacity=1000)
+        keys = [f"https://example.com/{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys)
+
+    def test_false_positive_rate_is_close_to_target(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"in-{i}")
+        false_positives = sum(f"out-{i}" in bloom for i in range(10000))
+        assert false_positives < 300  # ~1% expected
+
+    def test_size_is_fixed(self):
+        bloom = BloomFilter(capacity=1000)
+        size = len(bloom.bits)
+        for i in range(100_000):
+            bloom.add(str(i))
+        assert len(bloom.bits) == size
+
+
+class TestSeenLinks:
+    def test_first_post_is_new_and_repost_returns_first_poster(self, clock):
+        seen = SeenLinks(clock=clock)
+        assert seen.check_and_record("#chan", "https://example.com/", "alice") is None
+        clock.now += 60
+        assert seen.check_and_record("#chan", "https://example.com/", "bob") == ("alice", 1_000_000.0)
+        assert seen.check_and_record("#chan", "https://example.com/", "carol") == ("alice", 1_000_000.0)
+
+    def test_channels_are_separate_and_case_insensitive(self, clock):
+        seen = SeenLinks(clock=clock)
+        seen.check_and_record("#Chan", "https://example.com/", "alice")
+        assert seen.lookup("#chan", "https://example.com/") == ("alice", 1_000_000.0)
+        assert seen.lookup("#other", "https://example.com/") is None
+
+    def test_memory_is_bounded(self, clock):
+        seen = SeenLinks(memory_size=100, clock=clock)
+        for i in range(1000):
+            seen.check_and_record("#chan", f"https://example.com/{i}", "alice")
+        assert len(seen._recent) == 100
+
+    def test_links_evicted_from_memory_are_found_on_disk(self, tmp_path, clock):
+        seen = SeenLinks(path=str(tmp_path / "seen.db"), memory_size=10, clock=clock)
+        for i in range(100):
+            seen.check_and_record("#chan", f"https://example.com/{i}", f"nick{i}")
+        assert seen.lookup("#chan", "https://example.com/0") == ("nick0", 1_000_000.0)
+
+    def test_store_survives_restart(self, tmp_path, clock):
+        path = str(tmp_path / "seen.db")
+        seen = SeenLinks(path=path, clock=clock)
+        seen.check_and_record("#chan", "https://example.com/", "alice")
+        seen.close()
+
+        reopened = SeenLinks(path=path, clock=clock)
+        assert reopened.check_and_record("#chan", "https://example.com/", "bob") == ("alice", 1_000_000.0)
+
+    def test_unseen_link_skips_the_disk(self, tmp_path, clock):
+        seen = SeenLinks(path=str(tmp_path / "seen.db"), clock=clock)
+        seen.check_and_record("#chan", "https://example.com/a", "alice")
+        seen._db.close()  # Any query would now fail
+        assert seen.lookup("#chan", "https://example.com/never-posted") is None
+
+
+@pytest.mark.parametrize("seconds, expected", [
+    (5, "5s"), (300, "5min"), (3 * 3600 + 100, "3h"), (2 * 86400, "2d"), (400 * 86400, "1y"),
+])
+def test_format_age(seconds, expected):
+    assert format_age(seconds) == expected
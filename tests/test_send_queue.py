@@ -0,0 +1,133 @@
+import threading
+
+import pytest
+
+from send_queue import SendQueue, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class Recorder:
+    """Collects written lines and lets a test wait for a given count."""
+
+    def __init__(self):
+        self.lines = []
+        self._cond = threading.Condition()
+
+    def __call__(self, line):
+        with self._cond:
+            self.lines.append(line)
+            self._cond.notify_all()
+
+    def wait_for(self, count, timeout=2):
+        with self._cond:
+            assert self._cond.wait_for(lambda: len(self.lines) >= count, timeout=timeout), self.lines
+        return self.lines
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+class TestTokenBucket:
+    def test_burst_then_wait(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=0.5, capacity=3, clock=clock)
+        assert [bucket.consume() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.consume() == pytest.approx(2.0)
+
+    def test_refills_over_time_up_to_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+        bucket.consume()
+        bucket.consume()
+        clock.now += 100
+        assert bucket.consume() == 0.0
+        assert bucket.consume() == 0.0
+        assert bucket.consume() > 0
+
+
+class TestSendQueue:
+    def test_targets_are_served_round_robin(self, recorder):
+        queue = SendQueue(recorder, rate=1000, burst=1000)
+        for i in range(3):
+            queue.put(f"PRIVMSG #a :a{i}")
+        queue.put("PRIVMSG #b :b0")
+        queue.put("PRIVMSG #c :c0")
+        queue.start()
+        try:
+            lines = recorder.wait_for(5)
+        finally:
+            queue.close()
+        assert lines == [
+            "PRIVMSG #a :a0",
+            "PRIVMSG #b :b0",
+            "PRIVMSG #c :c0",
+            "PRIVMSG #a :a1",
+            "PRIVMSG #a :a2",
+        ]
+
+    def test_pong_and_quit_jump_the_queue(self, recorder):
+        queue = SendQueue(recorder, rate=1000, burst=1000)
+        queue.put("PRIVMSG #a :one")
+        queue.put("PRIVMSG #a :two")
+        queue.put("PONG :server")
+        queue.put("QUIT :bye")
+        queue.start()
+        try:
+            lines = recorder.wait_for(4)
+        finally:
+            queue.close()
+        assert lines[:2] == ["PONG :server", "QUIT :bye"]
+
+    def test_rate_limit_holds_lines_beyond_burst(self, recorder):
+        queue = SendQueue(recorder, rate=0.01, burst=2)
+        for i in range(4):
+            queue.put(f"PRIVMSG #a :{i}")
+        queue.start()
+        try:
+            recorder.wait_for(2)
+            with pytest.raises(AssertionError):
+                recorder.wait_for(3, timeout=0.2)
+        finally:
+            queue.close(timeout=0)
+        assert queue.stats()["depth"] == 2
+
+    def test_write_errors_are_counted_not_raised(self):
+        done = threading.Event()
+
+        def broken_write(line):
+            done.set()
+            raise OSError("socket closed")
+
+        queue = SendQueue(broken_write, rate=1000, burst=1000)
+        queue.put("PRIVMSG #a :x")
+        queue.start()
+        assert done.wait(2)
+        queue.close()
+        assert queue.stats()["write_errors"] == 1
+        assert queue.stats()["sent"] == 0
+
+    def test_stats_report_depth_per_target(self, recorder):
+        queue = SendQueue(recorder)
+        queue.put("PRIVMSG #A :x")
+        queue.put("PRIVMSG #a :y")
+        queue.put("JOIN #b")
+        stats = queue.stats()
+        assert stats["depth"] == 3
+        assert stats["per_target"] == {"#a": 2, "": 1}
+        assert stats["max_depth"] == 3
+
+    def test_clear_drops_pending_lines(self, recorder):
+        queue = SendQueue(recorder)
+        queue.put("PRIVMSG #a :x")
+        queue.put("PONG :s")
+        queue.clear()
+        assert queue.stats()["depth"] == 0
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight, SingleFlightTimeout
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+class TestSingleFlight:
+    def test_sequential_calls_each_execute(self):
+        flight = SingleFlight()
+        assert flight.do("k", lambda: 1) == 1
+        assert flight.do("k", lambda: 2) == 2
+        assert flight.stats() == {"executed": 2, "collapsed": 0, "timed_out": 0, "in_flight": 0}
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(2)
+            return "result"
+
+        leader = threading.Thread(target=flight.do, args=("k", slow))
+        leader.start()
+        while flight.stats()["in_flight"] == 0:
+            time.sleep(0.001)
+        threads, results, _ = run_concurrently(4, lambda: flight.do("k", slow))
+        while flight.stats()["collapsed"] < 4:
+            time.sleep(0.001)
+        release.set()
+        for t in threads + [leader]:
+            t.join(2)
+
+        assert calls == [1]
+        assert results == ["result"] * 4
+        assert flight.stats()["collapsed"] == 4
+
+    def test_different_keys_do_not_collapse(self):
+        flight = SingleFlight()
+        assert flight.do("a", lambda: "a") == "a"
+        assert flight.do("b", lambda: "b") == "b"
+        assert flight.stats()["executed"] == 2
+
+    def test_error_is_shared_with_waiters_and_key_is_freed(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def failing():
+            release.wait(2)
+            raise RuntimeError("upstream down")
+
+        threads, _, errors = run_concurrently(3, lambda: flight.do("k", failing))
+        while flight.stats()["executed"] + flight.stats()["collapsed"] < 3:
+            time.sleep(0.001)
+        release.set()
+        for t in threads:
+            t.join(2)
+
+        assert all(isinstance(e, RuntimeError) for e in errors)
+        assert flight.stats()["in_flight"] == 0
+        with pytest.raises(ValueError):
+            flight.do("k", lambda: (_ for _ in ()).throw(ValueError("again")))
+
+    def test_waiters_time_out_on_a_hung_call(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        leader = threading.Thread(target=flight.do, args=("k", lambda: release.wait(5)))
+        leader.start()
+        while flight.stats()["in_flight"] == 0:
+            time.sleep(0.001)
+        try:
+            with pytest.raises(SingleFlightTimeout):
+                flight.do("k", lambda: "never runs", timeout=0.05)
+            assert flight.stats()["timed_out"] == 1
+        finally:
+            release.set()
+            leader.join(2)
+        assert flight.stats()["in_flight"] == 0
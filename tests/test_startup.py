@@ -0,0 +1,59 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# From launching the interpreter to the NICK line reaching the server. The bot
+# needs ~0.15s here; importing every command eagerly used to take 0.5s+.
+STARTUP_BUDGET = 1.5
+
+# Only needed once someone uses the command that depends on them.
+HEAVY_MODULES = ("yfinance", "pandas", "numpy", "pycoingecko", "bs4", "pytz", "dotenv")
+
+
+def bot_env():
+    env = dict(os.environ)
+    env.pop("WEATHER_API_KEY", None)  # A misconfigured command mustn't stop startup
+    return env
+
+
+def test_time_to_connect_is_within_budget():
+    server = socket.create_server(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+    script = (
+        f"import sys; sys.path.insert(0, {SRC_DIR!r}); from irc_bot import IrcBot; "
+        f"IrcBot(server='127.0.0.1', port={port}).connect()"
+    )
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", script], env=bot_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        server.settimeout(STARTUP_BUDGET * 10)
+        conn, _ = server.accept()
+        conn.settimeout(STARTUP_BUDGET * 10)
+        received = b""
+        while b"NICK" not in received:
+            data = conn.recv(4096)
+            assert data, "bot closed the connection before registering"
+            received += data
+        elapsed = time.perf_counter() - start
+        conn.close()
+    finally:
+        proc.kill()
+        proc.wait()
+        server.close()
+    assert elapsed < STARTUP_BUDGET, f"time to connect {elapsed:.2f}s exceeds {STARTUP_BUDGET}s budget"
+
+
+def test_heavy_dependencies_are_not_imported_at_startup():
+    script = (
+        f"import sys; sys.path.insert(0, {SRC_DIR!r}); from irc_bot import IrcBot; IrcBot(); "
+        f"print('imported:', [m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    result = subprocess.run([sys.executable, "-c", script], env=bot_env(),
+                            capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert "imported: []" in result.stdout.splitlines()
@@ -0,0 +1,39 @@
+from cache import TTLCache
+from metrics import Metrics
+from singleflight import SingleFlight
+from stats_command import StatsCommand
+
+
+def make_command():
+    metrics = Metrics()
+    metrics.observe("command", "!weather", 0.3)
+    metrics.observe("upstream", "api.weatherapi.com", 0.2, error=True)
+    metrics.observe("cache", "!weather", 0.00005, error=True)
+    return StatsCommand(metrics, TTLCache(maxsize=8))
+
+
+class TestStatsCommand:
+    def test_commands_by_default(self):
+        assert make_command().execute("") == "Stats (commands): !weather 1x p50=300ms p95=300ms p99=300ms"
+
+    def test_upstreams(self):
+        assert make_command().execute("upstreams") == (
+            "Stats (upstreams): api.weatherapi.com 1x p50=200ms p95=200ms p99=200ms err=1"
+        )
+
+    def test_cache_includes_hit_rate(self):
+        assert make_command().execute("cache").startswith("Stats (cache): 0/8 entries, hit rate 0%; !weather 1x")
+
+    def test_cache_includes_coalesced_executions(self):
+        flight = SingleFlight()
+        flight.do("k", lambda: "x")
+        command = StatsCommand(Metrics(), single_flight=flight)
+        assert command.execute("cache") == (
+            "Stats (cache): nothing recorded yet; coalesced 0 of 1 executions, 0 timed out"
+        )
+
+    def test_nothing_recorded(self):
+        assert StatsCommand(Metrics()).execute("") == "Stats (commands): nothing recorded yet"
+
+    def test_unknown_section(self):
+        assert make_command().execute("bogus") == "Usage: !stats [commands|upstreams|cache]"
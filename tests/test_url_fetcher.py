@@ -1,16 +1,23 @@
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 import requests
 
+from src.domain_rules import DomainRule, DomainRules
+from src.seen_links import SeenLinks
 from src.url_fetcher import URLFetcher
 
 
-def make_response(text="", status_code=200, apparent_encoding="utf-8"):
+def make_response(text="", status_code=200, content_type="text/html; charset=utf-8", content_length=None):
     resp = MagicMock()
     resp.status_code = status_code
     resp.text = text
-    resp.apparent_encoding = apparent_encoding
+    resp.headers = {"Content-Type": content_type}
+    if content_length is not None:
+        resp.headers["Content-Length"] = str(content_length)
+    resp.iter_content.side_effect = lambda chunk_size=1: iter([text.encode("utf-8")])
     resp.raise_for_status = MagicMock()
     if status_code >= 400:
         resp.raise_for_status.side_effect = requests.exceptions.HTTPError(response=resp)
@@ -24,7 +31,11 @@ def bot():
 
 @pytest.fixture
 def fetcher(bot):
-    return URLFetcher(bot)
+    fetcher = URLFetcher(bot)
+    fetcher.host_limiter.min_interval = 0  # Tests hit the same host back to back
+    fetcher.seen_links = SeenLinks()  # In memory only, no seen_links.db
+    fetcher.youtube.cache.path = None  # Likewise for youtube_cache.db
+    return fetcher
 
 
 class TestExtractUrls:
@@ -89,6 +100,97 @@ class TestGetTitle:
             result = fetcher.get_title("https://example.com/page")
         assert result is None
 
+    def test_generic_page_is_streamed_and_closed(self, fetcher):
+        resp = make_response("<html><head><title>T</title></head></html>")
+        with patch.object(fetcher.session, "get", return_value=resp) as mock_get:
+            fetcher.get_title("https://example.com/page")
+        assert mock_get.call_args.kwargs["stream"] is True
+        resp.close.assert_called_once()
+
+    def test_generic_page_uses_header_charset(self, fetcher):
+        resp = make_response(content_type="text/html; charset=iso-8859-1")
+        resp.iter_content.side_effect = lambda chunk_size=1: iter(["<title>Sää</title>".encode("latin-1")])
+        with patch.object(fetcher.session, "get", return_value=resp):
+            result = fetcher.get_title("https://example.com/page")
+        assert result == "Sää"
+
+    def test_parse_pool_is_started_with_the_fetcher(self, bot, monkeypatch):
+        monkeypatch.setattr(URLFetcher, "PARSE_PROCESSES", 2)
+        with patch("src.url_fetcher.TitleParsePool") as pool_class:
+            fetcher = URLFetcher(bot)
+        pool_class.assert_called_once_with(2)
+        fetcher.parse_pool.start.assert_called_once_with(wait=False)
+
+    def test_parse_pool_gets_only_the_head(self, fetcher):
+        fetcher.parse_pool = MagicMock()
+        fetcher.parse_pool.extract_title.return_value = "Pooled"
+        page = b"<html><head><title>Pooled</title></head><body>" + b"<p>x</p>" * 1000
+        resp = make_response()
+        resp.iter_content.side_effect = lambda chunk_size=1: iter([page[i:i + 32] for i in range(0, len(page), 32)])
+        with patch.object(fetcher.session, "get", return_value=resp):
+            assert fetcher.get_title("https://example.com/") == "Pooled"
+        head = fetcher.parse_pool.extract_title.call_args.args[0]
+        assert head.startswith(b"<html><head><title>Pooled</title></head>")
+        assert len(head) <= 64
+        assert fetcher.parse_pool.extract_title.call_args.kwargs["header_charset"] == "utf-8"
+
+    def test_binary_resource_is_summarized_without_reading_body(self, fetcher):
+        resp = make_response(content_type="application/x-iso9660-image", content_length=2_100_000_000)
+        with patch.object(fetcher.session, "get", return_value=resp):
+            result = fetcher.get_title("https://example.com/debian.iso")
+        assert result == "[application/x-iso9660-image, 2.1 GB]"
+        resp.iter_content.assert_not_called()
+        resp.close.assert_called_once()
+
+    def test_non_html_without_length_reports_type_only(self, fetcher):
+        resp = make_response(content_type="image/png")
+        with patch.object(fetcher.session, "get", return_value=resp):
+            assert fetcher.get_title("https://example.com/cat.png") == "[image/png]"
+
+    def test_missing_content_type_is_parsed_as_html(self, fetcher):
+        resp = make_response("<title>Untyped</title>", content_type=None)
+        with patch.object(fetcher.session, "get", return_value=resp):
+            assert fetcher.get_title("https://example.com/") == "Untyped"
+
+    def test_xhtml_is_parsed_as_html(self, fetcher):
+        resp = make_response("<title>XHTML</title>", content_type="application/xhtml+xml")
+        with patch.object(fetcher.session, "get", return_value=resp):
+            assert fetcher.get_title("https://example.com/") == "XHTML"
+
+    @pytest.mark.parametrize("size, expected", [
+        (512, "512 B"), (3400, "3.4 kB"), (2_400_000, "2.4 MB"), (1_500_000_000, "1.5 GB"),
+    ])
+    def test_format_size(self, fetcher, size, expected):
+        assert fetcher.format_size(size) == expected
+
+    def test_lookalike_domain_is_not_treated_as_youtube(self, fetcher):
+        html = "<title>Not YouTube</title>"
+        with patch.object(fetcher.session, "get", return_value=make_response(html)) as mock_get:
+            result = fetcher.get_title("https://notyoutube.com.evil/watch?v=abc")
+        assert result == "Not YouTube"
+        assert mock_get.call_args.args[0] == "https://notyoutube.com.evil/watch?v=abc"
+
+    def test_domain_rule_timeout_is_used(self, fetcher):
+        fetcher.domain_rules = DomainRules([DomainRule("slow.example.com", timeout=12)])
+        with patch.object(fetcher.session, "get", return_value=make_response("<title>x</title>")) as mock_get:
+            fetcher.get_title("https://www.slow.example.com/")
+        assert mock_get.call_args.kwargs["timeout"] == 12
+
+    def test_host_in_backoff_is_skipped_and_not_cached(self, fetcher):
+        with patch.object(fetcher.session, "get", side_effect=requests.exceptions.Timeout) as mock_get:
+            fetcher.get_title("https://slow.example.com/1")
+            fetcher.get_title("https://slow.example.com/2")  # Second failure -> backoff
+            assert fetcher.get_title("https://slow.example.com/3") is None
+        assert mock_get.call_count == 2
+        assert fetcher.title_cache.get(("url", "https://slow.example.com/3")) is None
+
+    def test_server_errors_count_towards_backoff(self, fetcher):
+        with patch.object(fetcher.session, "get", return_value=make_response(status_code=503)) as mock_get:
+            assert fetcher.get_title("https://down.example.com/1") == "Error: HTTP 503"
+            fetcher.get_title("https://down.example.com/2")
+            assert fetcher.get_title("https://down.example.com/3") is None
+        assert mock_get.call_count == 2
+
     def test_timeout_returns_friendly_error(self, fetcher):
         with patch.object(fetcher.session, "get", side_effect=requests.exceptions.Timeout):
             result = fetcher.get_title("https://example.com/page")
@@ -116,6 +218,26 @@ class TestGetTitle:
         called_url = mock_get.call_args[0][0]
         assert "v=xyz789" in called_url
 
+    @pytest.mark.parametrize("url", [
+        "https://m.youtube.com/watch?v=abc123",
+        "https://music.youtube.com/watch?v=abc123&list=RD",
+        "https://www.youtube.com/live/abc123?feature=share",
+        "https://www.youtube-nocookie.com/embed/abc123",
+    ])
+    def test_other_youtube_url_forms_use_oembed(self, fetcher, url):
+        with patch.object(fetcher.session, "get", return_value=make_response()) as mock_get:
+            mock_get.return_value.json.return_value = {"title": "T", "author_name": "A"}
+            assert fetcher.get_title(url) == "YouTube: T (by A)"
+        assert "v=abc123&" in mock_get.call_args[0][0]
+
+    def test_youtube_info_is_cached_by_video_id_beyond_title_cache(self, fetcher):
+        with patch.object(fetcher.session, "get", return_value=make_response()) as mock_get:
+            mock_get.return_value.json.return_value = {"title": "T", "author_name": "A"}
+            fetcher.get_title("https://www.youtube.com/watch?v=abc123")
+            fetcher.title_cache.clear()
+            assert fetcher.get_title("https://youtu.be/abc123") == "YouTube: T (by A)"
+        assert mock_get.call_count == 1
+
     def test_youtube_invalid_url_returns_error(self, fetcher):
         result = fetcher.get_title("https://www.youtube.com/watch")
         assert "Invalid YouTube URL" in result
@@ -138,6 +260,200 @@ class TestDetectAndFetch:
         mock_get.assert_not_called()
         bot.send_message.assert_not_called()
 
+    def test_repost_mentions_first_poster(self, fetcher, bot):
+        html = "<title>News</title>"
+        fetcher.seen_links.clock = lambda: 1_000_000.0
+        with patch.object(fetcher.session, "get", return_value=make_response(html)):
+            fetcher.detect_and_fetch("alice", "#chan", "https://example.com/news?utm_source=x")
+        with patch.object(fetcher.session, "get", return_value=make_response(html)), \
+                patch("time.time", return_value=1_000_000.0 + 3 * 3600):
+            fetcher.detect_and_fetch("bob", "#chan", "again https://EXAMPLE.com/news")
+        assert bot.send_message.call_args_list[0].args == ("#chan", "News")
+        assert bot.send_message.call_args_list[1].args == ("#chan", "News (posted by alice 3h ago)")
+
+    def test_own_repost_gets_no_note(self, fetcher, bot):
+        with patch.object(fetcher.session, "get", return_value=make_response("<title>News</title>")):
+            fetcher.detect_and_fetch("alice", "#chan", "https://example.com/news")
+            fetcher.detect_and_fetch("alice", "#chan", "https://example.com/news")
+        assert [c.args[1] for c in bot.send_message.call_args_list] == ["News", "News"]
+
+    def test_repost_note_fits_within_the_title_limit(self, fetcher, bot):
+        html = f"<title>{'Long headline ' * 40}</title>"
+        with patch.object(fetcher.session, "get", return_value=make_response(html)):
+            fetcher.detect_and_fetch("alice", "#chan", "https://example.com/news")
+            fetcher.detect_and_fetch("bob", "#chan", "https://example.com/news")
+        message = bot.send_message.call_args_list[1].args[1]
+        assert len(message) <= fetcher.MAX_TITLE_LENGTH
+        assert "... (posted by alice " in message
+        assert message.endswith(" ago)")
+
+    def test_same_link_on_another_channel_is_not_a_repost(self, fetcher, bot):
+        with patch.object(fetcher.session, "get", return_value=make_response("<title>News</title>")):
+            fetcher.detect_and_fetch("alice", "#smliiga", "https://example.com/news")
+            fetcher.detect_and_fetch("bob", "#valioliiga", "https://example.com/news")
+        assert [c.args[1] for c in bot.send_message.call_args_list] == ["News", "News"]
+
+    def test_multiple_urls_are_fetched_concurrently_and_posted_in_order(self, fetcher, bot):
+        started = threading.Barrier(3, timeout=2)
+
+        def fake_get_title(url):
+            started.wait()  # Only passes if all three fetches run at once
+            if url.endswith("/1"):
+                time.sleep(0.05)  # First link is the slowest, still posted first
+            return f"Title {url[-1]}"
+
+        with patch.object(fetcher, "get_title", side_effect=fake_get_title):
+            fetcher.detect_and_fetch("nick", "#chan", "https://a.com/1 https://b.com/2 https://c.com/3")
+        fetcher.close()
+        assert [c.args[1] for c in bot.send_message.call_args_list] == ["Title 1", "Title 2", "Title 3"]
+
+    def test_per_message_concurrency_is_bounded(self, fetcher, bot):
+        fetcher.MAX_FETCHES_PER_MESSAGE = 2
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def fake_get_title(url):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return url
+
+        with patch.object(fetcher, "get_title", side_effect=fake_get_title):
+            fetcher.detect_and_fetch("nick", "#chan", " ".join(f"https://e.com/{i}" for i in range(5)))
+        fetcher.close()
+        assert peak[0] == 2
+        assert bot.send_message.call_count == 5
+
+    def test_urls_per_message_are_capped_and_deduplicated(self, fetcher, bot):
+        urls = ["https://e.com/1", "https://e.com/1"] + [f"https://e.com/{i}" for i in range(2, 10)]
+        with patch.object(fetcher, "get_title", side_effect=lambda url: url) as mock_get_title:
+            fetcher.detect_and_fetch("nick", "#chan", " ".join(urls))
+        fetcher.close()
+        fetched = [c.args[0] for c in mock_get_title.call_args_list]
+        assert sorted(fetched) == sorted(f"https://e.com/{i}" for i in range(1, 6))
+        assert [c.args[1] for c in bot.send_message.call_args_list] == [f"https://e.com/{i}" for i in range(1, 6)]
+
+
+class TestTitleCache:
+    def test_repeat_url_is_served_from_cache(self, fetcher):
+        html = "<title>Cached</title>"
+        with patch.object(fetcher.session, "get", return_value=make_response(html)) as mock_get:
+            assert fetcher.get_title("https://example.com/a") == "Cached"
+            assert fetcher.get_title("https://example.com/a") == "Cached"
+        assert mock_get.call_count == 1
+
+    def test_outcomes_are_counted(self, fetcher):
+        with patch.object(fetcher.session, "get", return_value=make_response("<title>Counted</title>")):
+            fetcher.get_title("https://example.com/a")
+            fetcher.get_title("https://example.com/a")
+        fetcher.get_title("https://x.com/some/post")
+        assert fetcher.outcomes == {"title": 1, "cached": 1, "blocked": 1}
+
+    def test_tracking_params_and_host_case_share_an_entry(self, fetcher):
+        html = "<title>Same</title>"
+        with patch.object(fetcher.session, "get", return_value=make_response(html)) as mock_get:
+            fetcher.get_title("https://example.com/a?id=1&utm_source=fb&fbclid=abc")
+            fetcher.get_title("https://EXAMPLE.com/a?id=1#comments")
+        assert mock_get.call_count == 1
+
+    def test_different_query_is_a_different_entry(self, fetcher):
+        with patch.object(fetcher.session, "get", return_value=make_response("<title>x</title>")) as mock_get:
+            fetcher.get_title("https://example.com/a?id=1")
+            fetcher.get_title("https://example.com/a?id=2")
+        assert mock_get.call_count == 2
+
+    def test_youtube_links_are_keyed_by_video_id(self, fetcher):
+        resp = make_response()
+        resp.json.return_value = {"title": "Video", "author_name": "Channel"}
+        with patch.object(fetcher.session, "get", return_value=resp) as mock_get:
+            fetcher.get_title("https://www.youtube.com/watch?v=abc123&si=xyz")
+            fetcher.get_title("https://youtu.be/abc123?si=other")
+        assert mock_get.call_count == 1
+
+    def test_page_without_title_is_cached(self, fetcher):
+        with patch.object(fetcher.session, "get", return_value=make_response("<p>no title</p>")) as mock_get:
+            assert fetcher.get_title("https://example.com/") is None
+            assert fetcher.get_title("https://example.com/") is None
+        assert mock_get.call_count == 1
+
+    def test_errors_are_cached_briefly(self, fetcher):
+        now = [0.0]
+        fetcher.title_cache.clock = lambda: now[0]
+        with patch.object(fetcher.session, "get", side_effect=requests.exceptions.Timeout) as mock_get:
+            fetcher.get_title("https://slow.example.com/")
+            fetcher.get_title("https://slow.example.com/")
+            assert mock_get.call_count == 1
+            now[0] += fetcher.ERROR_TTL + 1
+            fetcher.get_title("https://slow.example.com/")
+        assert mock_get.call_count == 2
+
+    def test_normalize_url(self, fetcher):
+        assert (fetcher.normalize_url("HTTPS://Example.com/a?utm_medium=x&id=1&si=2#top")
+                == "https://example.com/a?id=1")
+
+
+def make_redirect(location, status_code=301):
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.headers = {"Location": location} if location else {}
+    return resp
+
+
+class TestShortLinks:
+    def test_short_link_is_resolved_and_final_page_titled(self, fetcher):
+        with patch.object(fetcher.session, "head", return_value=make_redirect("https://example.com/article")), \
+                patch.object(fetcher.session, "get", return_value=make_response("<title>Article</title>")) as mock_get:
+            assert fetcher.get_title("https://t.co/abc") == "Article"
+        assert mock_get.call_args.args[0] == "https://example.com/article"
+
+    def test_short_link_to_blacklisted_domain_is_skipped(self, fetcher):
+        with patch.object(fetcher.session, "head", return_value=make_redirect("https://x.com/someone/status/1")), \
+                patch.object(fetcher.session, "get") as mock_get:
+            assert fetcher.get_title("https://t.co/abc") is None
+        mock_get.assert_not_called()
+
+    def test_redirect_chain_through_several_shorteners(self, fetcher):
+        hops = {
+            "https://lnkd.in/x": make_redirect("https://bit.ly/y"),
+            "https://bit.ly/y": make_redirect("/z", status_code=302),  # Relative Location
+            "https://bit.ly/z": make_redirect("https://example.com/final"),
+        }
+        with patch.object(fetcher.session, "head", side_effect=lambda url, **kw: hops[url]):
+            assert fetcher.resolve_short_url("https://lnkd.in/x") == "https://example.com/final"
+
+    def test_resolved_chain_is_cached(self, fetcher):
+        with patch.object(fetcher.session, "head", return_value=make_redirect("https://example.com/a")) as mock_head:
+            fetcher.resolve_short_url("https://bit.ly/abc")
+            assert fetcher.resolve_short_url("https://bit.ly/abc") == "https://example.com/a"
+        assert mock_head.call_count == 1
+
+    def test_redirect_loop_is_bounded(self, fetcher):
+        with patch.object(fetcher.session, "head", return_value=make_redirect("https://bit.ly/loop")) as mock_head:
+            assert fetcher.resolve_short_url("https://bit.ly/loop") == "https://bit.ly/loop"
+        assert mock_head.call_count == fetcher.MAX_REDIRECTS
+
+    def test_shortener_rule_timeout_is_used(self, fetcher):
+        fetcher.domain_rules = DomainRules([DomainRule("bit.ly", action="shortener", timeout=2)])
+        with patch.object(fetcher.session, "head", return_value=make_redirect("https://example.com/a")) as mock_head:
+            fetcher.resolve_short_url("https://bit.ly/abc")
+        assert mock_head.call_args.kwargs["timeout"] == 2
+
+    def test_shortener_failure_returns_friendly_error(self, fetcher):
+        with patch.object(fetcher.session, "head", side_effect=requests.exceptions.ConnectionError):
+            assert fetcher.get_title("https://bit.ly/abc") == "Error: Could not resolve the short link."
+
+    def test_youtu_be_is_not_resolved_over_the_network(self, fetcher):
+        resp = make_response()
+        resp.json.return_value = {"title": "Video", "author_name": "Channel"}
+        with patch.object(fetcher.session, "head") as mock_head, \
+                patch.object(fetcher.session, "get", return_value=resp):
+            assert fetcher.get_title("https://youtu.be/abc123") == "YouTube: Video (by Channel)"
+        mock_head.assert_not_called()
+
 
 class TestTrimMessage:
     def test_short_message_unchanged(self, fetcher):
@@ -0,0 +1,140 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from worker_pool import WorkerPool
+
+
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+        self._cond = threading.Condition()
+
+    def send_message(self, channel, message):
+        with self._cond:
+            self.sent.append((channel, message))
+            self._cond.notify_all()
+
+    def wait_for(self, count, timeout=2):
+        with self._cond:
+            assert self._cond.wait_for(lambda: len(self.sent) >= count, timeout=timeout), self.sent
+        return self.sent
+
+
+@pytest.fixture
+def bot():
+    return RecordingBot()
+
+
+@pytest.fixture
+def pool(bot):
+    pool = WorkerPool(bot, workers=4, max_backlog=10)
+    yield pool
+    pool.stop()
+
+
+def reply(text, gate=None):
+    def job(out):
+        if gate is not None:
+            gate.wait(2)
+        out.send_message("#chan", text)
+    return job
+
+
+class TestWorkerPool:
+    def test_job_runs_and_reply_is_sent(self, pool, bot):
+        pool.start()
+        future = pool.submit("#chan", "command", reply("hello"))
+        future.result(timeout=2)
+        assert bot.sent == [("#chan", "hello")]
+
+    def test_replies_are_released_in_submission_order_per_channel(self, pool, bot):
+        pool.start()
+        slow_gate = threading.Event()
+        first = pool.submit("#chan", "command", reply("first", gate=slow_gate))
+        second = pool.submit("#chan", "command", reply("second"))
+        second.result(timeout=2)
+        assert bot.sent == []  # held back until the first job is done
+        slow_gate.set()
+        first.result(timeout=2)
+        assert bot.wait_for(2) == [("#chan", "first"), ("#chan", "second")]
+
+    def test_other_channels_are_not_held_back(self, pool, bot):
+        pool.start()
+        gate = threading.Event()
+        pool.submit("#a", "command", lambda out: (gate.wait(2), out.send_message("#a", "slow")))
+        pool.submit("#b", "command", lambda out: out.send_message("#b", "fast")).result(timeout=2)
+        assert bot.sent == [("#b", "fast")]
+        gate.set()
+        bot.wait_for(2)
+
+    def test_timed_out_job_releases_the_channel_and_its_reply_is_dropped(self, pool, bot):
+        pool.start()
+        gate = threading.Event()
+        slow = pool.submit("#chan", "command", reply("late", gate=gate), timeout=0.1)
+        pool.submit("#chan", "command", reply("next"))
+        assert bot.wait_for(1) == [("#chan", "next")]
+        gate.set()
+        slow.result(timeout=2)
+        assert bot.sent == [("#chan", "next")]
+        assert pool.stats()["timeouts"] == 1
+
+    def test_sends_after_the_job_finished_go_straight_through(self, pool, bot):
+        # Mirrors LiigaCommand keeping the bot reference for its poller thread.
+        pool.start()
+        kept = {}
+        pool.submit("#chan", "command", lambda out: kept.setdefault("bot", out)).result(timeout=2)
+        kept["bot"].send_message("#chan", "goal!")
+        assert bot.sent == [("#chan", "goal!")]
+
+    def test_collector_proxies_other_bot_attributes(self, pool):
+        pool.bot.nickname = "KukistiBot"
+        pool.start()
+        assert pool.submit("#chan", "command", lambda out: out.nickname).result(timeout=2) == "KukistiBot"
+
+    def test_exception_is_counted_and_does_not_block_channel(self, pool, bot):
+        pool.start()
+        failing = pool.submit("#chan", "command", MagicMock(side_effect=RuntimeError("boom")))
+        with pytest.raises(RuntimeError):
+            failing.result(timeout=2)
+        pool.submit("#chan", "command", reply("ok")).result(timeout=2)
+        assert bot.sent == [("#chan", "ok")]
+        assert pool.stats()["errors"] == 1
+
+
+class TestShedding:
+    def test_oldest_url_job_is_shed_first(self, bot):
+        pool = WorkerPool(bot, workers=1, max_backlog=2)  # not started: jobs stay queued
+        oldest_url = pool.submit("#chan", "url", reply("url1"))
+        pool.submit("#chan", "command", reply("cmd1"))
+        pool.submit("#chan", "command", reply("cmd2"))
+        assert oldest_url.cancelled()
+        assert pool.stats()["shed"]["url"] == 1
+        assert pool.stats()["backlog"] == 2
+
+    def test_incoming_url_is_dropped_when_only_commands_are_queued(self, bot):
+        pool = WorkerPool(bot, workers=1, max_backlog=2)
+        pool.submit("#chan", "command", reply("cmd1"))
+        pool.submit("#chan", "command", reply("cmd2"))
+        assert pool.submit("#chan", "url", reply("url")) is None
+        assert pool.stats()["shed"]["url"] == 1
+        assert pool.stats()["backlog"] == 2
+
+    def test_command_sheds_oldest_command_when_no_urls_queued(self, bot):
+        pool = WorkerPool(bot, workers=1, max_backlog=2)
+        oldest = pool.submit("#chan", "command", reply("cmd1"))
+        pool.submit("#chan", "command", reply("cmd2"))
+        assert pool.submit("#chan", "command", reply("cmd3")) is not None
+        assert oldest.cancelled()
+
+    def test_shed_job_does_not_block_later_replies(self, bot):
+        pool = WorkerPool(bot, workers=1, max_backlog=1)
+        pool.submit("#chan", "url", reply("url"))
+        kept = pool.submit("#chan", "command", reply("cmd"))
+        pool.start()
+        try:
+            kept.result(timeout=2)
+        finally:
+            pool.stop()
+        assert bot.sent == [("#chan", "cmd")]
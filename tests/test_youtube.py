@@ -0,0 +1,120 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from youtube import VideoInfoCache, YouTubeClient, extract_video_id
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def oembed_response(title="Song", author="Artist"):
+    resp = MagicMock()
+    resp.status_code = 200
+    resp.json.return_value = {"title": title, "author_name": author}
+    return resp
+
+
+class TestExtractVideoId:
+    @pytest.mark.parametrize("url", [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+        "https://m.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://music.youtube.com/watch?v=dQw4w9WgXcQ&list=RDAMVM",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://www.youtube.com/live/dQw4w9WgXcQ?si=abc",
+        "https://www.youtube.com/embed/dQw4w9WgXcQ",
+        "https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ?start=10",
+        "https://www.youtube.com/v/dQw4w9WgXcQ",
+        "https://youtu.be/dQw4w9WgXcQ?t=42",
+        "https://youtu.be/dQw4w9WgXcQ/",
+    ])
+    def test_url_forms(self, url):
+        assert extract_video_id(url) == "dQw4w9WgXcQ"
+
+    @pytest.mark.parametrize("url", [
+        "https://www.youtube.com/watch",
+        "https://www.youtube.com/",
+        "https://www.youtube.com/@channel",
+        "https://youtu.be/",
+        "https://www.youtube.com/watch?v=<script>",
+    ])
+    def test_no_video_id(self, url):
+        assert extract_video_id(url) is None
+
+
+class TestVideoInfoCache:
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = VideoInfoCache(ttl=100, clock=clock)
+        cache.set("abc", "Song", "Artist")
+        assert cache.get("abc") == ("Song", "Artist")
+        clock.now += 100
+        assert cache.get("abc") is None
+
+    def test_persists_across_restarts(self, tmp_path):
+        path = str(tmp_path / "yt.db")
+        cache = VideoInfoCache(path=path)
+        cache.set("abc", "Song", "Artist")
+        cache.close()
+        assert VideoInfoCache(path=path).get("abc") == ("Song", "Artist")
+
+    def test_memory_is_bounded_but_disk_keeps_everything(self, tmp_path):
+        cache = VideoInfoCache(path=str(tmp_path / "yt.db"), memory_size=5)
+        for i in range(20):
+            cache.set(f"id{i}", f"Song {i}", "Artist")
+        assert len(cache._memory) == 5
+        assert cache.get("id0") == ("Song 0", "Artist")
+
+
+class TestYouTubeClient:
+    def test_lookup_is_cached(self):
+        session = MagicMock()
+        session.get.return_value = oembed_response()
+        client = YouTubeClient(session)
+        assert client.get_info("abc") == ("Song", "Artist")
+        assert client.get_info("abc") == ("Song", "Artist")
+        assert session.get.call_count == 1
+
+    def test_concurrent_lookups_of_one_video_share_a_request(self):
+        session = MagicMock()
+        calls = []
+
+        def slow_get(url, **kwargs):
+            calls.append(url)
+            time.sleep(0.05)
+            return oembed_response()
+
+        session.get.side_effect = slow_get
+        client = YouTubeClient(session)
+        threads = [threading.Thread(target=client.get_info, args=("abc",)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+
+    def test_different_videos_are_fetched_side_by_side(self):
+        session = MagicMock()
+        barrier = threading.Barrier(5, timeout=2)
+
+        def get(url, **kwargs):
+            barrier.wait()  # Only passes if all five requests are in flight at once
+            return oembed_response()
+
+        session.get.side_effect = get
+        client = YouTubeClient(session)
+        threads = [threading.Thread(target=client.get_info, args=(f"id{i}",)) for i in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert session.get.call_count == 5
+        assert not barrier.broken